@@ -0,0 +1,76 @@
+"""
+Database migration: generated expiry_date column on items
+Adds a STORED generated column expiry_date = mfg_date + warranty_years (calendar years)
+with an index, so warranty queries ("expiring in the next 90 days") become index range scans
+instead of evaluating DATE_ADD/DATEDIFF for every row.
+"""
+
+import mysql.connector
+import os
+
+# Database configuration - matches the combined backend service
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "gondola.proxy.rlwy.net"),
+    "port": int(os.getenv("DB_PORT", 24442)),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASS", "SZiTeOCZgSbLTZLdDxlIsMKYGRlfxFsd"),
+    "database": os.getenv("DB_NAME", "sih_qr_db"),
+    "charset": "utf8mb4",
+    "autocommit": True
+}
+
+def migrate_expiry_date():
+    """Add items.expiry_date (generated, stored) and idx_items_expiry_date."""
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+            ALTER TABLE items
+            ADD COLUMN expiry_date DATE
+            GENERATED ALWAYS AS (DATE_ADD(mfg_date, INTERVAL warranty_years YEAR)) STORED
+            """)
+            print("✅ Added generated expiry_date column to items table")
+        except mysql.connector.Error as e:
+            if "Duplicate column name" in str(e):
+                print("ℹ️  expiry_date column already exists in items table")
+            else:
+                raise
+
+        try:
+            cursor.execute("CREATE INDEX idx_items_expiry_date ON items (expiry_date)")
+            print("✅ Added idx_items_expiry_date index")
+        except mysql.connector.Error as e:
+            if "Duplicate key name" in str(e):
+                print("ℹ️  idx_items_expiry_date index already exists")
+            else:
+                raise
+
+        # Sanity check: the column should match the expression used elsewhere
+        cursor.execute("""
+        SELECT COUNT(*) FROM items
+        WHERE expiry_date <> DATE_ADD(mfg_date, INTERVAL warranty_years YEAR)
+        """)
+        mismatched = cursor.fetchone()[0]
+        if mismatched:
+            print(f"⚠️  {mismatched} rows have an unexpected expiry_date")
+        else:
+            print("✅ expiry_date verified for all items")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"❌ Error migrating expiry_date: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Adding generated expiry_date column to items...")
+    success = migrate_expiry_date()
+    if success:
+        print("\n✅ Migration completed successfully!")
+    else:
+        print("\n❌ Migration failed!")
@@ -0,0 +1,59 @@
+"""
+Database migration: sync_events table for offline scanner sync
+Stores the outcome of every uploaded status event by idempotency key, so
+/sync/status_events can answer replayed uploads without applying them twice.
+"""
+
+import mysql.connector
+import os
+
+# Database configuration - matches the combined backend service
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "gondola.proxy.rlwy.net"),
+    "port": int(os.getenv("DB_PORT", 24442)),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASS", "SZiTeOCZgSbLTZLdDxlIsMKYGRlfxFsd"),
+    "database": os.getenv("DB_NAME", "sih_qr_db"),
+    "charset": "utf8mb4",
+    "autocommit": True
+}
+
+def migrate_sync_events():
+    """Create sync_events (unique idempotency_key, per-device index)."""
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_events (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            idempotency_key VARCHAR(128) NOT NULL,
+            device_id VARCHAR(128) NOT NULL,
+            uid VARCHAR(255),
+            status VARCHAR(64),
+            result VARCHAR(16) NOT NULL,
+            error VARCHAR(500),
+            client_timestamp DATETIME NULL,
+            received_at DATETIME NOT NULL,
+            UNIQUE KEY uq_sync_events_key (idempotency_key),
+            INDEX idx_sync_events_device (device_id, id)
+        )
+        """)
+        print("✅ sync_events table ready")
+
+        cursor.close()
+        conn.close()
+
+    except Exception as e:
+        print(f"❌ Error creating sync_events: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Creating sync_events table...")
+    success = migrate_sync_events()
+    if success:
+        print("\n✅ Migration completed successfully!")
+    else:
+        print("\n❌ Migration failed!")
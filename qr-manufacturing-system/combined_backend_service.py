@@ -59,13 +59,15 @@ This service combines all the original project functionality (QR generation,
 engraving, scanning) into a single Flask application for easier deployment.
 """
 
-from flask import Flask, request, jsonify, send_file, current_app
+from flask import Flask, Response, request, jsonify, send_file, current_app
 from flask_cors import CORS
 from dotenv import load_dotenv
 import qrcode
 import io
 import json
+import base64
 import mysql.connector
+from mysql.connector import errorcode
 from datetime import datetime, date, timedelta
 from pathlib import Path
 import threading
@@ -74,6 +76,14 @@ import logging
 import os
 import traceback
 import atexit
+from collections import OrderedDict
+
+from item_index import ItemIndex
+from warranty import compute_expiry_date
+from status_updates import apply_sync_events, set_status_bulk, set_status_range
+from engraving import TooManySubscribers, build_toolpath, compare_strategies
+from engraving.config import (build_line, engraving_job_items, layout_optimizer, plan_engraving_job,
+                              prepare_engraving, simulate_engraving_job, simulated_engraver)
 
 app = Flask(__name__)
 
@@ -161,59 +171,104 @@ ROLE_ALLOWED_STATUSES = {
               "Service Needed", "Replacement Needed", "Replaced", "Discarded"]
 }
 
-def get_employee_role(emp_id):
-    """Fetch employee role from database."""
-    conn = None
-    try:
+# Employee cache: roles almost never change, so profiles are kept for
+# EMPLOYEE_CACHE_TTL seconds and unknown ids for EMPLOYEE_CACHE_NEGATIVE_TTL.
+# POST /employees/cache/invalidate drops entries after an employee is edited.
+EMPLOYEE_CACHE_TTL = float(os.getenv("EMPLOYEE_CACHE_TTL", 300))
+EMPLOYEE_CACHE_NEGATIVE_TTL = float(os.getenv("EMPLOYEE_CACHE_NEGATIVE_TTL", 30))
+
+class EmployeeCache:
+    """TTL cache of employees rows by id, with negative entries for unknown ids."""
+
+    def __init__(self, ttl, negative_ttl, max_entries=1024):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # id -> (expires_at, row or None)
+        self._counters = {"hits": 0, "negative_hits": 0, "misses": 0, "invalidated": 0}
+
+    @staticmethod
+    def _key(emp_id):
+        return str(emp_id).strip()
+
+    def get(self, emp_id):
+        """Employee row (id, username, full_name, role) or None; DB errors propagate uncached."""
+        key = self._key(emp_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._counters["hits" if entry[1] else "negative_hits"] += 1
+                return dict(entry[1]) if entry[1] else None
+            self._counters["misses"] += 1
+
+        row = self._load(key)
+        ttl = self.ttl if row else self.negative_ttl
+        if ttl > 0:
+            with self._lock:
+                self._entries[key] = (time.monotonic() + ttl, row)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return dict(row) if row else None
+
+    def _load(self, key):
         conn = get_db_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT role FROM employees WHERE id=%s", (emp_id,))
-        row = cur.fetchone()
-        return row[0] if row else None
-    except Exception as e:
-        logger.error(f"Error getting employee role: {e}")
-        return None
-    finally:
-        if conn:
+        try:
+            cur = conn.cursor(dictionary=True)
+            cur.execute("SELECT id, username, full_name, role FROM employees WHERE id=%s", (key,))
+            return cur.fetchone()
+        finally:
             try:
                 conn.close()
             except:
                 pass
 
+    def invalidate(self, emp_id=None):
+        """Drop one employee (or everyone when emp_id is None); returns entries removed."""
+        with self._lock:
+            if emp_id is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                removed = 1 if self._entries.pop(self._key(emp_id), None) else 0
+            self._counters["invalidated"] += removed
+            return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["negative_hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "hit_rate": round((lookups - self._counters["misses"]) / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl,
+                "negative_ttl_seconds": self.negative_ttl
+            }
+
+employee_cache = EmployeeCache(EMPLOYEE_CACHE_TTL, EMPLOYEE_CACHE_NEGATIVE_TTL)
+
+def get_employee_role(emp_id):
+    """Fetch employee role (cached)."""
+    try:
+        row = employee_cache.get(emp_id)
+        return row["role"] if row else None
+    except Exception as e:
+        logger.error(f"Error getting employee role: {e}")
+        return None
+
 def get_employee_info(emp_id):
-    """Fetch employee info from database."""
-    conn = None
+    """Fetch employee info (cached)."""
     try:
-        conn = get_db_conn()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT id, username, full_name, role FROM employees WHERE id=%s", (emp_id,))
-        row = cur.fetchone()
-        return row
+        return employee_cache.get(emp_id)
     except Exception as e:
         logger.error(f"Error getting employee info: {e}")
         return None
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except:
-                pass
-
-# Global engraving state
-engraving_state = {
-    "status": "idle",  # idle, running, paused, stopped
-    "current_item": None,
-    "processed_count": 0,
-    "total_count": 0,
-    "start_time": None,
-    "items": [],
-    "simulate": True,
-    "delay_seconds": 1.0
-}
 
-worker_thread = None
+# Background thread stop signal (item index refresher)
 worker_stop_event = threading.Event()
-worker_running = False
 
 def test_db_connection():
     """Test MySQL database connection."""
@@ -239,6 +294,227 @@ def get_db_conn():
         logger.error(f"Database connection error: {e}")
         raise
 
+# Query result cache for read endpoints.
+# Entries expire after QUERY_CACHE_TTL seconds, and are dropped immediately when
+# any table they were built from has been written since (per-table version counters).
+# bump() only sees this process's writes. Writes from other processes (other gunicorn
+# workers, the engraving service's status writer, scanners) are picked up from DB-side
+# change markers (MAX(statuses.id), ...) read at most every QUERY_CACHE_MARKER_SECONDS,
+# so a foreign write is served stale for at most that long, not the full TTL.
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 30))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 512))
+QUERY_CACHE_MARKER_SECONDS = float(os.getenv("QUERY_CACHE_MARKER_SECONDS", 2))
+
+class QueryCache:
+    """TTL + version cache keyed by endpoint and normalized query parameters.
+
+    change_markers() (optional) returns {table: marker} read from the database;
+    when a marker moves, the table is bumped as if this process had written it.
+    """
+
+    def __init__(self, ttl, max_entries, change_markers=None, marker_interval=2.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.change_markers = change_markers
+        self.marker_interval = marker_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, versions, payload)
+        self._versions = {}            # table -> write counter
+        self._markers = {}             # table -> last DB-side change marker
+        self._markers_due = 0.0
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0, "evicted": 0,
+                          "foreign_writes": 0}
+
+    @staticmethod
+    def make_key(endpoint, params):
+        """Normalize params so equivalent requests share an entry."""
+        normalized = []
+        for name, value in (params or {}).items():
+            if value is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+                if not value:
+                    continue
+            normalized.append((name, value))
+        return (endpoint, tuple(sorted(normalized)))
+
+    def _snapshot(self, tables):
+        return tuple(self._versions.get(t, 0) for t in tables)
+
+    def _check_markers(self):
+        """Bump tables whose DB-side marker moved (writes by other processes); rate limited."""
+        if self.change_markers is None or self.ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < self._markers_due:
+                return
+            self._markers_due = now + self.marker_interval
+        try:
+            markers = self.change_markers()
+        except Exception as e:
+            logger.warning(f"Query cache change markers unavailable: {e}")
+            return
+        with self._lock:
+            for table, marker in markers.items():
+                if table in self._markers and self._markers[table] != marker:
+                    self._versions[table] = self._versions.get(table, 0) + 1
+                    self._counters["foreign_writes"] += 1
+                self._markers[table] = marker
+
+    def lookup(self, endpoint, params, tables):
+        """Return (key, versions, payload); payload is None on a miss.
+
+        ``versions`` is captured before the caller runs its query and must be
+        passed back to store(), so a write that lands mid-query marks the
+        entry stale instead of caching old rows under the new version.
+        """
+        self._check_markers()
+        key = self.make_key(endpoint, params)
+        now = time.monotonic()
+        with self._lock:
+            versions = self._snapshot(tables)
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, entry_versions, payload = entry
+                if entry_versions != versions:
+                    del self._entries[key]
+                    self._counters["invalidated"] += 1
+                elif expires_at <= now:
+                    del self._entries[key]
+                    self._counters["expired"] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return key, versions, payload
+            self._counters["misses"] += 1
+            return key, versions, None
+
+    def store(self, key, versions, payload):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, versions, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evicted"] += 1
+
+    def bump(self, *tables):
+        """Record a write to the given tables; dependent entries become stale."""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl,
+                "table_versions": dict(self._versions)
+            }
+
+# Tables each cached endpoint reads from
+ITEM_TABLES = ("items", "statuses")
+ALERT_TABLES = ("ai_alerts",)
+
+def query_cache_markers():
+    """DB-side change markers for QueryCache (see QUERY_CACHE_MARKER_SECONDS).
+
+    Every item write also appends a statuses row, so MAX(statuses.id) covers
+    both item tables. Alerts are inserted, acknowledged and resolved, so their
+    marker combines the three.
+    """
+    markers = {}
+    conn = get_db_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM statuses")
+        status_id = cur.fetchone()[0]
+        markers.update((table, status_id) for table in ITEM_TABLES)
+        try:
+            cur.execute("SELECT MAX(id), MAX(acknowledged_at), MAX(resolved_at) FROM ai_alerts")
+            markers["ai_alerts"] = tuple(cur.fetchone())
+        except mysql.connector.Error as e:
+            if e.errno != errorcode.ER_NO_SUCH_TABLE:
+                raise
+        cur.close()
+    finally:
+        conn.close()
+    return markers
+
+query_cache = QueryCache(QUERY_CACHE_TTL, QUERY_CACHE_MAX_ENTRIES, query_cache_markers, QUERY_CACHE_MARKER_SECONDS)
+
+# Optional in-process item index (see item_index.py). When enabled, /scan,
+# /inventory/search and /inventory/stats are answered from memory.
+ITEM_INDEX_ENABLED = os.getenv("ITEM_INDEX_ENABLED", "false").lower() == "true"
+ITEM_INDEX_REFRESH_SECONDS = float(os.getenv("ITEM_INDEX_REFRESH_SECONDS", 5))
+
+item_index = ItemIndex() if ITEM_INDEX_ENABLED else None
+item_index_thread = None
+
+def item_index_ready():
+    if item_index is None:
+        return False
+    if not item_index.ready:
+        start_item_index()  # under gunicorn the __main__ startup block never runs
+    return item_index.ready
+
+def item_index_loop():
+    """Load the item index, then refresh it incrementally from DB watermarks."""
+    logger.info("📇 Item index refresher started")
+    while not worker_stop_event.is_set():
+        conn = None
+        try:
+            conn = get_db_conn()
+            if item_index.ready:
+                item_index.refresh(conn)
+            else:
+                item_index.load(conn)
+        except Exception as e:
+            logger.error(f"Item index refresh error: {e}")
+        finally:
+            if conn:
+                try:
+                    conn.close()
+                except:
+                    pass
+        worker_stop_event.wait(ITEM_INDEX_REFRESH_SECONDS)
+
+def start_item_index():
+    """Start the background loader/refresher if the index is enabled."""
+    global item_index_thread
+    if item_index is None or (item_index_thread and item_index_thread.is_alive()):
+        return
+    item_index_thread = threading.Thread(target=item_index_loop, daemon=True)
+    item_index_thread.start()
+
+expiry_column_ready = None  # items.expiry_date exists (migrate_expiry_date.py); probed once per process
+
+def expiry_expression(cursor):
+    """SQL for an item's (alias i) expiry date.
+
+    The indexed generated column when the database has been migrated,
+    otherwise the same DATE_ADD evaluated per row.
+    """
+    global expiry_column_ready
+    if expiry_column_ready is None:
+        cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'items' AND COLUMN_NAME = 'expiry_date'
+        """)
+        row = cursor.fetchone()
+        expiry_column_ready = bool(list(row.values())[0] if isinstance(row, dict) else row[0])
+        if not expiry_column_ready:
+            logger.warning("⚠️ items.expiry_date missing, computing expiry per row (run migrate_expiry_date.py)")
+    if expiry_column_ready:
+        return "i.expiry_date"
+    return "DATE_ADD(i.mfg_date, INTERVAL i.warranty_years YEAR)"
+
 def make_uid(component, vendor, lot, serial):
     """Generate UID in original project format."""
     return f"{component}-{vendor}-{lot}-{serial:05d}"
@@ -263,69 +539,9 @@ def generate_qr_image_bytes(payload):
         logger.error(f"QR generation error: {e}")
         raise
 
-def engrave_single_item(uid, simulate=True):
-    """Engrave a single item (simulation or real hardware)."""
-    try:
-        delay = engraving_state.get("delay_seconds", 1.0)
-        time.sleep(delay)
-        logger.info(f"✅ {'Simulated' if simulate else 'Hardware'} engraving completed for {uid}")
-        return True
-    except Exception as e:
-        logger.error(f"❌ Engraving failed for {uid}: {e}")
-        return False
-
-def worker_loop():
-    """Background worker for engraving operations."""
-    global engraving_state, worker_running
-    
-    logger.info("🔧 Background worker started")
-    worker_running = True
-    
-    try:
-        while not worker_stop_event.is_set() and worker_running:
-            try:
-                if engraving_state["status"] != "running":
-                    time.sleep(0.5)
-                    continue
-                
-                items = engraving_state.get("items", [])
-                processed = engraving_state.get("processed_count", 0)
-                
-                if processed >= len(items):
-                    engraving_state["status"] = "completed"
-                    engraving_state["current_item"] = None
-                    logger.info("✅ Engraving job completed")
-                    continue
-                
-                # Get next item to engrave
-                current_item = items[processed]
-                uid = current_item.get("uid")
-                
-                if uid:
-                    engraving_state["current_item"] = uid
-                    logger.info(f"🔥 Starting engraving for {uid}")
-                    
-                    success = engrave_single_item(uid, engraving_state.get("simulate", True))
-                    
-                    if success:
-                        engraving_state["processed_count"] += 1
-                        logger.info(f"✅ Engraving completed for {uid} ({engraving_state['processed_count']}/{len(items)})")
-                    else:
-                        engraving_state["processed_count"] += 1
-                else:
-                    engraving_state["processed_count"] += 1
-                    
-            except Exception as e:
-                logger.error(f"Worker loop error: {e}")
-                logger.error(traceback.format_exc())
-                time.sleep(1.0)
-                
-    except Exception as e:
-        logger.error(f"Worker thread fatal error: {e}")
-        logger.error(traceback.format_exc())
-    finally:
-        worker_running = False
-        logger.info("🔧 Background worker stopped")
+# Engraving line: drivers, layout, verification and the ENGRAVING_* settings are shared
+# with the engraving service (engraving/config.py); durable jobs use this service's connections.
+engraving_line = build_line(get_db_conn)
 
 # Error handler
 @app.errorhandler(Exception)
@@ -385,6 +601,7 @@ def generate():
             serial = 1
 
         results = []
+        index_rows = []
         for i in range(count):
             uid = make_uid(component, vendor, lot, serial + i)
             payload = uid
@@ -418,8 +635,15 @@ def generate():
             """, (uid, "Manufactured", "Factory", "Initial QR generation", datetime.utcnow()))
 
             results.append({"uid": uid, "qr_path": None if DISABLE_QR_FILES else str(local_path)})
+            index_rows.append((uid, component, vendor, lot, mfg_date, warranty_years, created_at))
 
         conn.commit()
+        query_cache.bump(*ITEM_TABLES)
+
+        if item_index_ready():
+            for entry in index_rows:
+                item_index.add_item(*entry, status="Manufactured", location="Factory",
+                                    note="Initial QR generation", status_updated_at=entry[-1])
 
         return jsonify({"success": True, "results": results})
 
@@ -566,6 +790,10 @@ def get_manufactured_items():
     conn = None
     try:
         limit = request.args.get('limit', 50, type=int)
+
+        cache_key, versions, cached = query_cache.lookup("items_manufactured", {"limit": limit}, ITEM_TABLES)
+        if cached is not None:
+            return jsonify(cached)
         
         conn = get_db_conn()
         cursor = conn.cursor(dictionary=True)
@@ -590,7 +818,9 @@ def get_manufactured_items():
             if item['status_updated_at'] and hasattr(item['status_updated_at'], 'isoformat'):
                 item['status_updated_at'] = item['status_updated_at'].isoformat()
         
-        return jsonify({"success": True, "items": items})
+        payload = {"success": True, "items": items}
+        query_cache.store(cache_key, versions, payload)
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f"Failed to get manufactured items: {e}")
@@ -609,6 +839,10 @@ def get_inventory_items():
     conn = None
     try:
         limit = request.args.get('limit', 100, type=int)
+
+        cache_key, versions, cached = query_cache.lookup("inventory_items", {"limit": limit}, ITEM_TABLES)
+        if cached is not None:
+            return jsonify(cached)
         
         conn = get_db_conn()
         cursor = conn.cursor(dictionary=True)
@@ -639,11 +873,13 @@ def get_inventory_items():
             if item['status_updated_at'] and hasattr(item['status_updated_at'], 'isoformat'):
                 item['status_updated_at'] = item['status_updated_at'].isoformat()
         
-        return jsonify({
+        payload = {
             "success": True,
             "items": items,
             "total": len(items)
-        })
+        }
+        query_cache.store(cache_key, versions, payload)
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f"Failed to get inventory items: {e}")
@@ -664,6 +900,11 @@ def get_inventory_stats():
     """Get inventory statistics."""
     conn = None
     try:
+        if item_index_ready():
+            stats = item_index.stats()
+            stats.update({"low_stock_alerts": 0, "pending_actions": 0})
+            return jsonify({"success": True, "stats": stats, "source": "index"})
+
         conn = get_db_conn()
         cursor = conn.cursor(dictionary=True)
         
@@ -720,6 +961,18 @@ def search_inventory():
         query = request.args.get('q', '')
         component_filter = request.args.get('component', '')
         status_filter = request.args.get('status', '')
+
+        if item_index_ready():
+            items = item_index.search(query.strip(), component_filter.strip(), status_filter.strip(), limit=100)
+            return jsonify({"success": True, "items": items, "total": len(items), "source": "index"})
+
+        cache_key, versions, cached = query_cache.lookup(
+            "inventory_search",
+            {"q": query, "component": component_filter, "status": status_filter},
+            ITEM_TABLES
+        )
+        if cached is not None:
+            return jsonify(cached)
         
         conn = get_db_conn()
         cursor = conn.cursor(dictionary=True)
@@ -769,11 +1022,13 @@ def search_inventory():
             if item['status_updated_at'] and hasattr(item['status_updated_at'], 'isoformat'):
                 item['status_updated_at'] = item['status_updated_at'].isoformat()
         
-        return jsonify({
+        payload = {
             "success": True,
             "items": items,
             "total": len(items)
-        })
+        }
+        query_cache.store(cache_key, versions, payload)
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f"Failed to search inventory: {e}")
@@ -789,55 +1044,485 @@ def search_inventory():
             except:
                 pass
 
+# Faceted inventory query: filters, keyset pagination and facet counts in one call
+INVENTORY_QUERY_FILTERS = {
+    "component": "m.component",
+    "vendor": "m.vendor",
+    "lot": "m.lot",
+    "status": "m.status",
+    "location": "m.location"
+}
+INVENTORY_QUERY_SORTS = {
+    "created_at": "m.created_at",
+    "uid": "m.uid",
+    "component": "m.component",
+    "vendor": "m.vendor",
+    "lot": "m.lot",
+    "mfg_date": "m.mfg_date"
+}
+INVENTORY_FACETS = ("component", "vendor", "lot", "status", "location")
+INVENTORY_QUERY_MAX_LIMIT = 500
+
+INVENTORY_MATCHED_CTE = """
+    WITH latest AS (
+        SELECT uid, status, location, updated_at,
+               ROW_NUMBER() OVER (PARTITION BY uid ORDER BY updated_at DESC) as rn
+        FROM statuses
+    ),
+    matched AS (
+        SELECT i.uid, i.component, i.vendor, i.lot,
+               i.mfg_date, i.warranty_years, i.created_at,
+               s.status, s.location, s.updated_at as status_updated_at
+        FROM items i
+        LEFT JOIN latest s ON i.uid = s.uid AND s.rn = 1
+    )
+"""
+
+def encode_cursor(values):
+    """Encode keyset pagination state as an opaque URL-safe token."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor(); raises ValueError if malformed."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _multi_arg(name):
+    """Read a filter that may be repeated (?lot=a&lot=b) or comma separated (?lot=a,b)."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(",") if v.strip())
+    return sorted(set(values))
+
+@app.route("/inventory/query", methods=["GET"])
+def query_inventory():
+    """Filter, sort and page inventory items and return facet counts.
+
+    Query params:
+      component, vendor, lot, status, location  - filters (repeatable or comma separated;
+                                                   "Unknown" matches items without a status)
+      q        - substring match on uid, component or vendor
+      sort     - one of INVENTORY_QUERY_SORTS (default created_at)
+      order    - asc | desc (default desc)
+      limit    - page size (max INVENTORY_QUERY_MAX_LIMIT)
+      cursor   - next_cursor from the previous page
+      facets   - include facet counts (default true on the first page only)
+
+    Every page returns "total", the number of matching items; later pages
+    carry the first page's count in the cursor instead of counting again.
+    """
+    conn = None
+    try:
+        filters = {name: _multi_arg(name) for name in INVENTORY_QUERY_FILTERS}
+        text = request.args.get('q', '').strip()
+        sort = request.args.get('sort', 'created_at')
+        order = request.args.get('order', 'desc').lower()
+        limit = min(max(request.args.get('limit', 100, type=int), 1), INVENTORY_QUERY_MAX_LIMIT)
+        cursor_token = request.args.get('cursor', '').strip()
+        include_facets = request.args.get('facets', 'false' if cursor_token else 'true').lower() == 'true'
+
+        if sort not in INVENTORY_QUERY_SORTS:
+            return jsonify({"success": False, "error": f"sort must be one of {sorted(INVENTORY_QUERY_SORTS)}"}), 400
+        if order not in ("asc", "desc"):
+            return jsonify({"success": False, "error": "order must be 'asc' or 'desc'"}), 400
+
+        after = None
+        if cursor_token:
+            try:
+                after = decode_cursor(cursor_token)
+                if after.get("sort") != sort or after.get("order") != order:
+                    raise ValueError("Cursor does not match sort order")
+            except (ValueError, AttributeError) as ce:
+                return jsonify({"success": False, "error": str(ce)}), 400
+
+        cache_key, versions, cached = query_cache.lookup("inventory_query", {
+            **{name: ",".join(values) for name, values in filters.items()},
+            "q": text, "sort": sort, "order": order, "limit": limit,
+            "cursor": cursor_token, "facets": include_facets
+        }, ITEM_TABLES)
+        if cached is not None:
+            return jsonify(cached)
+
+        # Filters shared by the page and the facet counts
+        where_conditions = []
+        params = []
+        for name, values in filters.items():
+            if not values:
+                continue
+            column = INVENTORY_QUERY_FILTERS[name]
+            known = [v for v in values if v != "Unknown"]
+            clauses = []
+            if known:
+                clauses.append(f"{column} IN ({', '.join(['%s'] * len(known))})")
+                params.extend(known)
+            if "Unknown" in values:
+                clauses.append(f"{column} IS NULL")
+            where_conditions.append("(" + " OR ".join(clauses) + ")")
+        if text:
+            where_conditions.append("(m.uid LIKE %s OR m.component LIKE %s OR m.vendor LIKE %s)")
+            params.extend([f"%{text}%"] * 3)
+        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+
+        # Keyset pagination on (sort column, uid) so deep pages stay cheap
+        sort_column = INVENTORY_QUERY_SORTS[sort]
+        direction = "ASC" if order == "asc" else "DESC"
+        op = ">" if order == "asc" else "<"
+        page_conditions = [where_clause]
+        page_params = list(params)
+        if after:
+            if sort == "uid":
+                page_conditions.append(f"m.uid {op} %s")
+                page_params.append(after["uid"])
+            elif after.get("value") is None:
+                # MySQL sorts NULLs first ascending and last descending
+                nulls_after = f" OR {sort_column} IS NOT NULL" if order == "asc" else ""
+                page_conditions.append(f"(({sort_column} IS NULL AND m.uid {op} %s){nulls_after})")
+                page_params.append(after["uid"])
+            else:
+                nulls_after = f" OR {sort_column} IS NULL" if order == "desc" else ""
+                page_conditions.append(
+                    f"({sort_column} {op} %s OR ({sort_column} = %s AND m.uid {op} %s){nulls_after})")
+                page_params.extend([after["value"], after["value"], after["uid"]])
+        order_by = f"m.uid {direction}" if sort == "uid" else f"{sort_column} {direction}, m.uid {direction}"
+
+        conn = get_db_conn()
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute(f"""
+            {INVENTORY_MATCHED_CTE}
+            SELECT * FROM matched m
+            WHERE {" AND ".join(page_conditions)}
+            ORDER BY {order_by}
+            LIMIT %s
+        """, page_params + [limit + 1])
+        items = cursor.fetchall()
+
+        has_more = len(items) > limit
+        items = items[:limit]
+
+        # Convert datetime objects to strings for JSON serialization
+        for item in items:
+            if item['mfg_date'] and hasattr(item['mfg_date'], 'strftime'):
+                item['mfg_date'] = item['mfg_date'].strftime('%Y-%m-%d')
+            if item['created_at'] and hasattr(item['created_at'], 'isoformat'):
+                item['created_at'] = item['created_at'].isoformat()
+            if item['status_updated_at'] and hasattr(item['status_updated_at'], 'isoformat'):
+                item['status_updated_at'] = item['status_updated_at'].isoformat()
+
+        payload = {
+            "success": True,
+            "items": items,
+            "count": len(items)
+        }
+
+        if include_facets:
+            # All facets come from a single scan of the filtered set
+            facet_sql = " UNION ALL ".join(
+                f"SELECT '{name}' as facet, {name} as value, COUNT(*) as count FROM filtered GROUP BY {name}"
+                for name in INVENTORY_FACETS
+            )
+            cursor.execute(f"""
+                {INVENTORY_MATCHED_CTE},
+                filtered AS (SELECT * FROM matched m WHERE {where_clause})
+                {facet_sql}
+            """, params)
+
+            facets = {name: {} for name in INVENTORY_FACETS}
+            for row in cursor.fetchall():
+                facets[row['facet']][row['value'] or 'Unknown'] = row['count']
+            payload["facets"] = facets
+            payload["total"] = sum(facets["component"].values())
+        elif after and isinstance(after.get("total"), int):
+            payload["total"] = after["total"]
+        else:
+            cursor.execute(f"""
+                {INVENTORY_MATCHED_CTE}
+                SELECT COUNT(*) as total FROM matched m WHERE {where_clause}
+            """, params)
+            payload["total"] = cursor.fetchone()['total']
+
+        payload["next_cursor"] = None
+        if has_more and items:
+            last = items[-1]
+            payload["next_cursor"] = encode_cursor({"sort": sort, "order": order, "value": last[sort],
+                                                    "uid": last["uid"], "total": payload["total"]})
+
+        query_cache.store(cache_key, versions, payload)
+        return jsonify(payload)
+
+    except Exception as e:
+        logger.error(f"Failed to query inventory: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    finally:
+        if conn:
+            try:
+                conn.close()
+            except:
+                pass
+
+INVENTORY_CHANGES_MAX_LIMIT = 1000
+# statuses ids below the watermark that were allocated but not yet committed when
+# a poll ran are kept in the token as gap ranges and re-scanned; a gap is dropped
+# once it falls this many ids behind the watermark (rolled-back inserts never fill)
+INVENTORY_CHANGES_GAP_WINDOW = int(os.getenv("INVENTORY_CHANGES_GAP_WINDOW", 100000))
+INVENTORY_CHANGES_MAX_GAPS = int(os.getenv("INVENTORY_CHANGES_MAX_GAPS", 50))
+# Items are only taken by created_at once they are this old, so a late commit of an
+# earlier created_at cannot be stepped over by the (created_at, uid) keyset
+INVENTORY_CHANGES_SETTLE_SECONDS = int(os.getenv("INVENTORY_CHANGES_SETTLE_SECONDS", 30))
+
+def status_gap_ranges(gaps, seen_ids, low, high):
+    """Ids not yet delivered: old gap ranges plus (low, high], minus seen_ids.
+
+    Returns [[first, last], ...] ascending, trimmed to INVENTORY_CHANGES_GAP_WINDOW
+    below high and the newest INVENTORY_CHANGES_MAX_GAPS ranges.
+    """
+    ranges = []
+    for first, last in list(gaps) + ([[low + 1, high]] if high > low else []):
+        for seen in sorted(i for i in seen_ids if first <= i <= last):
+            if seen > first:
+                ranges.append([first, seen - 1])
+            first = seen + 1
+        if first <= last:
+            ranges.append([first, last])
+    floor = high - INVENTORY_CHANGES_GAP_WINDOW
+    ranges = [[max(first, floor + 1), last] for first, last in sorted(ranges) if last > floor]
+    return ranges[-INVENTORY_CHANGES_MAX_GAPS:]
+
+def status_gap_sql(gaps):
+    """SQL fragment (and params) matching statuses ids inside the gap ranges."""
+    return " OR ".join(["id BETWEEN %s AND %s"] * len(gaps)), [bound for gap in gaps for bound in gap]
+
+def settled_created_at():
+    """Newest items.created_at the change feed may step over (created_at is written as UTC)."""
+    return (datetime.utcnow() - timedelta(seconds=INVENTORY_CHANGES_SETTLE_SECONDS)).replace(microsecond=0)
+
+def inventory_head_token(cursor):
+    """Change token for the current head of items/statuses (dictionary cursor)."""
+    cursor.execute("SELECT COALESCE(MAX(id), 0) as status_id FROM statuses")
+    status_id = cursor.fetchone()['status_id']
+    # Ids just below the head may belong to transactions still in flight
+    low = max(status_id - INVENTORY_CHANGES_MAX_LIMIT, 0)
+    cursor.execute("SELECT id FROM statuses WHERE id > %s AND id <= %s", (low, status_id))
+    gaps = status_gap_ranges([], {row['id'] for row in cursor.fetchall()}, low, status_id)
+    cursor.execute("""
+        SELECT created_at, uid FROM items
+        WHERE created_at <= %s
+        ORDER BY created_at DESC, uid DESC LIMIT 1
+    """, (settled_created_at(),))
+    newest = cursor.fetchone()
+    return encode_cursor({
+        "status_id": status_id,
+        "gaps": gaps,
+        "created_at": newest['created_at'].isoformat() if newest else None,
+        "uid": newest['uid'] if newest else None
+    })
+
+@app.route("/inventory/changes", methods=["GET"])
+def get_inventory_changes():
+    """Return items created or re-statused since a change token.
+
+    Neither statuses.id nor items.created_at is assigned in commit order, so
+    the token is more than two high watermarks:
+
+      status_id / gaps   the highest statuses.id delivered, plus ranges of
+                         lower ids that were not visible yet (uncommitted
+                         inserts); gaps are re-scanned on every poll
+      created_at / uid   (items.created_at, uid) keyset for items inserted
+                         without a status row; it only advances over items
+                         older than INVENTORY_CHANGES_SETTLE_SECONDS
+
+    An item whose status rows were already delivered is not repeated by the
+    created_at scan. Call without ``since`` to get the current head token,
+    then poll with the returned ``token``. When ``has_more`` is true, call again
+    immediately with the new token to keep catching up.
+    """
+    conn = None
+    try:
+        since = request.args.get('since', '').strip()
+        limit = min(max(request.args.get('limit', 500, type=int), 1), INVENTORY_CHANGES_MAX_LIMIT)
+
+        conn = get_db_conn()
+        cursor = conn.cursor(dictionary=True)
+
+        if not since:
+            token = inventory_head_token(cursor)
+            return jsonify({"success": True, "items": [], "count": 0, "token": token, "has_more": False})
+
+        try:
+            watermark = decode_cursor(since)
+            status_id = int(watermark["status_id"])
+            gaps = [[int(first), int(last)] for first, last in watermark.get("gaps") or []]
+            created_at = watermark.get("created_at")
+            created_uid = watermark.get("uid") or ""
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return jsonify({"success": False, "error": "Invalid change token"}), 400
+
+        # Status inserts since the token and any that were still uncommitted last time, in id order
+        gap_sql, gap_params = status_gap_sql(gaps)
+        cursor.execute(f"""
+            SELECT id, uid FROM statuses
+            WHERE id > %s{" OR " + gap_sql if gaps else ""}
+            ORDER BY id
+            LIMIT %s
+        """, [status_id] + gap_params + [limit])
+        status_rows = cursor.fetchall()
+
+        # Items created since the token (settled only), keyset on (created_at, uid)
+        settled = settled_created_at()
+        if created_at:
+            cursor.execute("""
+                SELECT uid, created_at FROM items
+                WHERE (created_at > %s OR (created_at = %s AND uid > %s)) AND created_at <= %s
+                ORDER BY created_at, uid
+                LIMIT %s
+            """, (created_at, created_at, created_uid, settled, limit))
+        else:
+            cursor.execute("""
+                SELECT uid, created_at FROM items
+                WHERE created_at <= %s
+                ORDER BY created_at, uid
+                LIMIT %s
+            """, (settled, limit))
+        created_rows = cursor.fetchall()
+
+        changed_uids = list(dict.fromkeys([row['uid'] for row in created_rows] + [row['uid'] for row in status_rows]))
+
+        # Items whose status rows went out with an earlier token were already delivered
+        delivered = set()
+        if changed_uids:
+            placeholders = ", ".join(["%s"] * len(changed_uids))
+            cursor.execute(f"""
+                SELECT DISTINCT uid FROM statuses
+                WHERE uid IN ({placeholders}) AND id <= %s{" AND NOT (" + gap_sql + ")" if gaps else ""}
+            """, changed_uids + [status_id] + gap_params)
+            delivered = {row['uid'] for row in cursor.fetchall()}
+        status_uids = {row['uid'] for row in status_rows}
+        changed_uids = [uid for uid in changed_uids if uid in status_uids or uid not in delivered]
+
+        new_status_id = max([status_id] + [row['id'] for row in status_rows])
+        gaps = status_gap_ranges(gaps, {row['id'] for row in status_rows}, status_id, new_status_id)
+        previous_created_at = created_at
+        if created_rows:
+            created_at = created_rows[-1]['created_at'].isoformat()
+            created_uid = created_rows[-1]['uid']
+
+        items = []
+        if changed_uids:
+            placeholders = ", ".join(["%s"] * len(changed_uids))
+            cursor.execute(f"""
+                SELECT i.uid, i.component, i.vendor, i.lot,
+                       i.mfg_date, i.warranty_years, i.created_at,
+                       s.status, s.location, s.updated_at as status_updated_at
+                FROM items i
+                LEFT JOIN (
+                    SELECT uid, status, location, updated_at,
+                           ROW_NUMBER() OVER (PARTITION BY uid ORDER BY updated_at DESC) as rn
+                    FROM statuses
+                    WHERE uid IN ({placeholders})
+                ) s ON i.uid = s.uid AND s.rn = 1
+                WHERE i.uid IN ({placeholders})
+            """, changed_uids + changed_uids)
+            by_uid = {row['uid']: row for row in cursor.fetchall()}
+
+            for uid in changed_uids:
+                item = by_uid.get(uid)
+                if not item:
+                    continue
+                # New to this client: no status delivered before and not covered by the old created_at keyset
+                is_new = uid not in delivered and (not previous_created_at or not item['created_at']
+                                                   or item['created_at'].isoformat() > previous_created_at)
+                if item['mfg_date'] and hasattr(item['mfg_date'], 'strftime'):
+                    item['mfg_date'] = item['mfg_date'].strftime('%Y-%m-%d')
+                if item['created_at'] and hasattr(item['created_at'], 'isoformat'):
+                    item['created_at'] = item['created_at'].isoformat()
+                if item['status_updated_at'] and hasattr(item['status_updated_at'], 'isoformat'):
+                    item['status_updated_at'] = item['status_updated_at'].isoformat()
+                item['change'] = "created" if is_new else "status"
+                items.append(item)
+
+        token = encode_cursor({"status_id": new_status_id, "gaps": gaps, "created_at": created_at, "uid": created_uid})
+
+        return jsonify({
+            "success": True,
+            "items": items,
+            "count": len(items),
+            "token": token,
+            "has_more": len(status_rows) == limit or len(created_rows) == limit
+        })
+
+    except Exception as e:
+        logger.error(f"Failed to get inventory changes: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+    finally:
+        if conn:
+            try:
+                conn.close()
+            except:
+                pass
+
 # Engraving API Endpoints
+def latest_engraving_items():
+    """Default items for a job without "items" / "uids": the latest 50 items."""
+    conn = get_db_conn()
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute("SELECT uid, component, lot FROM items ORDER BY created_at DESC LIMIT 50")
+        items = cur.fetchall()
+        cur.close()
+    finally:
+        conn.close()
+    return items
+
 @app.route("/engrave/start", methods=["POST"])
 def start_engraving():
-    """Start engraving operation."""
+    """Start (queue) an engraving job.
+
+    Optional "ordering": "changeover" groups items by component and lot (respecting item
+    "priority") to cut fixture swaps; the response's "ordering" report compares it with FIFO.
+    Jobs run alongside each other; a job with a higher "priority" (default 0) preempts
+    lower-priority jobs at the next item boundary, and they resume once it is done.
+    """
     try:
-        global engraving_state
-        
-        if engraving_state["status"] == "running":
-            return jsonify({"error": "Engraving is already running"}), 400
-        
         data = request.get_json(force=True) or {}
-        uids = data.get("uids", [])
         simulate = data.get("simulate", True)
         delay_seconds = data.get("delay_seconds", 1.0)
+        try:
+            priority = int(data.get("priority", 0))
+        except (TypeError, ValueError):
+            return jsonify({"error": "priority must be an integer"}), 400
         
-        if not uids:
-            # Get manufactured items from database
-            conn = get_db_conn()
-            cur = conn.cursor(dictionary=True)
-            cur.execute("SELECT uid FROM items ORDER BY created_at DESC LIMIT 50")
-            manufactured_items = cur.fetchall()
-            cur.close()
-            conn.close()
-            items = [{"uid": item["uid"]} for item in manufactured_items]
-        else:
-            items = [{"uid": uid} for uid in uids]
-        
+        items = engraving_job_items(data, latest_engraving_items)
         if not items:
             return jsonify({"error": "No items to engrave"}), 400
+        try:
+            items, ordering = plan_engraving_job(engraving_line, data, items)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # Initialize engraving state
-        engraving_state.update({
-            "status": "running",
-            "items": items,
-            "processed_count": 0,
-            "total_count": len(items),
-            "start_time": datetime.utcnow(),
-            "current_item": None,
-            "simulate": simulate,
-            "delay_seconds": delay_seconds
-        })
-        
-        logger.info(f"🔥 Started engraving job with {len(items)} items (simulate={simulate})")
+        job_id, error = engraving_line.start_job(items, simulate=simulate, delay_seconds=delay_seconds,
+                                                 priority=priority)
+        if error:
+            return jsonify({"error": error}), 400
         
         return jsonify({
             "ok": True,
             "message": "Engraving started",
+            "job_id": job_id,
+            "priority": priority,
             "total_items": len(items),
-            "simulate": simulate
+            "stations": len([s for s in engraving_line.stations.values() if s.enabled]),
+            "simulate": simulate,
+            "ordering": ordering
         })
         
     except Exception as e:
@@ -845,76 +1530,321 @@ def start_engraving():
         logger.error(traceback.format_exc())
         return jsonify({"error": f"Failed to start engraving: {str(e)}"}), 500
 
+@app.route("/engrave/plan", methods=["POST"])
+def plan_engraving():
+    """Preview a job's ordering and the estimated changeover time saved vs FIFO (nothing is started)."""
+    try:
+        data = request.get_json(force=True) or {}
+        data.setdefault("ordering", "changeover")
+        items = engraving_job_items(data, latest_engraving_items)
+        if not items:
+            return jsonify({"error": "No items to engrave"}), 400
+        try:
+            items, ordering = plan_engraving_job(engraving_line, data, items)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"ordering": ordering, "order": [item["uid"] for item in items]})
+    except Exception as e:
+        logger.error(f"Plan engraving error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/simulate", methods=["POST"])
+def simulate_engraving():
+    """Project throughput, queue lengths and station utilization on a virtual clock (nothing is engraved).
+
+    Body: "count" (synthetic lot; "components", "lot_size") or "items"/"uids", plus optional "stations",
+    "burn_time" ({"kind": "normal", "mean": 2.0, "stddev": 0.1}), "fault_rate", "retries",
+    "changeover", "ordering", "arrival_rate_per_hour" and "seed".
+    """
+    try:
+        data = request.get_json(force=True) or {}
+        try:
+            return jsonify(simulate_engraving_job(engraving_line, data, latest_engraving_items))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Simulate engraving error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/layout", methods=["POST"])
+def engraving_layout():
+    """Compare QR layouts (version, error correction, mask) by estimated burn time for a part or lot.
+
+    Body: "uid" or "uids" (up to 200), optional "component" and "policy" overrides.
+    """
+    try:
+        data = request.get_json(force=True) or {}
+        uids = data.get("uids") or ([data["uid"]] if data.get("uid") else [])
+        if not uids:
+            return jsonify({"error": "uid or uids is required"}), 400
+        if len(uids) > 200:
+            return jsonify({"error": "At most 200 uids per layout report"}), 400
+        try:
+            return jsonify(layout_optimizer.report(uids, data.get("component"), data.get("policy")))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Engraving layout error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/toolpath/<uid>", methods=["GET"])
+def engraving_toolpath(uid):
+    """Laser toolpath for an item's burn geometry, with cycle times of every strategy.
+
+    Query: strategy (modules|runs|rectangles, default rectangles), gcode=true to include the program.
+    """
+    try:
+        strategy = request.args.get("strategy", "rectangles")
+        geometry = prepare_engraving(uid)
+        try:
+            toolpath = build_toolpath(geometry, strategy)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        result = {
+            "uid": uid,
+            "strategy": strategy,
+            "module_mm": geometry.module_mm,
+            "timing_model": simulated_engraver.info(),
+            "strategies": compare_strategies(geometry, engraver=simulated_engraver)
+        }
+        if request.args.get("gcode", "false").lower() == "true":
+            result["gcode"] = toolpath.gcode(simulated_engraver)
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Engraving toolpath error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def requested_job_id():
+    """Optional job_id for stop/pause/resume (query string or JSON body); None means all jobs.
+
+    Raises ValueError (a 400 for the caller) when job_id is not an integer.
+    """
+    job_id = request.args.get("job_id") or (request.get_json(silent=True) or {}).get("job_id")
+    if job_id in (None, ""):
+        return None
+    try:
+        return int(job_id)
+    except (TypeError, ValueError):
+        raise ValueError(f"job_id must be an integer, got {job_id!r}")
+
 @app.route("/engrave/stop", methods=["POST"])
 def stop_engraving():
-    """Stop engraving operation."""
+    """Stop one job ("job_id") or every active job."""
     try:
-        global engraving_state
-        engraving_state["status"] = "stopped"
-        engraving_state["current_item"] = None
-        logger.info("🛑 Engraving stopped")
+        engraving_line.stop(requested_job_id())
         return jsonify({"ok": True, "message": "Engraving stopped"})
+    except KeyError:
+        return jsonify({"error": "Job not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Stop engraving error: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/engrave/pause", methods=["POST"])
 def pause_engraving():
-    """Pause engraving operation."""
+    """Pause one job ("job_id") or every running job."""
     try:
-        global engraving_state
-        if engraving_state["status"] == "running":
-            engraving_state["status"] = "paused"
-            logger.info("⏸️ Engraving paused")
+        if engraving_line.pause(requested_job_id()):
             return jsonify({"ok": True, "message": "Engraving paused"})
         return jsonify({"error": "No active engraving to pause"}), 400
+    except KeyError:
+        return jsonify({"error": "Job not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Pause engraving error: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/engrave/resume", methods=["POST"])
 def resume_engraving():
-    """Resume engraving operation."""
+    """Resume one job ("job_id") or every paused job."""
     try:
-        global engraving_state
-        if engraving_state["status"] == "paused":
-            engraving_state["status"] = "running"
-            logger.info("▶️ Engraving resumed")
+        if engraving_line.resume(requested_job_id()):
             return jsonify({"ok": True, "message": "Engraving resumed"})
         return jsonify({"error": "No paused engraving to resume"}), 400
+    except KeyError:
+        return jsonify({"error": "Job not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Resume engraving error: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/engrave/status", methods=["GET"])
 def get_engraving_status():
-    """Get current engraving status."""
+    """Get current engraving status, per-station detail and aggregate throughput."""
     try:
-        global engraving_state
-        
-        processed = engraving_state.get("processed_count", 0)
-        total = engraving_state.get("total_count", 0)
-        progress = (processed / total * 100) if total > 0 else 0
-        
-        start_time = engraving_state.get("start_time")
-        elapsed_seconds = 0
-        if start_time:
-            elapsed_seconds = (datetime.utcnow() - start_time).total_seconds()
-        
-        return jsonify({
-            "status": engraving_state["status"],
-            "current_item": engraving_state.get("current_item"),
-            "processed_count": processed,
-            "total_count": total,
-            "progress_percent": round(progress, 1),
-            "elapsed_seconds": round(elapsed_seconds, 1),
-            "simulate": engraving_state.get("simulate", True),
-            "delay_seconds": engraving_state.get("delay_seconds", 1.0)
-        })
+        return jsonify(engraving_line.status())
     except Exception as e:
         logger.error(f"Get engraving status error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/engrave/metrics", methods=["GET"])
+def engraving_metrics():
+    """Rolling throughput, per-phase latency percentiles (queue wait, prepare, burn, write-back) and utilization."""
+    try:
+        return jsonify(engraving_line.metrics_report())
+    except Exception as e:
+        logger.error(f"Engraving metrics error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/dead-letter", methods=["GET"])
+def engraving_dead_letters():
+    """Items that failed every attempt (newest first), pending retries and failure counts by reason."""
+    try:
+        limit = min(request.args.get("limit", 100, type=int), 500)
+        return jsonify(engraving_line.dead_letters(limit, job_id=request.args.get("job_id", type=int)))
+    except Exception as e:
+        logger.error(f"Dead-letter list error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# Every open SSE stream holds one gunicorn thread (run_backend.sh: --threads 32);
+# keep enough threads free for ordinary requests
+ENGRAVE_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("ENGRAVE_EVENTS_MAX_SUBSCRIBERS", 16))
+
+@app.route("/engrave/events", methods=["GET"])
+def engraving_events():
+    """Server-Sent Events stream of engraving progress (item_started, item_finished, progress, state, station).
+
+    One broadcaster serves every viewer; clients reconnecting with Last-Event-ID get the missed events.
+    Past ENGRAVE_EVENTS_MAX_SUBSCRIBERS concurrent viewers new streams get 503 with Retry-After.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    try:
+        subscription = engraving_line.events.subscribe(last_event_id, max_subscribers=ENGRAVE_EVENTS_MAX_SUBSCRIBERS)
+    except TooManySubscribers:
+        logger.warning(f"⚠️ Rejected engraving event viewer ({ENGRAVE_EVENTS_MAX_SUBSCRIBERS} connected)")
+        response = jsonify({"error": "Too many engraving event viewers, retry later"})
+        response.headers["Retry-After"] = "10"
+        return response, 503
+
+    def stream():
+        try:
+            yield "retry: 3000\n\n"
+            if snapshot is not None:
+                yield f"event: snapshot\ndata: {json.dumps(snapshot, default=str)}\n\n"
+            while not subscription.closed:
+                event = subscription.get(timeout=15)
+                # Comment line keeps proxies from closing an idle stream
+                yield event.sse if event else ": keepalive\n\n"
+        finally:
+            subscription.close()
+
+    try:
+        snapshot = engraving_line.status() if last_event_id is None else None
+        response = Response(stream(), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        # The generator's finally never runs if the client leaves before the first chunk;
+        # the WSGI server always calls close() on the response
+        response.call_on_close(subscription.close)
+        return response
+    except Exception:
+        subscription.close()
+        raise
+
+@app.route("/engrave/stations", methods=["GET"])
+def list_engraving_stations():
+    """List registered engraving stations."""
+    try:
+        status = engraving_line.status()
+        return jsonify({"stations": status["stations"], "throughput": status["throughput"]})
+    except Exception as e:
+        logger.error(f"List stations error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/stations", methods=["POST"])
+def add_engraving_station():
+    """Register a new engraving station: { "id": "laser-4" }"""
+    try:
+        data = request.get_json(force=True) or {}
+        station_id = (data.get("id") or "").strip()
+        if not station_id:
+            return jsonify({"error": "id is required"}), 400
+        engraving_line.add_station(station_id)
+        return jsonify({"ok": True, "message": f"Station {station_id} registered"})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Add station error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/stations/<station_id>", methods=["DELETE"])
+def remove_engraving_station(station_id):
+    """Unregister an idle engraving station."""
+    try:
+        engraving_line.remove_station(station_id)
+        return jsonify({"ok": True, "message": f"Station {station_id} removed"})
+    except KeyError:
+        return jsonify({"error": f"Unknown station '{station_id}'"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Remove station error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/stations/<station_id>/<action>", methods=["POST"])
+def set_engraving_station_enabled(station_id, action):
+    """Enable or disable a station; a disabled station finishes its current item and takes no more."""
+    try:
+        if action not in ("enable", "disable"):
+            return jsonify({"error": "action must be 'enable' or 'disable'"}), 400
+        engraving_line.set_station_enabled(station_id, action == "enable")
+        return jsonify({"ok": True, "message": f"Station {station_id} {action}d"})
+    except KeyError:
+        return jsonify({"error": f"Unknown station '{station_id}'"}), 404
+    except Exception as e:
+        logger.error(f"Set station state error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/jobs", methods=["GET"])
+def list_engraving_jobs():
+    """List recent engraving jobs with per-state item counts (durable queue only)."""
+    try:
+        if not engraving_line.store.durable:
+            return jsonify({"error": "Durable engraving queue is disabled"}), 400
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+        return jsonify({"jobs": engraving_line.store.list_jobs(limit), "current_job_id": engraving_line.job_id})
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    except Exception as e:
+        logger.error(f"List engraving jobs error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/jobs/<int:job_id>", methods=["GET"])
+def get_engraving_job(job_id):
+    """List a job's items, optionally filtered by ?state=uncertain etc."""
+    try:
+        if not engraving_line.store.durable:
+            return jsonify({"error": "Durable engraving queue is disabled"}), 400
+        items = engraving_line.store.get_job_items(job_id, request.args.get("state"))
+        if not items:
+            return jsonify({"error": "Job not found or no matching items"}), 404
+        return jsonify({"job_id": job_id, "items": items, "count": len(items)})
+    except Exception as e:
+        logger.error(f"Get engraving job error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/engrave/jobs/<int:job_id>/items/<uid>/resolve", methods=["POST"])
+def resolve_engraving_item(job_id, uid):
+    """Resolve an item interrupted mid-burn: { "engraved": true } marks it done, false re-queues it."""
+    try:
+        if not engraving_line.store.durable:
+            return jsonify({"error": "Durable engraving queue is disabled"}), 400
+        data = request.get_json(force=True) or {}
+        if not isinstance(data.get("engraved"), bool):
+            return jsonify({"error": "engraved (true/false) is required"}), 400
+        if not engraving_line.resolve_item(job_id, uid, data["engraved"]):
+            return jsonify({"error": f"No uncertain item {uid} in job {job_id}"}), 404
+        return jsonify({"ok": True, "message": f"{uid} marked {'engraved' if data['engraved'] else 'for re-engraving'}"})
+    except Exception as e:
+        logger.error(f"Resolve engraving item error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/update_status", methods=["POST"])
 def update_item_status():
     """Update item status with employee role validation."""
@@ -931,6 +1861,7 @@ def update_item_status():
             return jsonify({"error": "uid and new_status are required"}), 400
         
         # If employee_id is provided, validate role-based permissions
+        role = None
         if employee_id:
             role = get_employee_role(employee_id)
             if not role:
@@ -945,12 +1876,13 @@ def update_item_status():
         
         conn = get_db_conn()
         cur = conn.cursor()
+        updated_at = datetime.utcnow()
         
         # Insert into statuses (audit log)
         cur.execute("""
         INSERT INTO statuses (uid, status, location, note, updated_at, employee_id)
         VALUES (%s, %s, %s, %s, %s, %s)
-        """, (uid, new_status, location, note, datetime.utcnow(), employee_id))
+        """, (uid, new_status, location, note, updated_at, employee_id))
         
         # Update items.current_status if the table has this column
         try:
@@ -963,10 +1895,12 @@ def update_item_status():
                 raise
         
         conn.commit()
+        query_cache.bump(*ITEM_TABLES)
+        if item_index_ready():
+            item_index.apply_status(uid, new_status, location, note, updated_at)
         
         response_data = {"ok": True, "uid": uid, "new_status": new_status}
-        if employee_id:
-            role = get_employee_role(employee_id)
+        if role:
             response_data["role"] = role
         
         return jsonify(response_data)
@@ -984,6 +1918,290 @@ def update_item_status():
             except:
                 pass
 
+BULK_STATUS_MAX_UIDS = int(os.getenv("BULK_STATUS_MAX_UIDS", 5000))
+
+@app.route("/update_status/bulk", methods=["POST"])
+def update_item_status_bulk():
+    """Set one status on many items (e.g. a pallet) in a single transaction.
+
+    Body: {"uids": [...], "new_status", "employee_id", "location", "note"}.
+    The employee's role is checked once; results are per uid in input order,
+    with unknown, blank and repeated uids reported as failed and skipped.
+    """
+    conn = None
+    try:
+        data = request.get_json(force=True) or {}
+        uids = data.get("uids")
+        new_status = data.get("new_status") or data.get("status")
+        employee_id = data.get("employee_id")
+        location = data.get("location", "MobileApp")
+        note = data.get("note", "")
+
+        if not isinstance(uids, list) or not uids or not new_status:
+            return jsonify({"error": "uids (non-empty list) and new_status are required"}), 400
+        if len(uids) > BULK_STATUS_MAX_UIDS:
+            return jsonify({"error": f"At most {BULK_STATUS_MAX_UIDS} uids per bulk update"}), 400
+
+        role = None
+        if employee_id:
+            role = get_employee_role(employee_id)
+            if not role:
+                return jsonify({"error": "Invalid employee_id"}), 403
+            allowed = ROLE_ALLOWED_STATUSES.get(role, [])
+            if new_status not in allowed:
+                return jsonify({
+                    "error": f"Role '{role}' not allowed to set status '{new_status}'",
+                    "allowed_statuses": allowed
+                }), 403
+
+        uids = [str(uid or "").strip() for uid in uids]
+        unique = list(dict.fromkeys(uid for uid in uids if uid))
+
+        conn = get_db_conn()
+        updated_at = datetime.utcnow()
+        valid = set_status_bulk(conn, unique, new_status, location, note, employee_id, updated_at)
+        existing = set(valid)
+        if valid:
+            query_cache.bump(*ITEM_TABLES)
+        if item_index_ready():
+            for uid in valid:
+                item_index.apply_status(uid, new_status, location, note, updated_at)
+
+        results = []
+        seen = set()
+        for uid in uids:
+            if not uid:
+                results.append({"uid": uid, "ok": False, "error": "uid is required"})
+            elif uid in seen:
+                results.append({"uid": uid, "ok": False, "error": "Duplicate uid in request"})
+            elif uid not in existing:
+                results.append({"uid": uid, "ok": False, "error": "UID not found in database"})
+            else:
+                results.append({"uid": uid, "ok": True})
+            seen.add(uid)
+
+        logger.info(f"✅ Bulk status '{new_status}': {len(valid)} updated, {len(uids) - len(valid)} failed")
+        response_data = {
+            "ok": len(valid) == len(uids),
+            "new_status": new_status,
+            "updated": len(valid),
+            "failed": len(uids) - len(valid),
+            "results": results
+        }
+        if role:
+            response_data["role"] = role
+        return jsonify(response_data)
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Bulk update status error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": f"Failed to update statuses: {str(e)}"}), 500
+    finally:
+        if conn:
+            try:
+                conn.close()
+            except:
+                pass
+
+@app.route("/update_status/range", methods=["POST"])
+def update_item_status_range():
+    """Set a status on a whole lot, or a serial range within it, on the server.
+
+    Body: {"component", "vendor", "lot", "first_serial", "last_serial",
+    "new_status", "employee_id", "location", "note"}; the serials are
+    optional and inclusive. employee_id is required because one call can
+    touch a whole lot. The write runs on the server (set_status_range), so no
+    uids cross the wire and the cost does not grow with round trips.
+    """
+    conn = None
+    try:
+        data = request.get_json(force=True) or {}
+        component = data.get("component")
+        vendor = data.get("vendor")
+        lot = data.get("lot")
+        new_status = data.get("new_status") or data.get("status")
+        employee_id = data.get("employee_id")
+        location = data.get("location", "MobileApp")
+        note = data.get("note", "")
+
+        if not all([component, vendor, lot, new_status, employee_id]):
+            return jsonify({"error": "component, vendor, lot, new_status and employee_id are required"}), 400
+        try:
+            first_serial = int(data["first_serial"]) if data.get("first_serial") is not None else None
+            last_serial = int(data["last_serial"]) if data.get("last_serial") is not None else None
+        except (TypeError, ValueError):
+            return jsonify({"error": "first_serial and last_serial must be integers"}), 400
+        if first_serial is not None and last_serial is not None and first_serial > last_serial:
+            return jsonify({"error": "first_serial must not be greater than last_serial"}), 400
+
+        role = get_employee_role(employee_id)
+        if not role:
+            return jsonify({"error": "Invalid employee_id"}), 403
+        allowed = ROLE_ALLOWED_STATUSES.get(role, [])
+        if new_status not in allowed:
+            return jsonify({
+                "error": f"Role '{role}' not allowed to set status '{new_status}'",
+                "allowed_statuses": allowed
+            }), 403
+
+        conn = get_db_conn()
+        updated_at = datetime.utcnow()
+        updated = set_status_range(conn, component, vendor, lot, new_status, location, note, employee_id, updated_at,
+                                   first_serial, last_serial)
+        if updated:
+            query_cache.bump(*ITEM_TABLES)
+            if item_index_ready():
+                item_index.apply_status_range(component, vendor, lot, new_status, location, note, updated_at,
+                                              first_serial, last_serial)
+
+        logger.info(f"✅ Range status '{new_status}' on {component}-{vendor}-{lot}: {updated} items")
+        return jsonify({
+            "ok": True,
+            "component": component,
+            "vendor": vendor,
+            "lot": lot,
+            "first_serial": first_serial,
+            "last_serial": last_serial,
+            "new_status": new_status,
+            "role": role,
+            "updated": updated
+        })
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Range update status error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": f"Failed to update statuses: {str(e)}"}), 500
+    finally:
+        if conn:
+            try:
+                conn.close()
+            except:
+                pass
+
+# Offline scanner sync: devices queue status events while out of coverage and
+# upload them in one batch. Every event carries an idempotency key; outcomes are
+# stored in sync_events so a replayed upload returns the original result.
+# The table is created by migrate_sync_events.py (and on `python combined_backend_service.py`).
+SYNC_MAX_EVENTS = int(os.getenv("SYNC_MAX_EVENTS", 1000))
+SYNC_EVENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS sync_events (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    idempotency_key VARCHAR(128) NOT NULL,
+    device_id VARCHAR(128) NOT NULL,
+    uid VARCHAR(255),
+    status VARCHAR(64),
+    result VARCHAR(16) NOT NULL,
+    error VARCHAR(500),
+    client_timestamp DATETIME NULL,
+    received_at DATETIME NOT NULL,
+    UNIQUE KEY uq_sync_events_key (idempotency_key),
+    INDEX idx_sync_events_device (device_id, id)
+)
+"""
+
+def ensure_sync_events_table():
+    """Create sync_events if it does not exist (startup / migration)."""
+    conn = get_db_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute(SYNC_EVENTS_TABLE)
+        cur.close()
+    finally:
+        conn.close()
+
+def sync_role_error(employee_id, new_status):
+    """Why employee_id may not set new_status, or None (apply_sync_events role check)."""
+    role = get_employee_role(employee_id)
+    if not role:
+        return "Invalid employee_id"
+    if new_status not in ROLE_ALLOWED_STATUSES.get(role, []):
+        return f"Role '{role}' not allowed to set status '{new_status}'"
+    return None
+
+@app.route("/sync/status_events", methods=["POST"])
+def sync_status_events():
+    """Apply an ordered batch of offline status events in one transaction.
+
+    Body: {"device_id", "employee_id", "events": [{"idempotency_key", "uid",
+    "new_status", "location", "note", "client_timestamp", "employee_id"}]}
+    (per-event employee_id overrides the batch one). Events are applied in
+    order with their client timestamp as updated_at, so a late upload never
+    hides a newer status. Results are per event: "applied", "rejected" (with
+    error) or "duplicate" (key seen before; original result returned).
+
+    The sync_events rows are written first, in the same transaction as the
+    status rows: an upload racing another one with the same keys blocks on
+    the unique key, then fails as a whole with 409 and nothing applied, so
+    the retry reports those keys as duplicates of the winner's outcome.
+
+    "cursor" is the /inventory/changes head token after this upload, for
+    polling from here on. It does not cover what changed while the device
+    was offline; to catch up, poll /inventory/changes with the token the
+    device held before it went offline.
+    """
+    conn = None
+    try:
+        data = request.get_json(force=True) or {}
+        device_id = str(data.get("device_id") or "").strip()
+        events = data.get("events")
+        if not device_id or not isinstance(events, list):
+            return jsonify({"error": "device_id and events (list) are required"}), 400
+        if len(events) > SYNC_MAX_EVENTS:
+            return jsonify({"error": f"At most {SYNC_MAX_EVENTS} events per sync"}), 400
+
+        conn = get_db_conn()
+        results, applied = apply_sync_events(conn, device_id, events, data.get("employee_id"),
+                                              sync_role_error, datetime.utcnow())
+        if applied:
+            query_cache.bump(*ITEM_TABLES)
+            if item_index_ready():
+                for uid, new_status, location, note, updated_at in applied:
+                    item_index.apply_status(uid, new_status, location, note, updated_at)
+
+        counts = {"applied": 0, "duplicate": 0, "rejected": 0}
+        for result in results:
+            counts[result["result"]] += 1
+        logger.info(f"📲 Sync from {device_id}: {counts['applied']} applied, "
+                    f"{counts['duplicate']} duplicate, {counts['rejected']} rejected")
+        return jsonify({
+            "success": True,
+            "device_id": device_id,
+            "results": results,
+            **counts,
+            "cursor": inventory_head_token(conn.cursor(dictionary=True))
+        })
+
+    except mysql.connector.Error as e:
+        if conn:
+            conn.rollback()
+        if e.errno in (errorcode.ER_DUP_ENTRY, errorcode.ER_LOCK_DEADLOCK):
+            # Another upload recorded one of these keys concurrently; nothing from this batch
+            # was applied, and a retry reports those keys as duplicates
+            logger.warning(f"Sync conflict from {device_id}: {e}")
+            return jsonify({"error": "Concurrent upload of the same events; retry the sync"}), 409
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            logger.error(f"Sync status events error: {e} (run migrate_sync_events.py)")
+            return jsonify({"error": "Sync is not set up on this database (sync_events table missing)"}), 503
+        logger.error(f"Sync status events error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": f"Failed to sync status events: {str(e)}"}), 500
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.error(f"Sync status events error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({"error": f"Failed to sync status events: {str(e)}"}), 500
+    finally:
+        if conn:
+            try:
+                conn.close()
+            except:
+                pass
+
 @app.route("/allowed_statuses", methods=["POST"])
 def get_allowed_statuses():
     """Get allowed statuses for an employee based on their role."""
@@ -1007,7 +2225,66 @@ def get_allowed_statuses():
         logger.error(traceback.format_exc())
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+@app.route("/employees/cache/invalidate", methods=["POST"])
+def invalidate_employee_cache():
+    """Drop cached employee profiles after roles change (one employee_id, or all)."""
+    try:
+        data = request.get_json(silent=True) or {}
+        removed = employee_cache.invalidate(data.get("employee_id"))
+        logger.info(f"🧹 Employee cache invalidated ({removed} entries)")
+        return jsonify({"ok": True, "removed": removed})
+    except Exception as e:
+        logger.error(f"Employee cache invalidate error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 # Scanning API Endpoints
+SCAN_LATEST_STATUS_QUERY = """
+SELECT
+    i.uid, i.component, i.vendor, i.lot, i.mfg_date, i.warranty_years, {expiry} as expiry_date, i.created_at,
+    latest.status as current_status, latest.location, latest.note, latest.updated_at as status_updated_at
+FROM items i
+LEFT JOIN (
+    SELECT uid, status, location, note, updated_at,
+           ROW_NUMBER() OVER (PARTITION BY uid ORDER BY updated_at DESC) as rn
+    FROM statuses
+    WHERE uid IN ({placeholders})
+) latest ON latest.uid = i.uid AND latest.rn = 1
+WHERE i.uid IN ({placeholders})
+"""
+
+SCAN_BATCH_MAX_UIDS = int(os.getenv("SCAN_BATCH_MAX_UIDS", 5000))
+
+def scan_response(row):
+    """Scan payload for an item row (DB or item index) with the latest status."""
+    # Expiry comes from the query (see expiry_expression); index hits
+    # compute it with the same calendar-year rule
+    expiry_date = row.get("expiry_date") or compute_expiry_date(row["mfg_date"], row["warranty_years"])
+
+    def to_iso(dt_value):
+        if dt_value is None:
+            return None
+        if isinstance(dt_value, datetime):
+            return dt_value.isoformat()
+        if isinstance(dt_value, date):
+            return dt_value.isoformat()
+        return str(dt_value)
+
+    return {
+        "success": True,
+        "uid": row["uid"],
+        "component": row["component"],
+        "vendor": row["vendor"],
+        "lot": row["lot"],
+        "mfg_date": to_iso(row["mfg_date"]),
+        "warranty_years": row["warranty_years"],
+        "expiry_date": to_iso(expiry_date),
+        "current_status": row["current_status"] or "Manufactured",
+        "location": row["location"] or "Factory",
+        "note": row["note"] or "",
+        "status_updated_at": to_iso(row["status_updated_at"]),
+        "created_at": to_iso(row["created_at"])
+    }
+
 @app.route("/scan", methods=["POST"])
 def scan_uid():
     """Scan UID and return item information."""
@@ -1018,64 +2295,24 @@ def scan_uid():
         
         if not uid:
             return jsonify({"success": False, "error": "UID is required"}), 400
-        
-        conn = get_db_conn()
-        cur = conn.cursor(dictionary=True)
-        
-        # Get item with latest status
-        query = """
-        SELECT 
-            i.uid, i.component, i.vendor, i.lot, i.mfg_date, i.warranty_years, i.created_at,
-            latest.status as current_status, latest.location, latest.note, latest.updated_at as status_updated_at
-        FROM items i
-        LEFT JOIN (
-            SELECT uid, status, location, note, updated_at,
-                   ROW_NUMBER() OVER (PARTITION BY uid ORDER BY updated_at DESC) as rn
-            FROM statuses
-        ) latest ON latest.uid = i.uid AND latest.rn = 1
-        WHERE i.uid = %s
-        LIMIT 1
-        """
-        
-        cur.execute(query, (uid,))
-        row = cur.fetchone()
+
+        # Served from the item index when possible; misses fall through to the DB
+        # in case the item was created since the last refresh.
+        row = item_index.get(uid) if item_index_ready() else None
+        if row:
+            row["current_status"] = row.pop("status")
+        else:
+            conn = get_db_conn()
+            cur = conn.cursor(dictionary=True)
+            
+            # Get item with latest status (window limited to this uid)
+            cur.execute(SCAN_LATEST_STATUS_QUERY.format(placeholders="%s", expiry=expiry_expression(cur)), (uid, uid))
+            row = cur.fetchone()
         
         if not row:
             return jsonify({"success": False, "error": "UID not found in database"})
         
-        # Calculate expiry date
-        mfg_date = row["mfg_date"]
-        if isinstance(mfg_date, str):
-            mfg_date = datetime.strptime(mfg_date, "%Y-%m-%d").date()
-        expiry_date = mfg_date + timedelta(days=365 * row["warranty_years"])
-        
-        # Format dates
-        def to_iso(dt_value):
-            if dt_value is None:
-                return None
-            if isinstance(dt_value, datetime):
-                return dt_value.isoformat()
-            if isinstance(dt_value, date):
-                return dt_value.isoformat()
-            return str(dt_value)
-        
-        response = {
-            "success": True,
-            "uid": row["uid"],
-            "component": row["component"],
-            "vendor": row["vendor"],
-            "lot": row["lot"],
-            "mfg_date": to_iso(row["mfg_date"]),
-            "warranty_years": row["warranty_years"],
-            "expiry_date": to_iso(expiry_date),
-            "current_status": row["current_status"] or "Manufactured",
-            "location": row["location"] or "Factory",
-            "note": row["note"] or "",
-            "status_updated_at": to_iso(row["status_updated_at"]),
-            "created_at": to_iso(row["created_at"])
-        }
-        
-        return jsonify(response)
+        return jsonify(scan_response(row))
         
     except Exception as e:
         logger.error(f"Scan error: {e}")
@@ -1088,6 +2325,75 @@ def scan_uid():
             except:
                 pass
 
+@app.route("/scan/batch", methods=["POST"])
+def scan_batch():
+    """Resolve a burst of scanned UIDs (e.g. a whole pallet) in one query.
+
+    Body: {"uids": [...]} (up to SCAN_BATCH_MAX_UIDS). Results come back in
+    input order with the same fields as /scan; unknown UIDs get
+    {"success": false, "uid": ..., "error": "UID not found in database"}.
+    """
+    conn = None
+    try:
+        data = request.get_json(force=True) or {}
+        uids = data.get("uids")
+        if not isinstance(uids, list) or not uids:
+            return jsonify({"success": False, "error": "uids must be a non-empty list"}), 400
+        if len(uids) > SCAN_BATCH_MAX_UIDS:
+            return jsonify({"success": False, "error": f"At most {SCAN_BATCH_MAX_UIDS} uids per batch"}), 400
+        uids = [str(uid or "").strip() for uid in uids]
+
+        rows = {}
+        if item_index_ready():
+            for uid in uids:
+                row = item_index.get(uid) if uid else None
+                if row:
+                    row["current_status"] = row.pop("status")
+                    rows[uid] = row
+
+        # Index misses (or every uid without the index) in one IN query
+        missing = list(dict.fromkeys(uid for uid in uids if uid and uid not in rows))
+        if missing:
+            conn = get_db_conn()
+            cur = conn.cursor(dictionary=True)
+            placeholders = ", ".join(["%s"] * len(missing))
+            query = SCAN_LATEST_STATUS_QUERY.format(placeholders=placeholders, expiry=expiry_expression(cur))
+            cur.execute(query, missing + missing)
+            for row in cur.fetchall():
+                rows[row["uid"]] = row
+
+        results = []
+        responses = {}
+        for uid in uids:
+            if not uid:
+                results.append({"success": False, "uid": uid, "error": "UID is required"})
+            elif uid in rows:
+                if uid not in responses:
+                    responses[uid] = scan_response(rows[uid])
+                results.append(responses[uid])
+            else:
+                results.append({"success": False, "uid": uid, "error": "UID not found in database"})
+
+        found = sum(1 for result in results if result["success"])
+        return jsonify({
+            "success": True,
+            "results": results,
+            "count": len(results),
+            "found": found,
+            "not_found": len(results) - found
+        })
+
+    except Exception as e:
+        logger.error(f"Batch scan error: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({"success": False, "error": f"Server error: {str(e)}"}), 500
+    finally:
+        if conn:
+            try:
+                conn.close()
+            except:
+                pass
+
 # Health and monitoring endpoints
 @app.route("/health", methods=["GET"])
 def health_check():
@@ -1116,8 +2422,8 @@ def health_check():
                 "port": DB_CONFIG["port"],
                 "error": db_error
             },
-            "engraving_status": engraving_state["status"],
-            "worker_running": worker_running,
+            "engraving_status": engraving_line.overall_status(),
+            "worker_running": engraving_line.running,
             "timestamp": datetime.utcnow().isoformat(),
             "version": "1.0.0"
         }
@@ -1138,8 +2444,12 @@ def get_stats():
             "version": "1.0.0",
             "status": "running",
             "database": "mysql",
-            "engraving_state": engraving_state,
-            "worker_running": worker_running,
+            "engraving_state": engraving_line.status(),
+            "worker_running": engraving_line.running,
+            "engraving_events": engraving_line.events.stats(),
+            "query_cache": query_cache.stats(),
+            "employee_cache": employee_cache.stats(),
+            "item_index": item_index.info() if item_index else {"enabled": False},
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception as e:
@@ -1166,15 +2476,26 @@ def root():
                 },
                 "engraving": {
                     "start": "/engrave/start",
+                    "plan": "/engrave/plan",
+                    "simulate": "/engrave/simulate",
+                    "layout": "/engrave/layout",
+                    "toolpath": "/engrave/toolpath/<uid>",
                     "stop": "/engrave/stop",
                     "pause": "/engrave/pause",
                     "resume": "/engrave/resume",
-                    "status": "/engrave/status"
+                    "status": "/engrave/status",
+                    "stations": "/engrave/stations",
+                    "jobs": "/engrave/jobs",
+                    "events": "/engrave/events",
+                    "metrics": "/engrave/metrics",
+                    "dead_letter": "/engrave/dead-letter"
                 },
                 "inventory": {
                     "items": "/inventory/items",
                     "stats": "/inventory/stats",
-                    "search": "/inventory/search"
+                    "search": "/inventory/search",
+                    "query": "/inventory/query",
+                    "changes": "/inventory/changes"
                 },
                 "monitoring": {
                     "health": "/health",
@@ -1185,7 +2506,7 @@ def root():
                 "qr_storage": "database" if DISABLE_QR_FILES else "file+database",
                 "database_status": db_status,
                 "database_host": DB_CONFIG["host"],
-                "worker_status": "running" if worker_running else "stopped"
+                "worker_status": "running" if engraving_line.running else "stopped"
             },
             "timestamp": datetime.utcnow().isoformat()
         }
@@ -1215,19 +2536,21 @@ def generate_ai_alerts():
         cursor = conn.cursor(dictionary=True)
         
         # Generate expiry alerts
-        expiry_query = """
+        # Range predicate on the indexed expiry_date column once migrated (see
+        # expiry_expression); the latest location is only looked up for items inside the window.
+        expiry = expiry_expression(cursor)
+        expiry_query = f"""
         SELECT 
             i.uid, i.component, i.vendor, i.lot, i.mfg_date, 
-            i.warranty_years, s.location,
-            DATEDIFF(DATE_ADD(i.mfg_date, INTERVAL i.warranty_years YEAR), CURDATE()) as days_to_expiry
+            i.warranty_years,
+            (SELECT s.location FROM statuses s
+             WHERE s.uid = i.uid
+             ORDER BY s.updated_at DESC
+             LIMIT 1) as location,
+            DATEDIFF({expiry}, CURDATE()) as days_to_expiry
         FROM items i
-        LEFT JOIN (
-            SELECT uid, location,
-                   ROW_NUMBER() OVER (PARTITION BY uid ORDER BY updated_at DESC) as rn
-            FROM statuses
-        ) s ON i.uid = s.uid AND s.rn = 1
-        WHERE DATEDIFF(DATE_ADD(i.mfg_date, INTERVAL i.warranty_years YEAR), CURDATE()) <= 90
-        AND DATEDIFF(DATE_ADD(i.mfg_date, INTERVAL i.warranty_years YEAR), CURDATE()) > 0
+        WHERE {expiry} > CURDATE()
+        AND {expiry} <= CURDATE() + INTERVAL 90 DAY
         """
         
         if uid:
@@ -1389,6 +2712,7 @@ def generate_ai_alerts():
                 ))
             
             conn.commit()
+            query_cache.bump(*ALERT_TABLES)
         
         # Generate summary
         summary = {
@@ -1438,6 +2762,17 @@ def list_ai_alerts():
         acknowledged = request.args.get('acknowledged')
         resolved = request.args.get('resolved')
         limit = request.args.get('limit', 100, type=int)
+
+        cache_key, versions, cached = query_cache.lookup("ai_alerts_list", {
+            "priority": priority,
+            "alert_type": alert_type,
+            "component": component,
+            "acknowledged": acknowledged.lower() if acknowledged is not None else None,
+            "resolved": resolved.lower() if resolved is not None else None,
+            "limit": limit
+        }, ALERT_TABLES)
+        if cached is not None:
+            return jsonify(cached)
         
         conn = get_db_conn()
         cursor = conn.cursor(dictionary=True)
@@ -1495,11 +2830,13 @@ def list_ai_alerts():
                 if alert[field]:
                     alert[field] = alert[field].isoformat()
         
-        return jsonify({
+        payload = {
             'success': True,
             'alerts': alerts,
             'count': len(alerts)
-        })
+        }
+        query_cache.store(cache_key, versions, payload)
+        return jsonify(payload)
     
     except Exception as e:
         logger.error(f"Error listing AI alerts: {e}")
@@ -1539,6 +2876,7 @@ def acknowledge_ai_alert(alert_id):
             }), 404
         
         conn.commit()
+        query_cache.bump(*ALERT_TABLES)
         
         return jsonify({
             'success': True,
@@ -1580,6 +2918,7 @@ def resolve_ai_alert(alert_id):
             }), 404
         
         conn.commit()
+        query_cache.bump(*ALERT_TABLES)
         
         return jsonify({
             'success': True,
@@ -1666,15 +3005,10 @@ def ai_alerts_summary():
                 pass
 
 def cleanup_worker():
-    """Clean up worker thread on exit."""
-    global worker_stop_event, worker_thread, worker_running
-    
-    logger.info("🧹 Cleaning up worker thread...")
-    worker_running = False
+    """Clean up worker threads on exit."""
+    logger.info("🧹 Cleaning up worker threads...")
     worker_stop_event.set()
-    
-    if worker_thread and worker_thread.is_alive():
-        worker_thread.join(timeout=5)
+    engraving_line.shutdown(timeout=5)
     
     logger.info("✅ Cleanup complete")
 
@@ -1686,10 +3020,15 @@ if __name__ == "__main__":
     
     if test_db_connection():
         try:
-            # Start background worker thread
-            print("🔧 Starting background worker thread...")
-            worker_thread = threading.Thread(target=worker_loop, daemon=True)
-            worker_thread.start()
+            # Start engraving station workers and dispatcher
+            print(f"🔧 Starting engraving line ({len(engraving_line.stations)} station(s))...")
+            engraving_line.start()
+
+            # Load the in-memory item index (ITEM_INDEX_ENABLED=true)
+            start_item_index()
+
+            # Offline scanner sync bookkeeping (same DDL as migrate_sync_events.py)
+            ensure_sync_events_table()
             
             # Register cleanup function
             atexit.register(cleanup_worker)
@@ -0,0 +1,20 @@
+"""
+Engraving line components shared by the combined backend and the engraving service.
+"""
+
+from .drivers import EngraverDriver, EngraverError, SimulatedEngraver, TcpEngraver, make_driver
+from .events import EventBroadcaster, TooManySubscribers
+from .job_store import MemoryJobStore, MySQLJobStore
+from .layout import LayoutOptimizer, LayoutPolicy
+from .line import EngravingLine, Station, parse_station_names
+from .ordering import ChangeoverModel, order_job_items, plan_order
+from .simulator import BurnTimeDistribution, simulate_line, synthetic_items
+from .status_writer import StatusWriteBuffer
+from .toolpath import build_toolpath, compare_strategies
+from .verification import MarkVerifier, SimulatedCamera
+
+__all__ = ["EngravingLine", "Station", "parse_station_names", "MemoryJobStore", "MySQLJobStore", "EventBroadcaster", "TooManySubscribers", "StatusWriteBuffer",
+           "EngraverDriver", "EngraverError", "SimulatedEngraver", "TcpEngraver", "make_driver",
+           "ChangeoverModel", "order_job_items", "plan_order", "BurnTimeDistribution", "simulate_line", "synthetic_items",
+           "MarkVerifier", "SimulatedCamera", "LayoutOptimizer", "LayoutPolicy",
+           "build_toolpath", "compare_strategies"]
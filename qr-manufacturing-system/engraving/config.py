@@ -0,0 +1,135 @@
+"""
+Engraving line configuration and wiring shared by the combined backend and the engraving service.
+
+Reads the ENGRAVER_* / ENGRAVING_* environment once, builds the engraver
+drivers, layout optimizer and mark verifier, and provides the job helpers
+behind /engrave/start, /engrave/plan and /engrave/simulate. Each service
+passes in what is its own: the DB connection factory and result hook for
+build_line(), and the query for the default job items.
+
+Importing this module reads the environment and creates the drivers, so it
+is not re-exported from the package; services import it explicitly.
+"""
+
+import json
+import logging
+import os
+
+from .drivers import SimulatedEngraver, make_driver
+from .job_store import MemoryJobStore, MySQLJobStore
+from .layout import LayoutOptimizer
+from .line import EngravingLine, parse_station_names
+from .ordering import order_job_items
+from .simulator import simulate_line, synthetic_items
+from .verification import MarkVerifier, SimulatedCamera
+
+logger = logging.getLogger(__name__)
+
+# Engraver drivers (engraving/drivers.py). Simulated jobs use the timing model with
+# delay_seconds as the minimum cycle time; hardware jobs go to ENGRAVER_DEVICE
+# ("tcp://host:port", or "simulated" when no device is attached).
+ENGRAVER_MODULE_MM = float(os.getenv("ENGRAVER_MODULE_MM", "0.25"))
+simulated_engraver = SimulatedEngraver(module_mm=ENGRAVER_MODULE_MM)
+hardware_engraver = make_driver(os.getenv("ENGRAVER_DEVICE"), module_mm=ENGRAVER_MODULE_MM)
+# Symbol layout (engraving/layout.py): "fixed" burns the label layout (version 2, level M);
+# "optimized" burns the fastest version/level/mask meeting the component's policy.
+# ENGRAVING_LAYOUT_POLICY overrides policies as JSON, e.g. {"PAD": {"min_module_mm": 0.35}}.
+ENGRAVING_LAYOUT = os.getenv("ENGRAVING_LAYOUT", "fixed").lower()
+layout_optimizer = LayoutOptimizer(simulated_engraver, json.loads(os.getenv("ENGRAVING_LAYOUT_POLICY") or "{}"),
+                                   baseline_module_mm=ENGRAVER_MODULE_MM)
+
+# Post-engrave verification (engraving/verification.py): with ENGRAVING_VERIFY=true each burned
+# mark is captured, decoded and graded on a separate pool while the station burns the next item;
+# marks below ENGRAVING_VERIFY_MIN_GRADE are re-engraved. The camera is simulated locally.
+ENGRAVING_VERIFY = os.getenv("ENGRAVING_VERIFY", "false").lower() == "true"
+mark_verifier = MarkVerifier(SimulatedCamera(), min_grade=os.getenv("ENGRAVING_VERIFY_MIN_GRADE", "C"))
+
+# Engraving line: one worker per station plus a dispatcher (see engraving/line.py).
+# ENGRAVING_STATIONS is a station count ("3") or a comma-separated list of names.
+# ENGRAVING_DURABLE_QUEUE persists jobs in MySQL so a restart resumes the job (engraving/job_store.py).
+# ENGRAVING_PREFETCH is how many upcoming items per station are claimed and pre-rendered.
+# ENGRAVING_ORDERING ("fifo" or "changeover") is the default job ordering; ENGRAVING_CHANGEOVER
+# is the default changeover-cost model as JSON, e.g. {"component_seconds": 120, "lot_seconds": 20}.
+# Failed burns are retried up to ENGRAVING_RETRY_ATTEMPTS burns in total, backing off from
+# ENGRAVING_RETRY_BACKOFF_SECONDS (doubling each time), then dead-lettered (/engrave/dead-letter).
+ENGRAVING_STATIONS = os.getenv("ENGRAVING_STATIONS")
+ENGRAVING_DURABLE_QUEUE = os.getenv("ENGRAVING_DURABLE_QUEUE", "true").lower() == "true"
+ENGRAVING_PREFETCH = int(os.getenv("ENGRAVING_PREFETCH", "2"))
+ENGRAVING_ORDERING = os.getenv("ENGRAVING_ORDERING", "fifo")
+ENGRAVING_CHANGEOVER = json.loads(os.getenv("ENGRAVING_CHANGEOVER") or "{}")
+ENGRAVING_RETRY_ATTEMPTS = int(os.getenv("ENGRAVING_RETRY_ATTEMPTS", "3"))
+ENGRAVING_RETRY_BACKOFF_SECONDS = float(os.getenv("ENGRAVING_RETRY_BACKOFF_SECONDS", "5"))
+ENGRAVING_VERIFY_WORKERS = int(os.getenv("ENGRAVING_VERIFY_WORKERS", "2"))
+
+def prepare_engraving(uid):
+    """Render an item's QR burn geometry (runs ahead on the line's prefetch pool)."""
+    if ENGRAVING_LAYOUT == "optimized":
+        return layout_optimizer.geometry(uid)
+    return simulated_engraver.prepare(uid)
+
+def verify_engraving(uid, geometry=None):
+    """Decode and grade an engraved mark."""
+    return mark_verifier.verify(uid, geometry or simulated_engraver.prepare(uid))
+
+def engrave_single_item(uid, simulate=True, delay_seconds=1.0, prepared=None):
+    """Engrave a single item (simulation or real hardware)."""
+    try:
+        driver = simulated_engraver if simulate else hardware_engraver
+        geometry = prepared or driver.prepare(uid)
+        success = driver.engrave(geometry, min_seconds=delay_seconds if simulate else 0.0)
+        if success:
+            logger.info(f"✅ {'Simulated' if simulate else 'Hardware'} engraving completed for {uid}")
+        return success
+    except Exception as e:
+        # Re-raised so the line records the failure reason and schedules a retry
+        logger.error(f"❌ Engraving failed for {uid}: {e}")
+        raise
+
+def build_line(get_conn, on_result=None):
+    """The configured EngravingLine; get_conn feeds the durable job store."""
+    return EngravingLine(
+        engrave_single_item,
+        on_result=on_result,
+        station_names=parse_station_names(ENGRAVING_STATIONS),
+        store=MySQLJobStore(get_conn) if ENGRAVING_DURABLE_QUEUE else MemoryJobStore(),
+        prepare_fn=prepare_engraving,
+        prefetch=ENGRAVING_PREFETCH,
+        retry_attempts=ENGRAVING_RETRY_ATTEMPTS,
+        retry_backoff_seconds=ENGRAVING_RETRY_BACKOFF_SECONDS,
+        verify_fn=verify_engraving if ENGRAVING_VERIFY else None,
+        verify_workers=ENGRAVING_VERIFY_WORKERS
+    )
+
+def enabled_station_count(line):
+    return len([s for s in line.stations.values() if s.enabled]) or 1
+
+def engraving_job_items(data, fetch_default_items):
+    """Items for an engraving job: "items" ([{uid, priority}]), "uids", or fetch_default_items().
+
+    fetch_default_items() returns rows with uid, component and lot (each service picks its own).
+    """
+    if data.get("items"):
+        return [{"uid": item["uid"], "priority": item.get("priority", 0)} for item in data["items"] if item.get("uid")]
+    if data.get("uids"):
+        return [{"uid": uid} for uid in data["uids"]]
+    return [{"uid": item["uid"], "component": item["component"], "lot": item["lot"]} for item in fetch_default_items()]
+
+def plan_engraving_job(line, data, items):
+    """Apply the requested ordering (fifo / changeover); returns (items, report)."""
+    return order_job_items(items, data, stations=enabled_station_count(line), default_strategy=ENGRAVING_ORDERING,
+                           default_model=ENGRAVING_CHANGEOVER)
+
+def simulate_engraving_job(line, data, fetch_default_items):
+    """Run the virtual-clock line model for /engrave/simulate; returns the capacity report."""
+    if data.get("count"):
+        items = synthetic_items(data["count"], components=data.get("components") or ("ERC", "LINER", "PAD", "SLEEPER"),
+                                lot_size=data.get("lot_size", 500))
+    else:
+        items = engraving_job_items(data, fetch_default_items)
+    stations = data.get("stations") or enabled_station_count(line)
+    return simulate_line(items, stations=stations, burn_time=data.get("burn_time"),
+                         fault_rate=float(data.get("fault_rate", 0.0)),
+                         changeover={**ENGRAVING_CHANGEOVER, **(data.get("changeover") or {})},
+                         ordering=data.get("ordering") or ENGRAVING_ORDERING, retries=int(data.get("retries", 0)),
+                         arrival_rate_per_hour=data.get("arrival_rate_per_hour"), seed=data.get("seed"),
+                         samples=int(data.get("samples", 20)))
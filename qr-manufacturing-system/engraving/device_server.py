@@ -0,0 +1,105 @@
+"""
+Local TCP stand-in for a laser engraver, for integration tests.
+
+Speaks the newline-delimited protocol used by drivers.TcpEngraver:
+
+  PING                                        -> PONG
+  JOB <uid> <module_mm> <n> <min_seconds>
+  <row> <first_col> <last_col>   (n lines)    -> DONE <uid> OK <seconds>
+                                                 DONE <uid> ERR <reason>
+
+Burn time comes from SimulatedEngraver's timing model.
+
+Run: python -m engraving.device_server --port 9100 [--time-scale 0.1] [--fault-rate 0.02]
+"""
+
+import argparse
+import logging
+import socketserver
+import threading
+import time
+
+from .drivers import SimulatedEngraver
+from .geometry import QRGeometry
+
+logger = logging.getLogger(__name__)
+
+class _DeviceHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        model = self.server.model
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = line.decode().split()
+            if not parts:
+                continue
+            if parts[0] == "PING":
+                self._reply("PONG")
+            elif parts[0] == "JOB" and len(parts) == 5:
+                uid, module_mm, count, min_seconds = parts[1], float(parts[2]), int(parts[3]), float(parts[4])
+                segments = []
+                dark = 0
+                for _ in range(count):
+                    row, first, last = (int(v) for v in self.rfile.readline().split())
+                    segments.append((row, first, last))
+                    dark += last - first + 1
+                size = max((max(s[0], s[2]) for s in segments), default=-1) + 1
+                geometry = QRGeometry(uid, size, module_mm, segments, dark)
+                started = time.monotonic()
+                with self.server.stats_lock:
+                    self.server.jobs_received += 1
+                ok = model.engrave(geometry, min_seconds)
+                seconds = time.monotonic() - started
+                self._reply(f"DONE {uid} OK {seconds:.3f}" if ok else f"DONE {uid} ERR simulated_fault")
+            else:
+                self._reply(f"ERR unknown_command {parts[0]}")
+
+    def _reply(self, text):
+        self.wfile.write((text + "\n").encode())
+        self.wfile.flush()
+
+class EngraverDeviceServer(socketserver.ThreadingTCPServer):
+    """Threaded stand-in device; port 0 picks a free port (see server_address)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=9100, model=None):
+        super().__init__((host, port), _DeviceHandler)
+        self.model = model or SimulatedEngraver()
+        self.stats_lock = threading.Lock()
+        self.jobs_received = 0
+        self.thread = None
+
+    def start(self):
+        """Serve from a background thread (for tests); returns (host, port)."""
+        self.thread = threading.Thread(target=self.serve_forever, name="engraver-device", daemon=True)
+        self.thread.start()
+        return self.server_address
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local TCP stand-in laser engraver")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--fault-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    model = SimulatedEngraver(time_scale=args.time_scale, fault_rate=args.fault_rate)
+    server = EngraverDeviceServer(args.host, args.port, model)
+    print(f"🔧 Stand-in engraver listening on tcp://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
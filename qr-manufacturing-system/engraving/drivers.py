@@ -0,0 +1,186 @@
+"""
+Engraver drivers.
+
+A driver turns prepared QR geometry (geometry.py) into a burn on a device:
+
+  prepare(uid) -> QRGeometry      CPU work, done ahead of time by the line's prefetch
+  engrave(geometry, min_seconds)  blocks for the burn, returns True/False
+
+SimulatedEngraver models per-job timings (setup, laser-off jumps, marking
+passes). TcpEngraver talks to a device over a line protocol; device_server.py
+is a local stand-in that speaks it for integration tests.
+
+make_driver(spec) builds a driver from ENGRAVER_DEVICE: "simulated" (default)
+or "tcp://host:port".
+"""
+
+import logging
+import random
+import socket
+import threading
+import time
+
+from .geometry import render_qr_geometry
+
+logger = logging.getLogger(__name__)
+
+class EngraverError(Exception):
+    """The device rejected the job or could not be reached.
+
+    reason is a short code the line counts failures by.
+    """
+
+    def __init__(self, message, reason="device_error"):
+        super().__init__(message)
+        self.reason = reason
+
+class EngraverDriver:
+    """Base driver; subclasses implement engrave()."""
+
+    name = "base"
+
+    def __init__(self, module_mm=0.25):
+        self.module_mm = module_mm
+
+    def prepare(self, uid):
+        return render_qr_geometry(uid, module_mm=self.module_mm)
+
+    def engrave(self, geometry, min_seconds=0.0):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def info(self):
+        return {"driver": self.name, "module_mm": self.module_mm}
+
+class SimulatedEngraver(EngraverDriver):
+    """Timing model of a galvo fiber laser marking a QR on metal.
+
+    Defaults: 0.3 s load/focus, 3 marking passes at 200 mm/s, 2000 mm/s
+    jumps and 0.5 ms laser on/off delay per segment, +/-5% jitter. A version 2
+    code at 0.25 mm/module takes roughly 2 s. time_scale shrinks all timings
+    (e.g. 0.01 for fast simulations).
+    """
+
+    name = "simulated"
+
+    def __init__(self, module_mm=0.25, setup_seconds=0.3, passes=3, mark_speed_mm_s=200.0,
+                 jump_speed_mm_s=2000.0, segment_delay_seconds=0.0005, jitter=0.05,
+                 fault_rate=0.0, time_scale=1.0, seed=None):
+        super().__init__(module_mm)
+        self.setup_seconds = setup_seconds
+        self.passes = passes
+        self.mark_speed_mm_s = mark_speed_mm_s
+        self.jump_speed_mm_s = jump_speed_mm_s
+        self.segment_delay_seconds = segment_delay_seconds
+        self.jitter = jitter
+        self.fault_rate = fault_rate
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+
+    def estimate(self, geometry):
+        """Phase timings (seconds) for one job, before jitter and time_scale."""
+        mark = self.passes * geometry.burn_length_mm / self.mark_speed_mm_s
+        jump = self.passes * geometry.jump_length_mm() / self.jump_speed_mm_s
+        switching = self.passes * len(geometry.segments) * self.segment_delay_seconds
+        return {
+            "setup": self.setup_seconds,
+            "mark": mark,
+            "jump": jump,
+            "switching": switching,
+            "total": self.setup_seconds + mark + jump + switching
+        }
+
+    def engrave(self, geometry, min_seconds=0.0):
+        seconds = self.estimate(geometry)["total"]
+        if self.jitter:
+            seconds *= 1 + self.random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(seconds, min_seconds or 0.0) * self.time_scale)
+        return self.random.random() >= self.fault_rate
+
+    def info(self):
+        return {**super().info(), "passes": self.passes, "mark_speed_mm_s": self.mark_speed_mm_s,
+                "fault_rate": self.fault_rate, "time_scale": self.time_scale}
+
+class TcpEngraver(EngraverDriver):
+    """Client for the engraver line protocol (see device_server.py).
+
+    Each station thread keeps its own connection, reconnecting after errors.
+    """
+
+    name = "tcp"
+
+    def __init__(self, host, port, module_mm=0.25, connect_timeout=5.0, job_timeout=120.0):
+        super().__init__(module_mm)
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.job_timeout = job_timeout
+        self.local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+            sock.settimeout(self.job_timeout)
+            conn = (sock, sock.makefile("rwb"))
+            self.local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self.local, "conn", None)
+        self.local.conn = None
+        if conn:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    def _request(self, lines):
+        try:
+            sock, stream = self._connection()
+            stream.write("".join(line + "\n" for line in lines).encode())
+            stream.flush()
+            reply = stream.readline().decode().strip()
+        except OSError as e:
+            self._drop_connection()
+            raise EngraverError(f"Engraver {self.host}:{self.port} unreachable: {e}", reason="unreachable")
+        if not reply:
+            self._drop_connection()
+            raise EngraverError(f"Engraver {self.host}:{self.port} closed the connection", reason="connection_closed")
+        return reply
+
+    def ping(self):
+        return self._request(["PING"]) == "PONG"
+
+    def engrave(self, geometry, min_seconds=0.0):
+        lines = [f"JOB {geometry.uid} {geometry.module_mm} {len(geometry.segments)} {float(min_seconds or 0.0)}"]
+        lines.extend(f"{row} {first} {last}" for row, first, last in geometry.segments)
+        reply = self._request(lines).split()
+        if len(reply) < 3 or reply[0] != "DONE" or reply[1] != geometry.uid:
+            self._drop_connection()
+            raise EngraverError(f"Unexpected reply from engraver: {' '.join(reply)}", reason="protocol_error")
+        if reply[2] != "OK":
+            logger.warning(f"⚠️ Engraver reported failure for {geometry.uid}: {' '.join(reply[3:])}")
+            return False
+        return True
+
+    def close(self):
+        self._drop_connection()
+
+    def info(self):
+        return {**super().info(), "host": self.host, "port": self.port}
+
+def make_driver(spec=None, **kwargs):
+    """Build a driver from "simulated" or "tcp://host:port"."""
+    spec = (spec or "simulated").strip()
+    if spec == "simulated":
+        return SimulatedEngraver(**kwargs)
+    if spec.startswith("tcp://"):
+        host, _, port = spec[len("tcp://"):].rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Invalid engraver address '{spec}', expected tcp://host:port")
+        return TcpEngraver(host, int(port), **kwargs)
+    raise ValueError(f"Unknown engraver driver '{spec}'")
@@ -0,0 +1,127 @@
+"""
+Engraving event broadcaster.
+
+The line publishes item_started, item_finished, progress, state and station
+events here; every /engrave/events viewer (SSE in Flask, WebSocket in
+FastAPI) subscribes to the same broadcaster. Each event is serialized once
+and shared by all subscribers, so N viewers cost N queue puts per event
+instead of N status polls per interval.
+"""
+
+from collections import deque
+from datetime import datetime
+import json
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+class TooManySubscribers(Exception):
+    """subscribe() was called with max_subscribers already connected."""
+
+class Event:
+    """One published event with its wire formats precomputed."""
+
+    __slots__ = ("id", "type", "data", "json", "sse")
+
+    def __init__(self, event_id, event_type, data):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.json = json.dumps({"id": event_id, "type": event_type, "data": data}, default=str)
+        self.sse = f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+class Subscription:
+    """A viewer's bounded mailbox. A viewer that falls too far behind is dropped."""
+
+    def __init__(self, broadcaster, max_pending):
+        self.broadcaster = broadcaster
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.closed = False
+
+    def get(self, timeout=None):
+        """Next event, or None on timeout / when the subscription was closed."""
+        try:
+            event = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return event
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class EventBroadcaster:
+    """Fan-out of engraving events to any number of subscribers."""
+
+    def __init__(self, history_size=200, max_pending=500):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.history = deque(maxlen=history_size)
+        self.max_pending = max_pending
+        self.next_id = 0
+        self.published_count = 0
+        self.dropped_subscribers = 0
+
+    def publish(self, event_type, data):
+        data = {**data, "ts": datetime.utcnow().isoformat()}
+        with self.lock:
+            self.next_id += 1
+            event = Event(self.next_id, event_type, data)
+            self.history.append(event)
+            self.published_count += 1
+            for sub in list(self.subscribers):
+                try:
+                    sub.queue.put_nowait(event)
+                except queue.Full:
+                    self._drop(sub)
+        return event
+
+    def subscribe(self, last_event_id=None, max_subscribers=None):
+        """Register a viewer; events after last_event_id (SSE reconnect) are replayed.
+
+        Raises TooManySubscribers when max_subscribers viewers are already connected.
+        """
+        sub = Subscription(self, self.max_pending)
+        with self.lock:
+            if max_subscribers is not None and len(self.subscribers) >= max_subscribers:
+                raise TooManySubscribers(f"{len(self.subscribers)} event subscribers connected")
+            if last_event_id is not None:
+                for event in self.history:
+                    if event.id > last_event_id:
+                        sub.queue.put_nowait(event)
+            self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            self.subscribers.discard(sub)
+            sub.closed = True
+
+    def _drop(self, sub):
+        """Disconnect a subscriber whose mailbox is full (called with self.lock held)."""
+        self.subscribers.discard(sub)
+        sub.closed = True
+        self.dropped_subscribers += 1
+        # Make room for a wake-up so the reader notices it was closed
+        try:
+            sub.queue.get_nowait()
+            sub.queue.put_nowait(None)
+        except (queue.Empty, queue.Full):
+            pass
+        logger.warning("⚠️ Dropped a slow engraving event subscriber")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "subscribers": len(self.subscribers),
+                "published_count": self.published_count,
+                "dropped_subscribers": self.dropped_subscribers,
+                "last_event_id": self.next_id
+            }
@@ -0,0 +1,99 @@
+"""
+QR geometry for the laser.
+
+A QR code is engraved as horizontal burn segments: each run of dark modules
+in a row becomes one segment. render_qr_geometry() builds them from the
+payload with the same QR settings as the generated labels (version 2, error
+correction M) unless a layout (layout.py) picks other ones, so drivers receive
+a ready-to-burn job.
+"""
+
+class QRGeometry:
+    """Burn segments (row, first_col, last_col) for one QR code, and the error-correction level it carries."""
+
+    __slots__ = ("uid", "size", "module_mm", "segments", "dark_modules", "error_correction")
+
+    def __init__(self, uid, size, module_mm, segments, dark_modules, error_correction="M"):
+        self.uid = uid
+        self.size = size
+        self.module_mm = module_mm
+        self.segments = segments
+        self.dark_modules = dark_modules
+        self.error_correction = error_correction
+
+    @property
+    def side_mm(self):
+        return self.size * self.module_mm
+
+    @property
+    def burn_length_mm(self):
+        return self.dark_modules * self.module_mm
+
+    def jump_length_mm(self):
+        """Laser-off travel between consecutive segments (in order, from the origin)."""
+        total = 0.0
+        x = y = 0.0
+        for row, first, last in self.segments:
+            sx, sy = first * self.module_mm, row * self.module_mm
+            total += ((sx - x) ** 2 + (sy - y) ** 2) ** 0.5
+            x, y = (last + 1) * self.module_mm, sy
+        return total
+
+    def info(self):
+        return {
+            "uid": self.uid,
+            "modules": self.size,
+            "module_mm": self.module_mm,
+            "error_correction": self.error_correction,
+            "side_mm": round(self.side_mm, 3),
+            "segments": len(self.segments),
+            "burn_length_mm": round(self.burn_length_mm, 2),
+            "jump_length_mm": round(self.jump_length_mm(), 2)
+        }
+
+def geometry_from_matrix(uid, matrix, module_mm=0.25, error_correction="M"):
+    """Convert a module matrix (rows of booleans, True = dark) into burn segments."""
+    segments = []
+    dark = 0
+    for row_index, row in enumerate(matrix):
+        run_start = None
+        for col, is_dark in enumerate(row):
+            if is_dark:
+                dark += 1
+                if run_start is None:
+                    run_start = col
+            elif run_start is not None:
+                segments.append((row_index, run_start, col - 1))
+                run_start = None
+        if run_start is not None:
+            segments.append((row_index, run_start, len(row) - 1))
+    return QRGeometry(uid, len(matrix), module_mm, segments, dark, error_correction)
+
+def geometry_modules(geometry):
+    """Module matrix (rows of booleans, True = dark) back from the burn segments."""
+    matrix = [[False] * geometry.size for _ in range(geometry.size)]
+    for row, first, last in geometry.segments:
+        for col in range(first, last + 1):
+            matrix[row][col] = True
+    return matrix
+
+ERROR_CORRECTION_LEVELS = ("L", "M", "Q", "H")
+
+def qr_matrix(payload, version=2, error_correction="M", border=2, mask_pattern=None):
+    """Module matrix (border included) and the version used; version None picks the smallest that fits."""
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=version,
+        error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{error_correction}"),
+        border=border,
+        mask_pattern=mask_pattern,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return qr.get_matrix(), qr.version
+
+def render_qr_geometry(payload, module_mm=0.25, border=2, version=2, error_correction="M", mask_pattern=None):
+    """Render a payload to burn segments (defaults: same QR settings as the label generator)."""
+    matrix, _ = qr_matrix(payload, version, error_correction, border, mask_pattern)
+    return geometry_from_matrix(payload, matrix, module_mm, error_correction)
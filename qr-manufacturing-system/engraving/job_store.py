@@ -0,0 +1,615 @@
+"""
+Engraving job stores.
+
+The line pulls work through a job store:
+
+  create_job -> claim -> start_item -> finish_item
+
+MemoryJobStore keeps the queues in process (lost on restart). MySQLJobStore
+persists jobs in engrave_jobs / engrave_job_items so a restart resumes where
+the line stopped. Several jobs can be open at once; the line decides which one
+to claim from (by priority), the store only keeps one queue per job.
+
+Per-item states in MySQL:
+  queued     waiting for a station
+  claimed    leased to a station, not yet burning (safe to hand out again
+             once the lease expires)
+  burning    the laser was started; never re-engraved automatically (the
+             line renews the lease while the burn runs)
+  retry      the burn failed; the line re-hands it to a station after a backoff
+  done / failed   (failed = out of attempts, i.e. dead-lettered)
+  uncertain  was burning when its lease expired (owner died); an operator
+             resolves it (resolve_item) so a restart costs zero duplicate
+             engravings. If the owner was only late, its finish_item /
+             retry_item still settles the item.
+  cancelled  job stopped before the item was claimed
+
+Jobs are owned too: engrave_jobs.owner / lease_expires_at are set by the
+process that created (or adopted) the job and renewed by its line
+(renew_jobs). Several processes can share the tables; recover() only adopts
+jobs whose owner stopped renewing, and only requeues items whose own lease
+has expired.
+"""
+
+from collections import deque
+import logging
+import os
+import socket
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class MemoryJobStore:
+    """In-process queue; the default when no durable store is configured."""
+
+    durable = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queues = {}
+        self.next_job_id = 0
+
+    def create_job(self, items, simulate=True, delay_seconds=1.0, priority=0):
+        with self.lock:
+            self.next_job_id += 1
+            job_id = self.next_job_id
+            self.queues[job_id] = deque(
+                {**item, "job_id": job_id, "seq": seq} for seq, item in enumerate(items)
+            )
+            return job_id
+
+    def claim(self, job_id, station_id):
+        with self.lock:
+            queue = self.queues.get(job_id)
+            return queue.popleft() if queue else None
+
+    def start_item(self, item):
+        return True
+
+    def renew(self, item):
+        return True
+
+    def renew_jobs(self):
+        return 0
+
+    def finish_item(self, item, success, reason=None):
+        return "burning"
+
+    def retry_item(self, item, reason):
+        return "burning"
+
+    def reclaim(self, item, station_id):
+        return True
+
+    def release(self, item):
+        with self.lock:
+            queue = self.queues.get(item["job_id"])
+            if queue is not None:
+                queue.appendleft(item)
+
+    def set_job_status(self, job_id, status):
+        if status == "completed":
+            with self.lock:
+                self.queues.pop(job_id, None)
+
+    def cancel(self, job_id):
+        with self.lock:
+            self.queues.pop(job_id, None)
+
+    def sweep(self):
+        return {}
+
+    def recover(self):
+        return []
+
+    def list_jobs(self, limit=20):
+        return []
+
+    def get_job_items(self, job_id, state=None):
+        return []
+
+    def resolve_item(self, job_id, uid, engraved):
+        return 0
+
+class MySQLJobStore:
+    """Durable job queue with transactional claim/lease (MySQL 8: SKIP LOCKED)."""
+
+    durable = True
+
+    def __init__(self, get_conn, lease_seconds=120):
+        self.get_conn = get_conn
+        self.lease_seconds = lease_seconds
+        # Identifies this process' claims; a restarted process gets a new owner
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._schema_ready = False
+
+    # ---------------- helpers ----------------
+    def _run(self, fn):
+        conn = self.get_conn()
+        try:
+            return fn(conn)
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def ensure_schema(self):
+        if self._schema_ready:
+            return
+
+        def create(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS engrave_jobs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                status VARCHAR(20) NOT NULL,
+                priority INT DEFAULT 0,
+                simulate BOOLEAN DEFAULT TRUE,
+                delay_seconds DOUBLE DEFAULT 1.0,
+                total_count INT DEFAULT 0,
+                owner VARCHAR(100),
+                lease_expires_at DATETIME,
+                created_at DATETIME,
+                updated_at DATETIME,
+                INDEX idx_status (status)
+            )
+            """)
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS engrave_job_items (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                job_id INT NOT NULL,
+                seq INT NOT NULL,
+                uid VARCHAR(255) NOT NULL,
+                state VARCHAR(20) NOT NULL DEFAULT 'queued',
+                station_id VARCHAR(100),
+                owner VARCHAR(100),
+                lease_expires_at DATETIME,
+                attempts INT DEFAULT 0,
+                claimed_at DATETIME,
+                started_at DATETIME,
+                finished_at DATETIME,
+                failures INT DEFAULT 0,
+                failure_reason VARCHAR(100),
+                INDEX idx_job_state_seq (job_id, state, seq),
+                INDEX idx_state_lease (state, lease_expires_at)
+            )
+            """)
+            # Columns added after the tables were first created
+            for table, column, definition in (
+                ("engrave_jobs", "priority", "INT DEFAULT 0 AFTER status"),
+                ("engrave_jobs", "owner", "VARCHAR(100)"),
+                ("engrave_jobs", "lease_expires_at", "DATETIME"),
+                ("engrave_job_items", "failures", "INT DEFAULT 0"),
+                ("engrave_job_items", "failure_reason", "VARCHAR(100)")
+            ):
+                cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.columns
+                WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+                """, (table, column))
+                if not cursor.fetchone()[0]:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            cursor.close()
+
+        self._run(create)
+        self._schema_ready = True
+
+    # ---------------- job lifecycle ----------------
+    def create_job(self, items, simulate=True, delay_seconds=1.0, priority=0):
+        self.ensure_schema()
+
+        def create(conn):
+            cursor = conn.cursor()
+            conn.start_transaction()
+            try:
+                cursor.execute("""
+                INSERT INTO engrave_jobs (status, priority, simulate, delay_seconds, total_count, owner,
+                                          lease_expires_at, created_at, updated_at)
+                VALUES ('running', %s, %s, %s, %s, %s, UTC_TIMESTAMP() + INTERVAL %s SECOND,
+                        UTC_TIMESTAMP(), UTC_TIMESTAMP())
+                """, (int(priority), bool(simulate), float(delay_seconds), len(items), self.owner, self.lease_seconds))
+                job_id = cursor.lastrowid
+                cursor.executemany("""
+                INSERT INTO engrave_job_items (job_id, seq, uid, state)
+                VALUES (%s, %s, %s, 'queued')
+                """, [(job_id, seq, item["uid"]) for seq, item in enumerate(items)])
+                conn.commit()
+                return job_id
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        return self._run(create)
+
+    def claim(self, job_id, station_id):
+        """Lease the next queued (or lease-expired claimed) item to a station."""
+
+        def claim(conn):
+            cursor = conn.cursor(dictionary=True)
+            conn.start_transaction()
+            try:
+                cursor.execute("""
+                SELECT id, seq, uid, failures FROM engrave_job_items
+                WHERE job_id = %s
+                AND (state = 'queued' OR (state = 'claimed' AND lease_expires_at < UTC_TIMESTAMP()))
+                ORDER BY seq
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+                """, (job_id,))
+                row = cursor.fetchone()
+                if not row:
+                    conn.commit()
+                    return None
+                cursor.execute("""
+                UPDATE engrave_job_items
+                SET state = 'claimed', station_id = %s, owner = %s, attempts = attempts + 1,
+                    claimed_at = UTC_TIMESTAMP(),
+                    lease_expires_at = UTC_TIMESTAMP() + INTERVAL %s SECOND
+                WHERE id = %s
+                """, (station_id, self.owner, self.lease_seconds, row["id"]))
+                conn.commit()
+                return {"uid": row["uid"], "job_id": job_id, "seq": row["seq"], "item_id": row["id"],
+                        "failures": row["failures"] or 0}
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        return self._run(claim)
+
+    def start_item(self, item):
+        """Move a claim to 'burning'. Returns False if the claim was lost (lease expired
+        and another worker took it), in which case the item must not be engraved."""
+
+        def start(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            UPDATE engrave_job_items
+            SET state = 'burning', started_at = UTC_TIMESTAMP(),
+                lease_expires_at = UTC_TIMESTAMP() + INTERVAL %s SECOND
+            WHERE id = %s AND owner = %s AND state = 'claimed'
+            """, (self.lease_seconds, item["item_id"], self.owner))
+            started = cursor.rowcount == 1
+            conn.commit()
+            cursor.close()
+            return started
+
+        return self._run(start)
+
+    def renew(self, item):
+        """Extend the lease of an item this process is burning. False if it is no longer burning here."""
+
+        def renew(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            UPDATE engrave_job_items
+            SET lease_expires_at = UTC_TIMESTAMP() + INTERVAL %s SECOND
+            WHERE id = %s AND owner = %s AND state = 'burning'
+            """, (self.lease_seconds, item["item_id"], self.owner))
+            renewed = cursor.rowcount == 1
+            conn.commit()
+            cursor.close()
+            return renewed
+
+        return self._run(renew)
+
+    def renew_jobs(self):
+        """Extend the lease on every open job this process owns; returns how many."""
+
+        def renew(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            UPDATE engrave_jobs
+            SET lease_expires_at = UTC_TIMESTAMP() + INTERVAL %s SECOND
+            WHERE owner = %s AND status IN ('running', 'paused')
+            """, (self.lease_seconds, self.owner))
+            renewed = cursor.rowcount
+            conn.commit()
+            cursor.close()
+            return renewed
+
+        return self._run(renew)
+
+    def _settle(self, item, action, assignments, params):
+        """Move one of our burning (or swept-to-uncertain) items on; returns the state it left.
+
+        None (logged) when the item is not ours any more, e.g. an operator resolved it.
+        """
+
+        def settle(conn):
+            cursor = conn.cursor()
+            conn.start_transaction()
+            try:
+                cursor.execute("""
+                SELECT state FROM engrave_job_items
+                WHERE id = %s AND owner = %s AND state IN ('burning', 'uncertain')
+                FOR UPDATE
+                """, (item["item_id"], self.owner))
+                row = cursor.fetchone()
+                if row:
+                    cursor.execute(f"UPDATE engrave_job_items SET {assignments} WHERE id = %s",
+                                   (*params, item["item_id"]))
+                conn.commit()
+                return row[0] if row else None
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        previous = self._run(settle)
+        if previous is None:
+            logger.warning(f"⚠️ {action} for {item.get('uid')} (item {item['item_id']}) changed nothing: "
+                           f"it is no longer burning for this process")
+        return previous
+
+    def finish_item(self, item, success, reason=None):
+        """Record the burn's result. Returns the state it left ('burning' / 'uncertain') or None."""
+        return self._settle(item, "finish", """
+            state = %s, finished_at = UTC_TIMESTAMP(), lease_expires_at = NULL,
+            failures = failures + %s, failure_reason = COALESCE(%s, failure_reason)
+            """, ("done" if success else "failed", 0 if success else 1, reason))
+
+    def retry_item(self, item, reason):
+        """Park a failed burn for retry; the line hands it out again via reclaim().
+
+        Returns the state it left ('burning' / 'uncertain') or None.
+        """
+        return self._settle(item, "retry", """
+            state = 'retry', failures = failures + 1, failure_reason = %s, lease_expires_at = NULL
+            """, (reason,))
+
+    def reclaim(self, item, station_id):
+        """Lease a retry item to a station again. False if it is no longer ours (e.g. job stopped)."""
+
+        def reclaim(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            UPDATE engrave_job_items
+            SET state = 'claimed', station_id = %s, attempts = attempts + 1, claimed_at = UTC_TIMESTAMP(),
+                lease_expires_at = UTC_TIMESTAMP() + INTERVAL %s SECOND
+            WHERE id = %s AND owner = %s AND state = 'retry'
+            """, (station_id, self.lease_seconds, item["item_id"], self.owner))
+            reclaimed = cursor.rowcount == 1
+            conn.commit()
+            cursor.close()
+            return reclaimed
+
+        return self._run(reclaim)
+
+    def release(self, item):
+        """Return a claimed, not yet burning item to the queue."""
+
+        def release(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            UPDATE engrave_job_items
+            SET state = 'queued', station_id = NULL, owner = NULL, lease_expires_at = NULL
+            WHERE id = %s AND owner = %s AND state = 'claimed'
+            """, (item["item_id"], self.owner))
+            conn.commit()
+            cursor.close()
+
+        self._run(release)
+
+    def set_job_status(self, job_id, status):
+        def update(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            UPDATE engrave_jobs SET status = %s, updated_at = UTC_TIMESTAMP() WHERE id = %s
+            """, (status, job_id))
+            conn.commit()
+            cursor.close()
+
+        self._run(update)
+
+    def cancel(self, job_id):
+        def cancel(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            UPDATE engrave_job_items SET state = 'cancelled', lease_expires_at = NULL
+            WHERE job_id = %s AND state IN ('queued', 'claimed', 'retry')
+            """, (job_id,))
+            cursor.execute("""
+            UPDATE engrave_jobs SET status = 'stopped', updated_at = UTC_TIMESTAMP() WHERE id = %s
+            """, (job_id,))
+            conn.commit()
+            cursor.close()
+
+        self._run(cancel)
+
+    # ---------------- recovery ----------------
+    def sweep(self):
+        """Flag items that were burning when their owner died (lease expired) as uncertain.
+
+        Returns {job_id: flagged count}.
+        """
+
+        def sweep(conn):
+            cursor = conn.cursor()
+            conn.start_transaction()
+            try:
+                cursor.execute("""
+                SELECT job_id, COUNT(*) FROM engrave_job_items
+                WHERE state = 'burning' AND lease_expires_at < UTC_TIMESTAMP()
+                GROUP BY job_id
+                FOR UPDATE
+                """)
+                flagged = dict(cursor.fetchall())
+                if flagged:
+                    cursor.execute("""
+                    UPDATE engrave_job_items SET state = 'uncertain'
+                    WHERE state = 'burning' AND lease_expires_at < UTC_TIMESTAMP()
+                    """)
+                conn.commit()
+                return flagged
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+        flagged = self._run(sweep)
+        if flagged:
+            logger.warning(f"⚠️ {sum(flagged.values())} engraving item(s) were interrupted mid-burn and need operator review")
+        return flagged
+
+    def recover(self):
+        """Adopt unfinished jobs whose owner is gone and prepare them for resumption.
+
+        A job is adopted only once its lease has expired (its owner stopped
+        calling renew_jobs()), so a second live process on the same tables keeps
+        its jobs. In adopted jobs, expired claims and pending retries are
+        requeued (they are not on the laser) and expired burns become
+        'uncertain' instead of being engraved again; rows whose lease is still
+        running are left to claim() / sweep() once it expires.
+        Returns a list of job dicts for the line, oldest first (only the jobs
+        adopted by this call).
+        """
+        self.ensure_schema()
+
+        def recover(conn):
+            cursor = conn.cursor(dictionary=True)
+            conn.start_transaction()
+            try:
+                cursor.execute("""
+                SELECT id, status, priority, simulate, delay_seconds, total_count, created_at
+                FROM engrave_jobs
+                WHERE status IN ('running', 'paused') AND NOT (owner <=> %s)
+                AND (lease_expires_at IS NULL OR lease_expires_at < UTC_TIMESTAMP())
+                ORDER BY id
+                FOR UPDATE SKIP LOCKED
+                """, (self.owner,))
+                jobs = cursor.fetchall()
+                if not jobs:
+                    conn.commit()
+                    cursor.close()
+                    return []
+
+                job_ids = [job["id"] for job in jobs]
+                placeholders = ", ".join(["%s"] * len(job_ids))
+                cursor.execute(f"""
+                UPDATE engrave_jobs
+                SET owner = %s, lease_expires_at = UTC_TIMESTAMP() + INTERVAL %s SECOND
+                WHERE id IN ({placeholders})
+                """, (self.owner, self.lease_seconds, *job_ids))
+                cursor.execute(f"""
+                UPDATE engrave_job_items
+                SET state = 'queued', station_id = NULL, owner = NULL, lease_expires_at = NULL
+                WHERE job_id IN ({placeholders}) AND state IN ('claimed', 'retry')
+                AND (lease_expires_at IS NULL OR lease_expires_at < UTC_TIMESTAMP())
+                """, job_ids)
+                cursor.execute(f"""
+                UPDATE engrave_job_items SET state = 'uncertain'
+                WHERE job_id IN ({placeholders}) AND state = 'burning' AND lease_expires_at < UTC_TIMESTAMP()
+                """, job_ids)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                cursor.close()
+                raise
+
+            cursor.execute(f"""
+            SELECT job_id, state, COUNT(*) as count FROM engrave_job_items
+            WHERE job_id IN ({placeholders}) GROUP BY job_id, state
+            """, job_ids)
+            counts = {}
+            for row in cursor.fetchall():
+                counts.setdefault(row["job_id"], {})[row["state"]] = row["count"]
+            cursor.close()
+            recovered = []
+            for job in jobs:
+                job_counts = counts.get(job["id"], {})
+                recovered.append({
+                    "job_id": job["id"],
+                    "status": job["status"],
+                    "priority": int(job["priority"] or 0),
+                    "simulate": bool(job["simulate"]),
+                    "delay_seconds": float(job["delay_seconds"]),
+                    "start_time": job["created_at"],
+                    "total_count": job["total_count"] - job_counts.get("cancelled", 0),
+                    "processed_count": job_counts.get("done", 0) + job_counts.get("failed", 0),
+                    "failed_count": job_counts.get("failed", 0),
+                    "uncertain_count": job_counts.get("uncertain", 0)
+                })
+            return recovered
+
+        return self._run(recover)
+
+    # ---------------- operator views ----------------
+    def list_jobs(self, limit=20):
+        self.ensure_schema()
+
+        def list_jobs(conn):
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+            SELECT j.id, j.status, j.priority, j.simulate, j.delay_seconds, j.total_count, j.created_at, j.updated_at,
+                   SUM(ji.state = 'done') as done_count,
+                   SUM(ji.state = 'failed') as failed_count,
+                   SUM(ji.state IN ('queued', 'claimed')) as queued_count,
+                   SUM(ji.state = 'retry') as retrying_count,
+                   SUM(ji.state = 'uncertain') as uncertain_count
+            FROM engrave_jobs j
+            LEFT JOIN engrave_job_items ji ON ji.job_id = j.id
+            GROUP BY j.id
+            ORDER BY j.id DESC
+            LIMIT %s
+            """, (limit,))
+            jobs = cursor.fetchall()
+            cursor.close()
+            for job in jobs:
+                for field in ("created_at", "updated_at"):
+                    if job[field]:
+                        job[field] = job[field].isoformat()
+                for field in ("done_count", "failed_count", "queued_count", "retrying_count", "uncertain_count"):
+                    job[field] = int(job[field] or 0)
+                job["simulate"] = bool(job["simulate"])
+            return jobs
+
+        return self._run(list_jobs)
+
+    def get_job_items(self, job_id, state=None):
+        self.ensure_schema()
+
+        def items(conn):
+            cursor = conn.cursor(dictionary=True)
+            query = """
+            SELECT seq, uid, state, station_id, attempts, failures, failure_reason, claimed_at, started_at, finished_at
+            FROM engrave_job_items WHERE job_id = %s
+            """
+            params = [job_id]
+            if state:
+                query += " AND state = %s"
+                params.append(state)
+            cursor.execute(query + " ORDER BY seq", params)
+            rows = cursor.fetchall()
+            cursor.close()
+            for row in rows:
+                for field in ("claimed_at", "started_at", "finished_at"):
+                    if row[field]:
+                        row[field] = row[field].isoformat()
+            return rows
+
+        return self._run(items)
+
+    def resolve_item(self, job_id, uid, engraved):
+        """Operator decision for an 'uncertain' item: mark it done, or queue it again."""
+
+        def resolve(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+            UPDATE engrave_job_items
+            SET state = %s, owner = NULL, station_id = NULL, lease_expires_at = NULL,
+                finished_at = IF(%s, UTC_TIMESTAMP(), NULL)
+            WHERE job_id = %s AND uid = %s AND state = 'uncertain'
+            """, ("done" if engraved else "queued", bool(engraved), job_id, uid))
+            resolved = cursor.rowcount
+            conn.commit()
+            cursor.close()
+            return resolved
+
+        return self._run(resolve)
@@ -0,0 +1,162 @@
+"""
+Engraving-time-aware QR symbol layout.
+
+Burn time grows with the number of dark modules and the module size, so the
+label defaults (version 2, error correction M, whatever mask qrcode picks)
+are rarely the fastest symbol a part can carry. For each component a
+LayoutPolicy sets what the mark must meet:
+
+  min_module_mm   smallest module the camera reads reliably on that surface
+  max_side_mm     marking area available on the part (quiet zone included)
+  min_ecc         weakest error-correction level allowed (L < M < Q < H)
+  quiet_zone      border in modules
+
+LayoutOptimizer.variants() renders every allowed level at its smallest
+version with all 8 masks, estimates each burn with the engraver timing model
+(drivers.SimulatedEngraver.estimate) and best() picks the fastest variant
+that fits. report() summarizes a lot against the label defaults.
+"""
+
+from .drivers import SimulatedEngraver
+from .geometry import ERROR_CORRECTION_LEVELS, geometry_from_matrix, qr_matrix
+from .ordering import parse_uid
+
+MASK_PATTERNS = range(8)
+
+class LayoutPolicy:
+    """Readability and size limits for one component's marks."""
+
+    def __init__(self, min_module_mm=0.25, max_side_mm=12.0, min_ecc="M", quiet_zone=2):
+        if min_ecc not in ERROR_CORRECTION_LEVELS:
+            raise ValueError(f"min_ecc must be one of {', '.join(ERROR_CORRECTION_LEVELS)}")
+        self.min_module_mm = float(min_module_mm)
+        self.max_side_mm = float(max_side_mm)
+        self.min_ecc = min_ecc
+        self.quiet_zone = int(quiet_zone)
+
+    @classmethod
+    def from_dict(cls, data):
+        data = data or {}
+        return cls(data.get("min_module_mm", 0.25), data.get("max_side_mm", 12.0),
+                   data.get("min_ecc", "M"), data.get("quiet_zone", 2))
+
+    def allowed_levels(self):
+        return ERROR_CORRECTION_LEVELS[ERROR_CORRECTION_LEVELS.index(self.min_ecc):]
+
+    def accepts(self, variant):
+        return (variant["module_mm"] >= self.min_module_mm and variant["side_mm"] <= self.max_side_mm
+                and variant["error_correction"] in self.allowed_levels())
+
+    def to_dict(self):
+        return {"min_module_mm": self.min_module_mm, "max_side_mm": self.max_side_mm,
+                "min_ecc": self.min_ecc, "quiet_zone": self.quiet_zone}
+
+# Sleepers are marked outdoors on concrete-cast steel inserts: bigger modules, more ECC
+DEFAULT_POLICIES = {
+    "ERC": {"min_module_mm": 0.25, "max_side_mm": 10.0, "min_ecc": "M"},
+    "LINER": {"min_module_mm": 0.25, "max_side_mm": 12.0, "min_ecc": "M"},
+    "PAD": {"min_module_mm": 0.30, "max_side_mm": 15.0, "min_ecc": "Q"},
+    "SLEEPER": {"min_module_mm": 0.50, "max_side_mm": 30.0, "min_ecc": "H"},
+    "default": {"min_module_mm": 0.25, "max_side_mm": 12.0, "min_ecc": "M"}
+}
+
+class LayoutOptimizer:
+    """Pick the fastest acceptable QR symbol per part.
+
+    policies maps component -> policy dict (merged over DEFAULT_POLICIES);
+    baseline is the fixed layout the report compares against.
+    """
+
+    def __init__(self, engraver=None, policies=None, baseline_module_mm=0.25):
+        self.engraver = engraver or SimulatedEngraver()
+        self.policies = {key: LayoutPolicy.from_dict({**DEFAULT_POLICIES.get(key, {}), **(policies or {}).get(key, {})})
+                         for key in {*DEFAULT_POLICIES, *(policies or {})}}
+        self.baseline_module_mm = baseline_module_mm
+
+    def policy_for(self, uid, component=None):
+        component = component or parse_uid(uid)["component"]
+        return component, self.policies.get(component) or self.policies["default"]
+
+    def _variant(self, uid, matrix, version, ecc, mask, module_mm, max_side_mm):
+        geometry = geometry_from_matrix(uid, matrix, module_mm, ecc)
+        estimate = self.engraver.estimate(geometry)
+        return {
+            "version": version,
+            "error_correction": ecc,
+            "mask": mask,
+            "modules": geometry.size,
+            "module_mm": module_mm,
+            "side_mm": round(geometry.side_mm, 2),
+            "dark_modules": geometry.dark_modules,
+            "segments": len(geometry.segments),
+            "burn_seconds": round(estimate["total"], 3),
+            "fits": geometry.side_mm <= max_side_mm + 1e-9
+        }, geometry
+
+    def variants(self, uid, policy=None):
+        """All (level, mask) variants at each level's smallest version, fastest first, with geometries."""
+        if policy is None:
+            _, policy = self.policy_for(uid)
+        results = []
+        for ecc in policy.allowed_levels():
+            version = None
+            for mask in MASK_PATTERNS:
+                matrix, version = qr_matrix(uid, version, ecc, policy.quiet_zone, mask)
+                results.append(self._variant(uid, matrix, version, ecc, mask, policy.min_module_mm, policy.max_side_mm))
+        results.sort(key=lambda pair: pair[0]["burn_seconds"])
+        return results
+
+    def baseline(self, uid):
+        """The label generator's fixed layout (version 2+, level M, automatic mask)."""
+        matrix, version = qr_matrix(uid)
+        variant, geometry = self._variant(uid, matrix, version, "M", None, self.baseline_module_mm, float("inf"))
+        return variant, geometry
+
+    def best(self, uid, policy=None):
+        """Fastest variant that fits the policy; (None, None) when nothing fits."""
+        for variant, geometry in self.variants(uid, policy):
+            if variant["fits"]:
+                return variant, geometry
+        return None, None
+
+    def geometry(self, uid):
+        """Burn geometry of the best layout (baseline when nothing fits the policy)."""
+        _, geometry = self.best(uid)
+        return geometry or self.baseline(uid)[1]
+
+    def report(self, uids, component=None, policy=None):
+        """Variants of the first uid, the chosen layout per uid and lot totals vs the baseline."""
+        if not uids:
+            raise ValueError("No uids to lay out")
+        component, default_policy = self.policy_for(uids[0], component)
+        policy = LayoutPolicy.from_dict({**default_policy.to_dict(), **policy}) if policy else default_policy
+        chosen, best_total, baseline_total, unfit, baseline_ok = [], 0.0, 0.0, 0, 0
+        for uid in uids:
+            variant, _ = self.best(uid, policy)
+            baseline, _ = self.baseline(uid)
+            baseline_total += baseline["burn_seconds"]
+            baseline_ok += policy.accepts(baseline)
+            if variant is None:
+                unfit += 1
+                variant = baseline
+            best_total += variant["burn_seconds"]
+            chosen.append({"uid": uid, **{key: variant[key] for key in
+                                          ("version", "error_correction", "mask", "side_mm", "burn_seconds")}})
+        saved = baseline_total - best_total
+        return {
+            "component": component,
+            "policy": policy.to_dict(),
+            "timing_model": self.engraver.info(),
+            "variants": [variant for variant, _ in self.variants(uids[0], policy)],
+            "items": chosen,
+            "unfit_items": unfit,
+            # A negative saving means the label defaults are below this component's readability policy
+            "baseline_meets_policy": baseline_ok == len(uids),
+            "lot": {
+                "items": len(uids),
+                "burn_seconds": round(best_total, 1),
+                "baseline_burn_seconds": round(baseline_total, 1),
+                "saved_seconds": round(saved, 1),
+                "saved_percent": round(saved / baseline_total * 100, 1) if baseline_total else 0.0
+            }
+        }
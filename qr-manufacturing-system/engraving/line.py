@@ -0,0 +1,1071 @@
+"""
+Multi-station engraving line.
+
+Each laser is a Station with its own worker thread. A dispatcher thread claims
+items from the job store for idle stations, so a lot is engraved by every
+enabled station in parallel. Job-level state (running / paused / stopped /
+completed, counts, timing) lives on the line and is exposed through status().
+
+Several jobs can be queued at once. Runnable jobs sit in a heap ordered by
+(priority desc, start order), so each dispatch decision is O(log n) however
+many jobs and items are waiting. Starting a higher-priority job preempts
+lower ones at the next item boundary: items already burning finish, items a
+station had only prefetched go back to their job, and the preempted job
+carries on once the higher-priority work is done.
+
+Threads never poll: every state change (job control, station registry, an
+item handed over or finished) happens under self.lock and notifies
+self.changed, which the dispatcher and station workers wait on. Job store
+calls (MySQL round trips with a durable store) are never made while holding
+self.lock, so status() and the other readers only wait on in-memory work.
+
+With a prepare_fn, each station holds a short lookahead queue: the next
+`prefetch` items are claimed early and their QR geometry is rendered on a
+small thread pool while the current item burns, so the laser never waits
+on preparation.
+
+A failed burn does not hold up the job: the item moves to a side retry heap
+with exponential backoff and is handed to the next idle station once due,
+interleaved with fresh work. After retry_attempts failures it is
+dead-lettered (see dead_letters()); failures are counted per reason.
+
+With a verify_fn, each successful burn is handed to a verification pool that
+captures and grades the mark (verification.py) while the station already
+burns its next item. Marks that fail go straight back to the retry heap for
+re-engraving; the read grade reaches on_result with the final outcome.
+
+Progress is pushed to viewers through self.events (events.py): item_started,
+item_finished, item_verified, item_retry, dead_letter, progress, state and station events. Per-phase timings go to
+self.metrics (metrics.py) and are reported by metrics().
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import datetime
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+import traceback
+
+from .events import EventBroadcaster
+from .job_store import MemoryJobStore
+from .metrics import PHASES, LineMetrics
+
+logger = logging.getLogger(__name__)
+
+def parse_station_names(value, default_count=1):
+    """Parse ENGRAVING_STATIONS: either a count ("3") or names ("laser-a,laser-b")."""
+    value = (value or "").strip()
+    if not value:
+        return [f"station-{n}" for n in range(1, default_count + 1)]
+    if value.isdigit():
+        return [f"station-{n}" for n in range(1, max(int(value), 1) + 1)]
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+class Station:
+    """One laser station and its counters."""
+
+    def __init__(self, station_id):
+        self.id = station_id
+        self.enabled = True
+        self.status = "idle"  # idle, busy, disabled
+        self.current_item = None
+        # (job_id, item, prepared future or None, monotonic hand-over time) from the dispatcher
+        self.queue = deque()
+        self.processed_count = 0
+        self.failed_count = 0
+        self.busy_seconds = 0.0
+        self.prep_wait_seconds = 0.0  # time the laser waited for geometry that was not ready
+        self.last_finished_at = None
+        self.thread = None
+        self.removed = False
+
+    def snapshot(self, elapsed_seconds):
+        utilization = (self.busy_seconds / elapsed_seconds) if elapsed_seconds > 0 else 0.0
+        return {
+            "id": self.id,
+            "enabled": self.enabled,
+            "status": self.status if self.enabled else "disabled",
+            "current_item": self.current_item,
+            "lookahead": [entry[1].get("uid") for entry in self.queue],
+            "processed_count": self.processed_count,
+            "failed_count": self.failed_count,
+            "busy_seconds": round(self.busy_seconds, 1),
+            "prep_wait_seconds": round(self.prep_wait_seconds, 3),
+            "utilization": round(min(utilization, 1.0), 3),
+            "items_per_hour": round(self.processed_count / elapsed_seconds * 3600, 1) if elapsed_seconds > 0 else 0.0,
+            "last_finished_at": self.last_finished_at.isoformat() if self.last_finished_at else None
+        }
+
+class Job:
+    """One engraving job and its counters."""
+
+    ACTIVE = ("running", "paused")
+
+    def __init__(self, job_id, total_count, priority=0, simulate=True, delay_seconds=1.0, seq=0,
+                 status="running", start_time=None):
+        self.id = job_id
+        self.priority = priority
+        self.seq = seq  # start order; ties between equal priorities go FIFO
+        self.status = status  # running, paused, stopped, completed
+        self.total_count = total_count
+        self.processed_count = 0
+        self.failed_count = 0
+        self.uncertain_count = 0
+        self.in_flight = 0  # items held by stations (lookahead or burning)
+        self.retry_pending = 0  # failed items waiting in the retry heap
+        self.exhausted = False  # the store had nothing left to claim
+        self.in_heap = False
+        self.simulate = simulate
+        self.delay_seconds = delay_seconds
+        self.start_time = start_time or datetime.utcnow()
+        self.end_time = None
+
+    def runnable(self):
+        return self.status == "running" and not self.exhausted
+
+    def heap_key(self):
+        return (-self.priority, self.seq, self.id)
+
+    def snapshot(self):
+        end_time = self.end_time or datetime.utcnow()
+        total = self.total_count
+        processed = self.processed_count
+        return {
+            "job_id": self.id,
+            "priority": self.priority,
+            "status": self.status,
+            "processed_count": processed,
+            "failed_count": self.failed_count,
+            "total_count": total,
+            "queued_count": max(total - processed - self.in_flight - self.retry_pending - self.uncertain_count, 0)
+                            if self.status in self.ACTIVE else 0,
+            "retrying_count": self.retry_pending,
+            "uncertain_count": self.uncertain_count,
+            "progress_percent": round(processed / total * 100, 1) if total > 0 else 0,
+            "elapsed_seconds": round((end_time - self.start_time).total_seconds(), 1),
+            "simulate": self.simulate,
+            "delay_seconds": self.delay_seconds
+        }
+
+class EngravingLine:
+    """Station registry, job queue and dispatcher.
+
+    engrave_fn(uid, simulate, delay_seconds) -> bool performs one engraving;
+    with prepare_fn(uid) it is called as engrave_fn(uid, simulate, delay_seconds,
+    prepared=...) with prepare_fn's result (None if preparation failed). Returning
+    False counts as a "device_fault"; an exception's reason attribute or class name
+    is recorded as the failure reason.
+    on_result(uid, success, station_id, reason, verification) is called once per item
+    with its final outcome (optional); verification is verify_fn's result or None.
+    verify_fn(uid, geometry) -> {"passed", "grade", "reason", ...} checks each burned
+    mark on a pool of verify_workers threads (optional, see verification.py).
+    store is a job store from job_store.py (MemoryJobStore by default).
+    retry_attempts is the number of burns an item gets before it is dead-lettered;
+    retry n waits retry_backoff_seconds * 2**(n-1), capped at retry_backoff_max_seconds.
+    """
+
+    SWEEP_INTERVAL = 30.0
+    FINISHED_JOBS_KEPT = 50
+    DEAD_LETTERS_KEPT = 500
+
+    def __init__(self, engrave_fn, on_result=None, station_names=None, store=None,
+                 prepare_fn=None, prefetch=2, prepare_workers=2, retry_attempts=3,
+                 retry_backoff_seconds=5.0, retry_backoff_max_seconds=300.0, verify_fn=None, verify_workers=2):
+        self.engrave_fn = engrave_fn
+        self.on_result = on_result
+        self.store = store or MemoryJobStore()
+        self.prepare_fn = prepare_fn
+        # Items a station may hold: the one it burns next plus the prefetched lookahead
+        self.station_capacity = 1 + (max(int(prefetch), 0) if prepare_fn else 0)
+        self.prepare_pool = (ThreadPoolExecutor(max_workers=prepare_workers, thread_name_prefix="engrave-prep")
+                             if prepare_fn else None)
+        self.verify_fn = verify_fn
+        self.verify_pool = (ThreadPoolExecutor(max_workers=verify_workers, thread_name_prefix="engrave-verify")
+                            if verify_fn else None)
+        self.verification_counts = Counter()
+        self.read_grades = Counter()
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+        self.recover_lock = threading.Lock()
+        self.store_lock = threading.Lock()  # orders job status writes to the store
+        self.stop_event = threading.Event()
+        self.stations = OrderedDict()
+        self.dispatcher_thread = None
+        self.running = False
+        self.recovered = False
+        self.jobs = OrderedDict()  # job_id -> Job, in start order
+        self.ready = []  # heap of Job.heap_key() for runnable jobs (stale entries skipped lazily)
+        self.job_seq = itertools.count()
+        self.line_started_at = None
+        self.last_sweep = 0.0
+        self.lease_thread = None
+        self.burning = {}  # (job_id, uid) -> item on the laser whose lease is kept alive (durable store)
+        self.retry_attempts = max(int(retry_attempts), 1)
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.retry_backoff_max_seconds = retry_backoff_max_seconds
+        self.retries = []  # heap of (due monotonic, seq, job_id, item)
+        self.retry_seq = itertools.count()
+        self.parked_retries = {}  # job_id -> retry entries of paused jobs
+        self.dead = deque(maxlen=self.DEAD_LETTERS_KEPT)
+        self.failure_reasons = Counter()  # every failed burn, by reason
+        self.dead_letter_reasons = Counter()
+        self.events = EventBroadcaster()
+        self.metrics = LineMetrics()
+        for name in station_names or ["station-1"]:
+            self.add_station(name)
+
+    # ---------------- lifecycle ----------------
+    def start(self):
+        """Start the dispatcher and station workers (idempotent).
+
+        With a durable store, unfinished jobs are recovered first; the ones
+        that were running when the process stopped resume automatically.
+        """
+        self.recover()
+        with self.lock:
+            if self.running:
+                return
+            self.stop_event.clear()
+            self.running = True
+            self.dispatcher_thread = threading.Thread(target=self._dispatch_loop, name="engrave-dispatcher", daemon=True)
+            self.dispatcher_thread.start()
+            if self.store.durable:
+                self.lease_thread = threading.Thread(target=self._lease_loop, name="engrave-leases", daemon=True)
+                self.lease_thread.start()
+            for station in self.stations.values():
+                self._start_station(station)
+        logger.info(f"🔧 Engraving line started with {len(self.stations)} station(s)")
+
+    def shutdown(self, timeout=5):
+        with self.lock:
+            self.stop_event.set()
+            self.changed.notify_all()
+        threads = [self.dispatcher_thread, self.lease_thread] + [s.thread for s in self.stations.values()]
+        for thread in threads:
+            if thread and thread.is_alive():
+                thread.join(timeout=timeout)
+        if self.prepare_pool:
+            self.prepare_pool.shutdown(wait=False)
+        if self.verify_pool:
+            self.verify_pool.shutdown(wait=False)
+        self.running = False
+        logger.info("🔧 Engraving line stopped")
+
+    def recover(self):
+        if self.recovered:
+            return
+        with self.recover_lock:
+            if self.recovered:
+                return
+            if not self.store.durable:
+                self.recovered = True
+                return
+            try:
+                recovered = self.store.recover()
+            except Exception as e:
+                logger.error(f"Engraving job recovery failed: {e}")
+                return
+            with self.lock:
+                self._add_recovered(recovered)
+                self.recovered = True
+
+    def _add_recovered(self, recovered):
+        """Register jobs returned by store.recover() (lock held)."""
+        for data in recovered:
+            job = Job(data["job_id"], data["total_count"], priority=data.get("priority", 0),
+                      simulate=data["simulate"], delay_seconds=data["delay_seconds"],
+                      seq=next(self.job_seq), status=data["status"], start_time=data["start_time"])
+            job.processed_count = data["processed_count"]
+            job.failed_count = data["failed_count"]
+            job.uncertain_count = data["uncertain_count"]
+            self._add_job(job)
+            self._publish_state(job)
+            logger.info(f"♻️ Recovered engraving job {job.id} ({job.status}, priority {job.priority}): "
+                        f"{job.processed_count}/{job.total_count} done, {job.uncertain_count} need review")
+
+    def _start_station(self, station):
+        station.thread = threading.Thread(target=self._station_loop, args=(station,),
+                                          name=f"engrave-{station.id}", daemon=True)
+        station.thread.start()
+
+    # ---------------- station registry ----------------
+    def add_station(self, station_id):
+        with self.lock:
+            if station_id in self.stations:
+                raise ValueError(f"Station '{station_id}' already exists")
+            station = Station(station_id)
+            self.stations[station_id] = station
+            if self.running:
+                self._start_station(station)
+            self.changed.notify_all()
+            self.events.publish("station", {"station_id": station_id, "action": "added"})
+            return station
+
+    def remove_station(self, station_id):
+        with self.lock:
+            station = self.stations.get(station_id)
+            if station is None:
+                raise KeyError(station_id)
+            if station.status == "busy" or station.queue:
+                raise ValueError(f"Station '{station_id}' is busy")
+            station.removed = True
+            del self.stations[station_id]
+            self.changed.notify_all()
+            self.events.publish("station", {"station_id": station_id, "action": "removed"})
+
+    def set_station_enabled(self, station_id, enabled):
+        with self.lock:
+            station = self.stations.get(station_id)
+            if station is None:
+                raise KeyError(station_id)
+            station.enabled = enabled
+            released = [] if enabled else self._release_queue(station)
+            self.changed.notify_all()
+            self.events.publish("station", {"station_id": station_id, "action": "enabled" if enabled else "disabled"})
+        self._release_to_store(released)
+        return station
+
+    def _release_queue(self, station, should_release=None):
+        """Take a station's not-yet-started items off its lookahead; returns them for the store.
+
+        should_release(job) selects which jobs' items go back (all by default).
+        Called with self.lock held; the caller passes the result to
+        _release_to_store() once the lock is released.
+        """
+        kept = deque()
+        released = []
+        # Newest first, so a store that re-queues at the front keeps the original order
+        while station.queue:
+            entry = station.queue.pop()
+            job_id, item, prepared, _ = entry
+            job = self.jobs.get(job_id)
+            if should_release and job and not should_release(job):
+                kept.appendleft(entry)
+                continue
+            if prepared:
+                prepared.cancel()
+            if job:
+                job.in_flight -= 1
+                job.exhausted = False
+                self._push_ready(job)
+            released.append(item)
+        station.queue = kept
+        return released
+
+    def _release_to_store(self, items):
+        """Return released items to the store, newest first (lock not held)."""
+        for item in items:
+            try:
+                self.store.release(item)
+            except Exception as e:
+                logger.error(f"Failed to release {item.get('uid')}: {e}")
+
+    def _sync_job_status(self, job):
+        """Write a job's status to the store (lock not held).
+
+        The status is read when the write happens and writes are ordered by
+        store_lock, so racing transitions (pause vs completion) leave the
+        latest status in the store.
+        """
+        with self.store_lock:
+            with self.lock:
+                status = job.status
+            try:
+                self.store.set_job_status(job.id, status)
+            except Exception as e:
+                logger.error(f"Failed to record job {job.id} as {status}: {e}")
+
+    # ---------------- job registry ----------------
+    def _add_job(self, job):
+        self.jobs[job.id] = job
+        if self.line_started_at is None:
+            self.line_started_at = job.start_time
+        self._push_ready(job)
+        self._prune_jobs()
+
+    def _prune_jobs(self):
+        """Keep a bounded history of finished jobs."""
+        finished = [j.id for j in self.jobs.values() if j.status not in Job.ACTIVE]
+        for job_id in finished[:max(len(finished) - self.FINISHED_JOBS_KEPT, 0)]:
+            del self.jobs[job_id]
+
+    def _push_ready(self, job):
+        if job.runnable() and not job.in_heap:
+            heapq.heappush(self.ready, job.heap_key())
+            job.in_heap = True
+
+    def _top_job(self):
+        """Highest-priority runnable job, dropping stale heap entries (amortized O(log n))."""
+        while self.ready:
+            job_id = self.ready[0][2]
+            job = self.jobs.get(job_id)
+            if job is not None and job.runnable():
+                return job
+            heapq.heappop(self.ready)
+            if job is not None:
+                job.in_heap = False
+        return None
+
+    def _target_jobs(self, job_id, statuses):
+        if job_id is None:
+            return [j for j in self.jobs.values() if j.status in statuses]
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        return [job] if job.status in statuses else []
+
+    def current_job(self):
+        """The job the line is working on: top runnable, else any active, else the latest."""
+        with self.lock:
+            job = self._top_job()
+            if job is None:
+                active = [j for j in self.jobs.values() if j.status in Job.ACTIVE]
+                job = min(active, key=Job.heap_key) if active else None
+            if job is None and self.jobs:
+                job = next(reversed(self.jobs.values()))
+            return job
+
+    @property
+    def job_id(self):
+        job = self.current_job()
+        return job.id if job else None
+
+    def overall_status(self):
+        """running if any job runs, else paused if any is paused, else the latest job's status (or idle)."""
+        with self.lock:
+            statuses = {j.status for j in self.jobs.values()}
+            for status in ("running", "paused"):
+                if status in statuses:
+                    return status
+            return next(reversed(self.jobs.values())).status if self.jobs else "idle"
+
+    # ---------------- job control ----------------
+    def start_job(self, items, simulate=True, delay_seconds=1.0, priority=0):
+        """Queue a new job (alongside any running ones); returns (job_id, error message or None).
+
+        A job with higher priority than work already handed to stations preempts it
+        at the next item boundary.
+        """
+        self.recover()
+        priority = int(priority or 0)
+        with self.lock:
+            if not any(s.enabled for s in self.stations.values()):
+                return None, "No enabled engraving stations"
+        # One row per item with a durable store: inserted before the job is visible to the line
+        job_id = self.store.create_job(items, simulate=simulate, delay_seconds=delay_seconds, priority=priority)
+        with self.lock:
+            job = Job(job_id, len(items), priority=priority, simulate=simulate,
+                      delay_seconds=delay_seconds, seq=next(self.job_seq))
+            self._add_job(job)
+            preempted = set()
+            released = []
+            for station in self.stations.values():
+                def lower(other):
+                    if other.priority < priority:
+                        preempted.add(other.id)
+                        return True
+                    return False
+                released += self._release_queue(station, lower)
+            self.changed.notify_all()
+            self._publish_state(job)
+            for other_id in preempted:
+                self.events.publish("preempted", {"job_id": other_id, "by_job_id": job_id})
+        self._release_to_store(released)
+        self.start()
+        if preempted:
+            logger.info(f"⏫ Job {job_id} (priority {priority}) preempts job(s) {sorted(preempted)}")
+        logger.info(f"🔥 Started engraving job {job_id} with {len(items)} items on {len(self.stations)} "
+                    f"station(s) (priority={priority}, simulate={simulate})")
+        return job_id, None
+
+    def stop(self, job_id=None):
+        """Stop one job, or every active job when job_id is None."""
+        with self.lock:
+            jobs = self._target_jobs(job_id, Job.ACTIVE)
+            ids = {j.id for j in jobs}
+            released = []
+            for station in self.stations.values():
+                released += self._release_queue(station, lambda j: j.id in ids)
+            for job in jobs:
+                job.status = "stopped"
+                job.end_time = datetime.utcnow()
+                self.parked_retries.pop(job.id, None)
+                self._publish_state(job)
+            self.changed.notify_all()
+        # Released items go back to the queue first, so cancel() catches them too
+        self._release_to_store(released)
+        with self.store_lock:
+            for job in jobs:
+                try:
+                    self.store.cancel(job.id)
+                except Exception as e:
+                    logger.error(f"Failed to cancel job {job.id} in the store: {e}")
+        logger.info(f"🛑 Engraving stopped ({len(jobs)} job(s))")
+        return bool(jobs)
+
+    def pause(self, job_id=None):
+        """Pause one job, or every running job when job_id is None. Burning items finish."""
+        with self.lock:
+            jobs = self._target_jobs(job_id, ("running",))
+            if not jobs:
+                return False
+            ids = {j.id for j in jobs}
+            for job in jobs:
+                job.status = "paused"
+            released = []
+            for station in self.stations.values():
+                released += self._release_queue(station, lambda j: j.id in ids)
+            for job in jobs:
+                self._publish_state(job)
+            self.changed.notify_all()
+        self._release_to_store(released)
+        for job in jobs:
+            self._sync_job_status(job)
+        logger.info(f"⏸️ Engraving paused ({len(jobs)} job(s))")
+        return True
+
+    def resume(self, job_id=None):
+        """Resume one job, or every paused job when job_id is None."""
+        with self.lock:
+            jobs = self._target_jobs(job_id, ("paused",))
+            if not jobs:
+                return False
+            for job in jobs:
+                job.status = "running"
+                job.exhausted = False
+                self._push_ready(job)
+                for entry in self.parked_retries.pop(job.id, []):
+                    heapq.heappush(self.retries, entry)
+                self._publish_state(job)
+            self.changed.notify_all()
+        for job in jobs:
+            self._sync_job_status(job)
+        logger.info(f"▶️ Engraving resumed ({len(jobs)} job(s))")
+        return True
+
+    def resolve_item(self, job_id, uid, engraved):
+        """Operator decision for an item interrupted mid-burn (durable store only)."""
+        resolved = self.store.resolve_item(job_id, uid, engraved)
+        reopened = None
+        if resolved:
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job:
+                    job.uncertain_count = max(job.uncertain_count - 1, 0)
+                    if engraved:
+                        job.processed_count += 1
+                    else:
+                        job.exhausted = False
+                        if job.status == "completed":
+                            # Put the job back on the line to re-engrave the item
+                            job.status = "running"
+                            job.end_time = None
+                            reopened = job
+                            self._publish_state(job)
+                        self._push_ready(job)
+                        self.changed.notify_all()
+        if reopened:
+            self._sync_job_status(reopened)
+        return bool(resolved)
+
+    def _complete_if_done(self, job):
+        """Mark a job completed once the store is drained and nothing is in flight (lock held).
+
+        Returns True when it completed; the caller then records it with
+        _sync_job_status() after releasing the lock.
+        """
+        if job.status == "running" and job.exhausted and job.in_flight == 0 and job.retry_pending == 0:
+            job.status = "completed"
+            job.end_time = datetime.utcnow()
+            self._publish_state(job)
+            logger.info(f"✅ Engraving job {job.id} completed")
+            self._prune_jobs()
+            return True
+        return False
+
+    # ---------------- workers ----------------
+    def _station_load(self, station):
+        return len(station.queue) + (1 if station.status == "busy" else 0)
+
+    def _idle_stations(self):
+        """Enabled stations with room in their lookahead, emptiest first."""
+        stations = [s for s in self.stations.values()
+                    if s.enabled and self._station_load(s) < self.station_capacity]
+        return sorted(stations, key=self._station_load)
+
+    def _prepare(self, station_id, item):
+        """Start rendering an item's geometry in the background (None without prepare_fn)."""
+        if not self.prepare_pool or not item.get("uid"):
+            return None
+        return self.prepare_pool.submit(self._timed_prepare, station_id, item["uid"])
+
+    def _timed_prepare(self, station_id, uid):
+        started = time.monotonic()
+        try:
+            return self.prepare_fn(uid)
+        finally:
+            self.metrics.record(station_id, "prepare", time.monotonic() - started)
+
+    def _dispatch_needed(self):
+        """Dispatcher wake-up predicate (called with self.lock held)."""
+        if self.stop_event.is_set():
+            return True
+        return (self._top_job() is not None or self._due_retry() is not None) and bool(self._idle_stations())
+
+    def _due_retry(self):
+        """First due retry whose job may run now (lock held).
+
+        Entries of stopped jobs are dropped and those of paused jobs parked until
+        resume. A retry waits while a higher-priority job has work, like fresh items.
+        """
+        now = time.monotonic()
+        while self.retries and self.retries[0][0] <= now:
+            entry = self.retries[0]
+            job = self.jobs.get(entry[2])
+            if job is None or job.status not in Job.ACTIVE:
+                heapq.heappop(self.retries)
+                if job is not None:
+                    job.retry_pending -= 1
+                continue
+            if job.status == "paused":
+                self.parked_retries.setdefault(job.id, []).append(heapq.heappop(self.retries))
+                continue
+            top = self._top_job()
+            if top is not None and top.priority > job.priority:
+                return None
+            return entry
+        return None
+
+    def _wait_timeout(self, idle_timeout):
+        """How long the dispatcher may sleep: until the next retry is due, at most idle_timeout."""
+        if self.retries:
+            delay = self.retries[0][0] - time.monotonic()
+            if delay > 0:
+                return min(delay, idle_timeout) if idle_timeout else delay
+        return idle_timeout
+
+    def _backoff(self, failures):
+        delay = min(self.retry_backoff_seconds * 2 ** (failures - 1), self.retry_backoff_max_seconds)
+        return delay * random.uniform(0.9, 1.1)
+
+    def _sweep(self):
+        """Flag expired burns as uncertain and adopt jobs whose owner went away (durable store)."""
+        self.last_sweep = time.monotonic()
+        flagged = self.store.sweep()
+        adopted = self.store.recover() if self.recovered else []
+        with self.lock:
+            for job_id, count in flagged.items():
+                if job_id in self.jobs:
+                    self.jobs[job_id].uncertain_count += count
+            self._add_recovered([data for data in adopted if data["job_id"] not in self.jobs])
+            if adopted:
+                self.changed.notify_all()
+
+    def _lease_loop(self):
+        """Renew this line's job leases and the leases of items on the laser.
+
+        A burn longer than the lease is then not swept as uncertain, and other
+        processes do not adopt this line's jobs.
+        """
+        interval = max(self.store.lease_seconds / 3.0, 1.0)
+        while not self.stop_event.wait(interval):
+            try:
+                # Job leases tell other processes on the same tables that this line is alive
+                self.store.renew_jobs()
+            except Exception as e:
+                logger.error(f"Failed to renew engraving job leases: {e}")
+            with self.lock:
+                items = list(self.burning.values())
+            for item in items:
+                try:
+                    if not self.store.renew(item):
+                        logger.warning(f"⚠️ Lease on {item.get('uid')} could not be renewed (no longer burning here)")
+                except Exception as e:
+                    logger.error(f"Failed to renew the lease on {item.get('uid')}: {e}")
+
+    def _dispatch_loop(self):
+        """Claim items for idle, enabled stations from the highest-priority runnable job."""
+        # A durable store can gain claimable work without a local notify (another
+        # process' lease expiring), so it is re-checked on the sweep interval.
+        idle_timeout = self.SWEEP_INTERVAL if self.store.durable else None
+        while not self.stop_event.is_set():
+            try:
+                with self.lock:
+                    if not self._dispatch_needed():
+                        timeout = self._wait_timeout(idle_timeout)
+                        if not self.changed.wait(timeout) and idle_timeout and timeout == idle_timeout:
+                            for job in self.jobs.values():
+                                if job.status == "running" and job.exhausted:
+                                    job.exhausted = False
+                                    self._push_ready(job)
+                        if not self._dispatch_needed():
+                            continue
+                    if self.stop_event.is_set():
+                        break
+                    idle = self._idle_stations()
+
+                if self.store.durable and time.monotonic() - self.last_sweep > self.SWEEP_INTERVAL:
+                    self._sweep()
+
+                # Store calls (DB round trips) happen outside the line lock
+                claimed = []
+                for station in idle:
+                    # Due retries are interleaved ahead of fresh items
+                    with self.lock:
+                        retry = self._due_retry()
+                        if retry:
+                            heapq.heappop(self.retries)
+                            job = self.jobs[retry[2]]
+                            job.retry_pending -= 1
+                    if retry:
+                        if self.store.reclaim(retry[3], station.id):
+                            claimed.append((station, job, retry[3]))
+                        else:
+                            with self.lock:
+                                completed = self._complete_if_done(job)
+                            if completed:
+                                self._sync_job_status(job)
+                        continue
+                    while True:
+                        with self.lock:
+                            job = self._top_job()
+                        if job is None:
+                            break
+                        item = self.store.claim(job.id, station.id)
+                        if item is not None:
+                            claimed.append((station, job, item))
+                            break
+                        with self.lock:
+                            job.exhausted = True
+                            completed = self._complete_if_done(job)
+                        if completed:
+                            self._sync_job_status(job)
+
+                released = []
+                with self.lock:
+                    for station, job, item in claimed:
+                        if (job.status == "running" and station.enabled and not station.removed
+                                and self._station_load(station) < self.station_capacity):
+                            station.queue.append((job.id, item, self._prepare(station.id, item), time.monotonic()))
+                            job.in_flight += 1
+                        else:
+                            released.append(item)
+                            job.exhausted = False
+                            self._push_ready(job)
+                    if claimed:
+                        self.changed.notify_all()
+                self._release_to_store(released)
+            except Exception as e:
+                logger.error(f"Dispatcher error: {e}")
+                logger.error(traceback.format_exc())
+                self.stop_event.wait(1.0)
+
+    def _station_loop(self, station):
+        logger.info(f"🔧 Station {station.id} worker started")
+        def has_work():
+            return self.stop_event.is_set() or station.removed or bool(station.queue)
+
+        while not self.stop_event.is_set() and not station.removed:
+            try:
+                with self.lock:
+                    self.changed.wait_for(has_work)
+                    work = station.queue.popleft() if station.queue else None
+                    if work:
+                        job = self.jobs[work[0]]
+                        station.status = "busy"
+                        station.current_item = work[1].get("uid")
+                        simulate = job.simulate
+                        delay_seconds = job.delay_seconds
+                if not work:
+                    continue
+
+                job_id, item, prepared, handed_over = work
+                uid = item.get("uid")
+                started = time.monotonic()
+                success = False
+                reason = "missing_uid"
+                if uid and not self.store.start_item(item):
+                    # Lease lost to another worker; it owns the item now
+                    logger.warning(f"⚠️ [{station.id}] Claim on {uid} was lost, skipping")
+                    with self.lock:
+                        station.status = "idle"
+                        station.current_item = None
+                        job.in_flight -= 1
+                        completed = self._complete_if_done(job)
+                        self.changed.notify_all()
+                    if completed:
+                        self._sync_job_status(job)
+                    continue
+                if uid:
+                    with self.lock:
+                        self.burning[(job_id, uid)] = item
+                    logger.info(f"🔥 [{station.id}] Starting engraving for {uid}")
+                    self.events.publish("item_started", {"uid": uid, "station_id": station.id, "job_id": job_id})
+                    kwargs = {"prepared": self._await_prepared(station, uid, prepared)} if self.prepare_fn else {}
+                    burn_started = time.monotonic()
+                    self.metrics.record(station.id, "queue_wait", burn_started - handed_over)
+                    try:
+                        success = self.engrave_fn(uid, simulate, delay_seconds, **kwargs)
+                        reason = None if success else "device_fault"
+                    except Exception as e:
+                        logger.error(f"❌ [{station.id}] Engraving {uid} raised: {e}")
+                        reason = getattr(e, "reason", None) or type(e).__name__
+                    burn_finished = time.monotonic()
+                    self.metrics.record(station.id, "burn", burn_finished - burn_started)
+                    if success and self.verify_pool:
+                        # Off the critical path: the station moves on while the camera checks the mark
+                        with self.lock:
+                            self.verification_counts["submitted"] += 1
+                        self.verify_pool.submit(self._verify, station.id, job, item, kwargs.get("prepared"))
+                    else:
+                        self._settle(station.id, job, item, success, reason)
+                    self.metrics.record(station.id, "write_back", time.monotonic() - burn_finished)
+                else:
+                    self._settle(station.id, job, item, success, reason)
+
+                with self.lock:
+                    station.busy_seconds += time.monotonic() - started
+                    station.status = "idle"
+                    station.current_item = None
+                    station.last_finished_at = datetime.utcnow()
+                    station.processed_count += 1
+                    if not success:
+                        station.failed_count += 1
+                    logger.info(f"✅ [{station.id}] Finished {uid} (job {job_id}: {job.processed_count}/{job.total_count})")
+                    self.changed.notify_all()
+                    if uid:
+                        self.events.publish("item_finished", {
+                            "uid": uid, "station_id": station.id, "job_id": job_id, "success": success,
+                            "duration_seconds": round(time.monotonic() - started, 3)
+                        })
+                        self.events.publish("progress", self._progress(job))
+            except Exception as e:
+                logger.error(f"Station {station.id} worker error: {e}")
+                logger.error(traceback.format_exc())
+                with self.lock:
+                    station.status = "idle"
+                    station.current_item = None
+                    self.changed.notify_all()
+                self.stop_event.wait(1.0)
+        logger.info(f"🔧 Station {station.id} worker stopped")
+
+    def _settle(self, station_id, job, item, success, reason, verification=None, retry_delay=None):
+        """Record an item's outcome: schedule a retry, or write the final result (dead-lettering failures)."""
+        uid = item.get("uid")
+        retry_in = None
+        previous = None
+        if uid:
+            with self.lock:
+                self.burning.pop((job.id, uid), None)
+            failures = item.get("failures", 0) + (0 if success else 1)
+            if not success and failures < self.retry_attempts and job.status != "stopped":
+                item["failures"] = failures
+                retry_in = self._backoff(failures) if retry_delay is None else retry_delay
+                previous = self.store.retry_item(item, reason)
+            else:
+                previous = self.store.finish_item(item, success, reason)
+                if self.on_result:
+                    self.on_result(uid, success, station_id, reason, verification)
+
+        with self.lock:
+            job.in_flight -= 1
+            if previous == "uncertain":
+                # Swept while the lease lapsed (e.g. the DB was unreachable); the burn settled it after all
+                job.uncertain_count = max(job.uncertain_count - 1, 0)
+            if not success:
+                self.failure_reasons[reason] += 1
+            if retry_in is not None:
+                job.retry_pending += 1
+                heapq.heappush(self.retries, (time.monotonic() + retry_in, next(self.retry_seq), job.id, item))
+                logger.warning(f"🔁 [{station_id}] {uid} failed ({reason}), retry {item['failures']} in {retry_in:.1f}s")
+                self.events.publish("item_retry", {
+                    "uid": uid, "station_id": station_id, "job_id": job.id, "reason": reason,
+                    "failures": item["failures"], "retry_in_seconds": round(retry_in, 1)
+                })
+            else:
+                job.processed_count += 1
+                if not success:
+                    job.failed_count += 1
+                    self._dead_letter(job.id, item, station_id, reason)
+            completed = self._complete_if_done(job)
+            self.changed.notify_all()
+        if completed:
+            self._sync_job_status(job)
+
+    def _verify(self, station_id, job, item, geometry):
+        """Verification worker: grade the mark, then settle the item (unreadable marks are re-engraved)."""
+        uid = item["uid"]
+        try:
+            started = time.monotonic()
+            try:
+                verification = self.verify_fn(uid, geometry)
+            except Exception as e:
+                # A camera fault must not scrap the part: it counts as engraved, unverified
+                logger.error(f"❌ [{station_id}] Verifying {uid} failed: {e}")
+                verification = {"passed": True, "verified": False, "error": str(e)}
+            self.metrics.record(station_id, "verify", time.monotonic() - started)
+            passed = verification.get("passed", False)
+            reason = None if passed else verification.get("reason") or "unreadable"
+            with self.lock:
+                self.verification_counts["passed" if passed else "failed"] += 1
+                if verification.get("grade"):
+                    self.read_grades[verification["grade"]] += 1
+                else:
+                    self.verification_counts["errors"] += 1
+            if not passed:
+                logger.warning(f"🔍 [{station_id}] {uid} failed verification ({reason}, "
+                               f"grade {verification.get('grade')}), re-engraving")
+            # Unreadable marks go straight back to the re-engrave queue (no backoff)
+            self._settle(station_id, job, item, passed, reason, verification, retry_delay=0.0)
+            with self.lock:
+                self.events.publish("item_verified", {"uid": uid, "station_id": station_id, "job_id": job.id,
+                                                      **verification})
+                self.events.publish("progress", self._progress(job))
+        except Exception as e:
+            logger.error(f"Verification worker error for {uid}: {e}")
+            logger.error(traceback.format_exc())
+
+    def _dead_letter(self, job_id, item, station_id, reason):
+        """Record an item that ran out of attempts (lock held)."""
+        record = {
+            "uid": item.get("uid"),
+            "job_id": job_id,
+            "station_id": station_id,
+            "attempts": item.get("failures", 0) + 1,
+            "reason": reason,
+            "failed_at": datetime.utcnow().isoformat()
+        }
+        self.dead.append(record)
+        self.dead_letter_reasons[reason] += 1
+        logger.error(f"☠️ [{station_id}] {record['uid']} dead-lettered after {record['attempts']} attempt(s): {reason}")
+        self.events.publish("dead_letter", record)
+
+    def _await_prepared(self, station, uid, prepared):
+        """Prefetched geometry for uid; time spent waiting for it is counted as prep wait."""
+        if prepared is None:
+            return None
+        started = time.monotonic()
+        try:
+            return prepared.result()
+        except Exception as e:
+            logger.warning(f"⚠️ [{station.id}] Preparing {uid} failed, the driver prepares it inline: {e}")
+            return None
+        finally:
+            waited = time.monotonic() - started
+            with self.lock:
+                station.prep_wait_seconds += waited
+
+    # ---------------- reporting ----------------
+    def _progress(self, job):
+        """Compact progress summary for events (called with self.lock held)."""
+        snapshot = job.snapshot()
+        return {key: snapshot[key] for key in ("job_id", "priority", "status", "processed_count", "failed_count",
+                                               "total_count", "uncertain_count", "progress_percent", "elapsed_seconds")}
+
+    def _publish_state(self, job):
+        self.events.publish("state", self._progress(job))
+
+    def metrics_report(self):
+        """Rolling items/hour, per-phase p50/p95/p99 and utilization, for the line and each station."""
+        window = self.metrics.window_elapsed()
+        with self.lock:
+            station_ids = list(self.stations)
+            enabled = {s.id: s.enabled for s in self.stations.values()}
+
+        def section(key):
+            phases = self.metrics.phases(key)
+            burn = phases.get("burn") or {}
+            burn_seconds = (burn.get("mean") or 0.0) * burn.get("count", 0)
+            return {
+                "items_per_hour": self.metrics.items_per_hour(key),
+                "burn_seconds": round(burn_seconds, 1),
+                "phases": phases
+            }, burn_seconds
+
+        stations = {}
+        total_burn = 0.0
+        for station_id in station_ids:
+            stations[station_id], burn_seconds = section(station_id)
+            stations[station_id]["enabled"] = enabled[station_id]
+            stations[station_id]["utilization"] = round(min(burn_seconds / window, 1.0), 3) if window > 0 else 0.0
+            total_burn += burn_seconds
+        line, _ = section("line")
+        active = len([s for s in enabled.values() if s])
+        line["utilization"] = round(min(total_burn / (window * active), 1.0), 3) if window > 0 and active else 0.0
+        report = {
+            "window_seconds": round(window, 1),
+            "phase_names": list(PHASES),
+            "line": line,
+            "stations": stations
+        }
+        if self.verify_fn:
+            with self.lock:
+                counts = self.verification_counts
+                checked = counts["passed"] + counts["failed"]
+                report["verification"] = {
+                    "passed": counts["passed"],
+                    "failed": counts["failed"],
+                    "errors": counts["errors"],
+                    "pending": counts["submitted"] - checked,
+                    "read_grades": dict(self.read_grades),
+                    "pass_rate": round(counts["passed"] / checked, 3) if checked else None
+                }
+        return report
+
+    def dead_letters(self, limit=100, job_id=None):
+        """Recently dead-lettered items (newest first) plus failure counts by reason."""
+        with self.lock:
+            items = [d for d in reversed(self.dead) if job_id is None or d["job_id"] == job_id]
+            return {
+                "count": len(items),
+                "retry_pending": sum(j.retry_pending for j in self.jobs.values() if j.status in Job.ACTIVE),
+                "retry_policy": {
+                    "attempts": self.retry_attempts,
+                    "backoff_seconds": self.retry_backoff_seconds,
+                    "backoff_max_seconds": self.retry_backoff_max_seconds
+                },
+                "failure_reasons": dict(self.failure_reasons),
+                "dead_letter_reasons": dict(self.dead_letter_reasons),
+                "items": items[:limit]
+            }
+
+    def status(self):
+        """Current job's status (backwards compatible with /engrave/status), all jobs and per-station detail."""
+        with self.lock:
+            job = self.current_job()
+            current = job.snapshot() if job else {
+                "job_id": None, "priority": 0, "status": "idle", "processed_count": 0, "failed_count": 0,
+                "total_count": 0, "queued_count": 0, "uncertain_count": 0, "progress_percent": 0,
+                "elapsed_seconds": 0.0, "simulate": True, "delay_seconds": 1.0
+            }
+            line_elapsed = (datetime.utcnow() - self.line_started_at).total_seconds() if self.line_started_at else 0.0
+            stations = [s.snapshot(line_elapsed) for s in self.stations.values()]
+            current_items = [s["current_item"] for s in stations if s["current_item"]]
+            active = [s for s in stations if s["enabled"]]
+            processed = current["processed_count"]
+            elapsed = current["elapsed_seconds"]
+            jobs = [j.snapshot() for j in sorted(self.jobs.values(), key=lambda j: j.heap_key())
+                    if j.status in Job.ACTIVE]
+
+            return {
+                **current,
+                "status": self.overall_status(),
+                "job_status": current["status"],
+                "current_item": current_items[0] if current_items else None,
+                "current_items": current_items,
+                "durable": self.store.durable,
+                "jobs": jobs,
+                "throughput": {
+                    "items_per_hour": round(processed / elapsed * 3600, 1) if elapsed > 0 else 0.0,
+                    "stations_total": len(stations),
+                    "stations_enabled": len(active),
+                    "stations_busy": len([s for s in active if s["status"] == "busy"]),
+                    "avg_utilization": round(sum(s["utilization"] for s in active) / len(active), 3) if active else 0.0
+                },
+                "stations": stations
+            }
@@ -0,0 +1,126 @@
+"""
+Engraving line instrumentation.
+
+Per item the line records these phases, per station and for the whole line:
+
+  queue_wait   handed to a station -> burn starts (lookahead wait + claim)
+  prepare      rendering QR geometry (prefetch pool)
+  burn         the driver's engrave call
+  write_back   DB work on the station after the burn (job store + result hook)
+  verify       capture, decode and grade of the mark (verification pool, off
+               the station's critical path)
+
+Each phase goes into a RollingHistogram: log-spaced buckets (about 5%
+resolution from 1 ms to 1 h) kept in time slots, so percentiles cover the
+last window_seconds at constant memory and O(buckets) cost per query.
+"""
+
+from bisect import bisect_left
+import math
+import threading
+import time
+
+PHASES = ("queue_wait", "prepare", "burn", "write_back", "verify")
+
+def _bucket_bounds(min_value=0.001, max_value=3600.0, growth=1.05):
+    bounds = []
+    value = min_value
+    while value < max_value:
+        bounds.append(value)
+        value *= growth
+    bounds.append(max_value)
+    return bounds
+
+BUCKET_BOUNDS = _bucket_bounds()
+
+class RollingHistogram:
+    """Bucketed histogram over a sliding time window (window split into slots)."""
+
+    def __init__(self, window_seconds=900.0, slots=15):
+        self.slot_seconds = window_seconds / slots
+        self.slots = slots
+        self.counts = [[0] * (len(BUCKET_BOUNDS) + 1) for _ in range(slots)]
+        self.sums = [0.0] * slots
+        self.maxima = [0.0] * slots
+        self.slot_ids = [None] * slots
+
+    def _slot(self, now):
+        slot_id = int(now // self.slot_seconds)
+        index = slot_id % self.slots
+        if self.slot_ids[index] != slot_id:
+            self.counts[index] = [0] * (len(BUCKET_BOUNDS) + 1)
+            self.sums[index] = 0.0
+            self.maxima[index] = 0.0
+            self.slot_ids[index] = slot_id
+        return index
+
+    def record(self, value, now=None):
+        index = self._slot(time.monotonic() if now is None else now)
+        self.counts[index][bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.sums[index] += value
+        self.maxima[index] = max(self.maxima[index], value)
+
+    def _live_slots(self, now):
+        current = int(now // self.slot_seconds)
+        return [i for i, slot_id in enumerate(self.slot_ids)
+                if slot_id is not None and current - slot_id < self.slots]
+
+    def summary(self, now=None, percentiles=(50, 95, 99)):
+        now = time.monotonic() if now is None else now
+        live = self._live_slots(now)
+        merged = [sum(self.counts[i][b] for i in live) for b in range(len(BUCKET_BOUNDS) + 1)]
+        count = sum(merged)
+        result = {"count": count}
+        if not count:
+            result.update({f"p{p}": None for p in percentiles})
+            result.update({"mean": None, "max": None})
+            return result
+        maximum = max(self.maxima[i] for i in live)
+        for p in percentiles:
+            rank = max(math.ceil(count * p / 100), 1)
+            seen = 0
+            for bucket, bucket_count in enumerate(merged):
+                seen += bucket_count
+                if seen >= rank:
+                    # Report the bucket's upper bound (values are at most 5% lower), capped at the max
+                    result[f"p{p}"] = round(min(BUCKET_BOUNDS[min(bucket, len(BUCKET_BOUNDS) - 1)], maximum), 4)
+                    break
+        result["mean"] = round(sum(self.sums[i] for i in live) / count, 4)
+        result["max"] = round(maximum, 4)
+        return result
+
+class LineMetrics:
+    """Phase histograms per station plus a line-wide aggregate ("line")."""
+
+    def __init__(self, window_seconds=900.0):
+        self.window_seconds = window_seconds
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.started_at = time.monotonic()
+
+    def record(self, station_id, phase, seconds):
+        now = time.monotonic()
+        with self.lock:
+            for key in (station_id, "line"):
+                histogram = self.histograms.get((key, phase))
+                if histogram is None:
+                    histogram = self.histograms[(key, phase)] = RollingHistogram(self.window_seconds)
+                histogram.record(seconds, now)
+
+    def phases(self, key):
+        now = time.monotonic()
+        with self.lock:
+            return {phase: self.histograms[(key, phase)].summary(now)
+                    for phase in PHASES if (key, phase) in self.histograms}
+
+    def window_elapsed(self):
+        return min(time.monotonic() - self.started_at, self.window_seconds)
+
+    def items_per_hour(self, key):
+        """Items burned per hour over the rolling window."""
+        now = time.monotonic()
+        with self.lock:
+            histogram = self.histograms.get((key, "burn"))
+            count = histogram.summary(now)["count"] if histogram else 0
+        elapsed = self.window_elapsed()
+        return round(count / elapsed * 3600, 1) if elapsed > 0 else 0.0
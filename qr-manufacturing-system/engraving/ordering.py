@@ -0,0 +1,162 @@
+"""
+Changeover-minimizing job ordering.
+
+Switching a station between components (ERC, LINER, PAD, SLEEPER) means
+swapping fixtures; switching lots within a component means a smaller
+parameter/material change. plan_order() reorders a job so that:
+
+  1. higher "priority" items always go first (priority tiers are strict),
+  2. within a tier, items are grouped by component and then lot, with the
+     component order chosen to minimize total changeover cost,
+  3. within a group the original (FIFO) order is kept.
+
+The report compares the estimated changeover time of the plan with FIFO,
+with items dealt round-robin to the stations the way the dispatcher hands
+them out.
+"""
+
+from itertools import permutations
+
+def parse_uid(uid):
+    """Split "{component}-{vendor}-{lot}-{serial}" (lot may contain dashes)."""
+    parts = (uid or "").split("-")
+    if len(parts) < 4:
+        return {"component": parts[0] if parts else None, "lot": None}
+    return {"component": parts[0], "lot": "-".join(parts[2:-1])}
+
+class ChangeoverModel:
+    """Cost (seconds) of engraving item b right after item a on the same station.
+
+    component_seconds: fixture swap between components
+    lot_seconds: same component, different lot
+    pairs: overrides per component pair, e.g. {"ERC->PAD": 90}
+    """
+
+    def __init__(self, component_seconds=120.0, lot_seconds=20.0, pairs=None):
+        self.component_seconds = float(component_seconds)
+        self.lot_seconds = float(lot_seconds)
+        self.pairs = {}
+        for key, seconds in (pairs or {}).items():
+            source, _, target = key.partition("->")
+            self.pairs[(source.strip(), target.strip())] = float(seconds)
+
+    @classmethod
+    def from_dict(cls, data):
+        data = data or {}
+        return cls(data.get("component_seconds", 120.0), data.get("lot_seconds", 20.0), data.get("pairs"))
+
+    def component_cost(self, source, target):
+        if source is None or source == target:
+            return 0.0
+        return self.pairs.get((source, target), self.component_seconds)
+
+    def cost(self, previous, item):
+        if previous is None:
+            return 0.0
+        if previous["component"] != item["component"]:
+            return self.component_cost(previous["component"], item["component"])
+        if previous["lot"] != item["lot"]:
+            return self.lot_seconds
+        return 0.0
+
+    def to_dict(self):
+        return {
+            "component_seconds": self.component_seconds,
+            "lot_seconds": self.lot_seconds,
+            "pairs": {f"{a}->{b}": seconds for (a, b), seconds in self.pairs.items()}
+        }
+
+def _normalize(item):
+    parsed = parse_uid(item.get("uid"))
+    return {
+        "component": item.get("component") or parsed["component"],
+        "lot": item.get("lot") or parsed["lot"],
+        "priority": int(item.get("priority") or 0)
+    }
+
+def _component_order(components, model, start_component):
+    """Cheapest order to visit each component once (exact up to 7, greedy beyond)."""
+    def path_cost(order):
+        cost, previous = 0.0, start_component
+        for component in order:
+            cost += model.component_cost(previous, component)
+            previous = component
+        return cost
+
+    if len(components) <= 7:
+        return list(min(permutations(components), key=path_cost))
+    order, previous, remaining = [], start_component, list(components)
+    while remaining:
+        best = min(remaining, key=lambda c: model.component_cost(previous, c))
+        order.append(best)
+        remaining.remove(best)
+        previous = best
+    return order
+
+def estimate_changeovers(keys, model, stations=1):
+    """Changeover count and seconds when keys are dealt round-robin to stations."""
+    stations = max(int(stations), 1)
+    last = [None] * stations
+    count, total, per_station = 0, 0.0, [0.0] * stations
+    for index, key in enumerate(keys):
+        station = index % stations
+        cost = model.cost(last[station], key)
+        if cost > 0:
+            count += 1
+            total += cost
+            per_station[station] += cost
+        last[station] = key
+    return {
+        "changeovers": count,
+        "changeover_seconds": round(total, 1),
+        # Stations swap in parallel; the slowest one bounds the line
+        "line_delay_seconds": round(max(per_station), 1)
+    }
+
+def plan_order(items, model=None, stations=1, start_component=None):
+    """Return (ordered items, report). Items are dicts with uid and optional component/lot/priority."""
+    model = model or ChangeoverModel()
+    keys = [_normalize(item) for item in items]
+
+    tiers = {}
+    for index, key in enumerate(keys):
+        tiers.setdefault(key["priority"], []).append(index)
+
+    ordered = []
+    current = start_component
+    for priority in sorted(tiers, reverse=True):
+        groups = {}
+        for index in tiers[priority]:
+            groups.setdefault(keys[index]["component"], {}).setdefault(keys[index]["lot"], []).append(index)
+        for component in _component_order(list(groups), model, current):
+            lots = groups[component]
+            # Lots in order of first appearance (FIFO between lots of the same component)
+            for lot in sorted(lots, key=lambda l: lots[l][0]):
+                ordered.extend(lots[lot])
+            current = component
+
+    fifo = estimate_changeovers(keys, model, stations)
+    planned = estimate_changeovers([keys[i] for i in ordered], model, stations)
+    saved = fifo["line_delay_seconds"] - planned["line_delay_seconds"]
+    report = {
+        "strategy": "changeover",
+        "stations": max(int(stations), 1),
+        "model": model.to_dict(),
+        "fifo": fifo,
+        "planned": planned,
+        "saved_seconds": round(saved, 1),
+        "saved_percent": round(saved / fifo["line_delay_seconds"] * 100, 1) if fifo["line_delay_seconds"] else 0.0,
+        "groups": len({(keys[i]["priority"], keys[i]["component"], keys[i]["lot"]) for i in ordered})
+    }
+    return [items[i] for i in ordered], report
+
+def order_job_items(items, options=None, stations=1, default_strategy="fifo", default_model=None):
+    """Apply the /engrave/start ordering options: {"ordering": "fifo"|"changeover", "changeover": {...}}."""
+    options = options or {}
+    strategy = (options.get("ordering") or default_strategy or "fifo").lower()
+    if strategy == "fifo":
+        return items, {"strategy": "fifo"}
+    if strategy != "changeover":
+        raise ValueError("ordering must be 'fifo' or 'changeover'")
+    model = ChangeoverModel.from_dict({**(default_model or {}), **(options.get("changeover") or {})})
+    return plan_order(items, model, stations=stations, start_component=options.get("start_component"))
@@ -0,0 +1,212 @@
+"""
+Write-behind buffer for engraving results.
+
+Station workers hand each result to StatusWriteBuffer.add(), which only appends
+to an in-memory list. A background thread group-commits the rows into
+statuses with one multi-row INSERT every max_batch rows or max_delay_ms,
+whichever comes first, so the laser never waits on MySQL between items.
+flush() blocks until everything added so far is committed; callers use it on
+pause, stop and shutdown.
+
+A batch that fails is retried up to max_retries times, then written row by
+row; rows that still fail are dead-lettered (logged with their values and
+counted). pending is capped at max_pending: add() waits up to add_timeout for
+room and then drops the row, counted in stats()["dropped"].
+"""
+
+from datetime import datetime
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STATUS_INSERT_SQL = """
+    INSERT INTO statuses (uid, status, location, note, updated_at)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+class StatusWriteBuffer:
+    """Group-commits statuses rows from a background thread."""
+
+    RETRY_DELAY_SECONDS = 2.0
+
+    def __init__(self, get_conn, max_batch=50, max_delay_ms=200, max_retries=5, max_pending=10000,
+                 add_timeout=1.0):
+        self.get_conn = get_conn
+        self.max_batch = max(int(max_batch), 1)
+        self.max_delay = max(int(max_delay_ms), 0) / 1000.0
+        self.max_retries = max(int(max_retries), 0)
+        self.max_pending = max(int(max_pending), self.max_batch)
+        self.add_timeout = add_timeout
+        self.cond = threading.Condition()
+        self.pending = []
+        self.oldest_at = None  # monotonic time the oldest pending row was added
+        self.added = 0
+        self.committed = 0  # rows settled: written or dead-lettered
+        self.attempts = 0  # failed attempts at the batch at the head of pending
+        self.flush_requested = False
+        self.closing = False
+        self.thread = None
+        self.stats_data = {"batches": 0, "rows_written": 0, "failures": 0, "largest_batch": 0, "last_error": None,
+                           "retries": 0, "dead_lettered": 0, "backpressure_waits": 0, "dropped": 0}
+
+    def add(self, uid, status, location, note, updated_at=None):
+        """Queue a row; returns False if it was dropped because pending stayed full."""
+        with self.cond:
+            if self.closing:
+                raise RuntimeError("Status writer is closed")
+            if len(self.pending) >= self.max_pending:
+                self.stats_data["backpressure_waits"] += 1
+                self.cond.wait_for(lambda: len(self.pending) < self.max_pending or self.closing,
+                                   timeout=self.add_timeout)
+                if len(self.pending) >= self.max_pending or self.closing:
+                    self.stats_data["dropped"] += 1
+                    logger.error(f"❌ Status writer full ({len(self.pending)} pending); dropped "
+                                 f"engraving status {status!r} for {uid}")
+                    return False
+            self.pending.append((uid, status, location, note, updated_at or datetime.now()))
+            self.added += 1
+            if self.oldest_at is None:
+                self.oldest_at = time.monotonic()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="status-writer", daemon=True)
+                self.thread.start()
+            if len(self.pending) >= self.max_batch or len(self.pending) == 1:
+                self.cond.notify_all()
+            return True
+
+    def flush(self, timeout=5.0):
+        """Commit everything added so far; returns False if that did not finish within timeout."""
+        with self.cond:
+            target = self.added
+            if self.committed >= target:
+                return True
+            self.flush_requested = True
+            self.cond.notify_all()
+            return self.cond.wait_for(lambda: self.committed >= target, timeout=timeout)
+
+    def close(self, timeout=5.0):
+        """Flush and stop the writer thread."""
+        flushed = self.flush(timeout)
+        with self.cond:
+            self.closing = True
+            lost = len(self.pending)
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        if not flushed:
+            logger.error(f"❌ Status writer closed with {lost} unwritten engraving result(s)")
+        return flushed
+
+    def _due(self):
+        if not self.pending:
+            return self.closing
+        if self.closing or self.flush_requested or len(self.pending) >= self.max_batch:
+            return True
+        return time.monotonic() - self.oldest_at >= self.max_delay
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self._due():
+                    timeout = None
+                    if self.pending:
+                        timeout = max(self.oldest_at + self.max_delay - time.monotonic(), 0)
+                    self.cond.wait(timeout)
+                if not self.pending:
+                    return
+                batch = self.pending[:self.max_batch]
+                del self.pending[:len(batch)]
+                self.oldest_at = time.monotonic() if self.pending else None
+                self.cond.notify_all()  # room for add() callers waiting on a full buffer
+
+            try:
+                self._write(batch)
+                written = len(batch)
+            except Exception as e:
+                with self.cond:
+                    self.attempts += 1
+                    self.stats_data["failures"] += 1
+                    self.stats_data["last_error"] = str(e)
+                    retry = self.attempts <= self.max_retries and not self.closing
+                    if retry:
+                        # Keep the rows (in order) and retry the same batch
+                        self.pending[:0] = batch
+                        self.oldest_at = time.monotonic()
+                        self.stats_data["retries"] += 1
+                logger.error(f"❌ Failed to write {len(batch)} engraving status row(s): {e}")
+                if retry:
+                    time.sleep(self.RETRY_DELAY_SECONDS)
+                    continue
+                written = len(batch) - self._write_rows(batch)
+
+            with self.cond:
+                self.attempts = 0
+                self.committed += len(batch)
+                if not self.pending:
+                    self.flush_requested = False
+                if written:
+                    self.stats_data["batches"] += 1
+                    self.stats_data["rows_written"] += written
+                    self.stats_data["largest_batch"] = max(self.stats_data["largest_batch"], written)
+                self.cond.notify_all()
+
+    def _write(self, batch):
+        conn = self.get_conn()
+        try:
+            cursor = conn.cursor()
+            # mysql-connector turns executemany on INSERT ... VALUES into one multi-row INSERT
+            cursor.executemany(STATUS_INSERT_SQL, batch)
+            conn.commit()
+            cursor.close()
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _write_rows(self, batch):
+        """Fallback after the batch kept failing: one INSERT per row. Returns how many were dead-lettered."""
+        failed = []
+        try:
+            conn = self.get_conn()
+        except Exception as e:
+            failed = [(row, e) for row in batch]
+        else:
+            try:
+                cursor = conn.cursor()
+                for row in batch:
+                    try:
+                        cursor.execute(STATUS_INSERT_SQL, row)
+                        conn.commit()
+                    except Exception as e:
+                        failed.append((row, e))
+                        try:
+                            conn.rollback()
+                        except Exception:
+                            pass
+                cursor.close()
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        for row, e in failed:
+            logger.error(f"❌ Dead-lettered engraving status row {row!r}: {e}")
+        if failed:
+            with self.cond:
+                self.stats_data["dead_lettered"] += len(failed)
+                self.stats_data["last_error"] = str(failed[-1][1])
+        return len(failed)
+
+    def stats(self):
+        with self.cond:
+            return {
+                **self.stats_data,
+                "pending": len(self.pending),
+                "max_pending": self.max_pending,
+                "max_retries": self.max_retries,
+                "max_batch": self.max_batch,
+                "max_delay_ms": int(self.max_delay * 1000)
+            }
@@ -0,0 +1,218 @@
+"""
+Laser toolpaths for QR module rasters.
+
+A toolpath is a list of moves in mm: "jump" (laser off, rapid) and "mark"
+(laser on, marking speed). Strategies:
+
+  modules      naive raster: every dark module is marked on its own, rows
+               scanned left to right (the baseline)
+  runs         dark modules merged into horizontal runs, rows scanned
+               serpentine (every other row right to left)
+  rectangles   runs with the same span on consecutive rows merged into
+               rectangles, each hatched serpentine; rectangles visited
+               nearest-first from the current head position
+
+Toolpath.cycle_seconds() uses the same timing terms as
+drivers.SimulatedEngraver (setup, passes, mark/jump speed, laser on/off
+delay per mark); gcode() emits a G-code-like program (G0 rapid, G1 mark,
+M3/M5 laser on/off).
+
+Benchmark: python -m engraving.toolpath [payload ...]
+"""
+
+from .drivers import SimulatedEngraver
+
+STRATEGIES = ("modules", "runs", "rectangles")
+
+def matrix_of(source):
+    """Module matrix from a qrcode.QRCode (made), a QRGeometry or a list of rows (True = dark)."""
+    if hasattr(source, "get_matrix"):
+        return source.get_matrix()
+    if hasattr(source, "segments"):
+        matrix = [[False] * source.size for _ in range(source.size)]
+        for row, first, last in source.segments:
+            matrix[row][first:last + 1] = [True] * (last - first + 1)
+        return matrix
+    return source
+
+class Toolpath:
+    """Ordered moves for one pass; coordinates in mm, origin bottom-left."""
+
+    def __init__(self, strategy, module_mm, moves):
+        self.strategy = strategy
+        self.module_mm = module_mm
+        self.moves = moves  # [("jump" | "mark", x, y)], each from the previous point
+        self.mark_mm = 0.0
+        self.travel_mm = 0.0
+        self.marks = 0
+        x = y = 0.0
+        for kind, nx, ny in moves:
+            distance = ((nx - x) ** 2 + (ny - y) ** 2) ** 0.5
+            if kind == "mark":
+                self.mark_mm += distance
+                self.marks += 1
+            else:
+                self.travel_mm += distance
+            x, y = nx, ny
+
+    def cycle_seconds(self, engraver=None):
+        """Estimated cycle time with the engraver's timing model (no jitter)."""
+        engraver = engraver or SimulatedEngraver(module_mm=self.module_mm)
+        per_pass = (self.mark_mm / engraver.mark_speed_mm_s + self.travel_mm / engraver.jump_speed_mm_s
+                    + self.marks * engraver.segment_delay_seconds)
+        return engraver.setup_seconds + engraver.passes * per_pass
+
+    def gcode(self, engraver=None, power=100):
+        """G-code-like program: absolute mm, G0 rapid with laser off, G1 marking between M3/M5."""
+        engraver = engraver or SimulatedEngraver(module_mm=self.module_mm)
+        feed = round(engraver.mark_speed_mm_s * 60)
+        lines = [f"; strategy={self.strategy} module_mm={self.module_mm} passes={engraver.passes}", "G21", "G90"]
+        for number in range(1, engraver.passes + 1):
+            lines.append(f"; pass {number}")
+            laser_on = False
+            for kind, x, y in self.moves:
+                if kind == "mark" and not laser_on:
+                    lines.append(f"M3 S{power}")
+                    laser_on = True
+                elif kind == "jump" and laser_on:
+                    lines.append("M5")
+                    laser_on = False
+                code = "G1" if kind == "mark" else "G0"
+                lines.append(f"{code} X{x:.3f} Y{y:.3f}" + (f" F{feed}" if kind == "mark" else ""))
+            if laser_on:
+                lines.append("M5")
+        lines.append("G0 X0 Y0")
+        return lines
+
+    def stats(self, engraver=None):
+        return {
+            "strategy": self.strategy,
+            "moves": len(self.moves),
+            "marks": self.marks,
+            "mark_mm": round(self.mark_mm, 2),
+            "travel_mm": round(self.travel_mm, 2),
+            "cycle_seconds": round(self.cycle_seconds(engraver), 3)
+        }
+
+def _row_runs(row):
+    runs, start = [], None
+    for col, dark in enumerate(row):
+        if dark and start is None:
+            start = col
+        elif not dark and start is not None:
+            runs.append((start, col - 1))
+            start = None
+    if start is not None:
+        runs.append((start, len(row) - 1))
+    return runs
+
+def _line(moves, row, first, last, size, module_mm, reverse=False):
+    """Jump to the start of a hatch line through row's module centres and mark it."""
+    y = (size - row - 0.5) * module_mm
+    x0, x1 = first * module_mm, (last + 1) * module_mm
+    if reverse:
+        x0, x1 = x1, x0
+    moves.append(("jump", x0, y))
+    moves.append(("mark", x1, y))
+
+def module_raster(matrix, module_mm=0.25):
+    size = len(matrix)
+    moves = []
+    for row_index, row in enumerate(matrix):
+        for col, dark in enumerate(row):
+            if dark:
+                _line(moves, row_index, col, col, size, module_mm)
+    return Toolpath("modules", module_mm, moves)
+
+def run_raster(matrix, module_mm=0.25):
+    size = len(matrix)
+    moves = []
+    for row_index, row in enumerate(matrix):
+        runs = _row_runs(row)
+        reverse = row_index % 2 == 1
+        for first, last in (reversed(runs) if reverse else runs):
+            _line(moves, row_index, first, last, size, module_mm, reverse)
+    return Toolpath("runs", module_mm, moves)
+
+def _rectangles(matrix):
+    """Merge equal-span runs on consecutive rows: [(top_row, bottom_row, first, last)]."""
+    open_rects = {}  # (first, last) -> top row, for runs continuing from the previous row
+    rects = []
+    for row_index, row in enumerate(matrix):
+        spans = set(_row_runs(row))
+        for span in list(open_rects):
+            if span not in spans:
+                rects.append((open_rects.pop(span), row_index - 1) + span)
+        for span in spans:
+            open_rects.setdefault(span, row_index)
+    rects.extend((top, len(matrix) - 1) + span for span, top in open_rects.items())
+    return rects
+
+def rectangle_raster(matrix, module_mm=0.25):
+    size = len(matrix)
+    remaining = _rectangles(matrix)
+    moves = []
+    x = y = 0.0
+    while remaining:
+        # Nearest rectangle corner to the head; hatch from that corner
+        best = None
+        for index, (top, bottom, first, last) in enumerate(remaining):
+            for start_row in (top, bottom):
+                for reverse in (False, True):
+                    sx = (last + 1 if reverse else first) * module_mm
+                    sy = (size - start_row - 0.5) * module_mm
+                    distance = (sx - x) ** 2 + (sy - y) ** 2
+                    if best is None or distance < best[0]:
+                        best = (distance, index, start_row, reverse)
+        _, index, start_row, reverse = best
+        top, bottom, first, last = remaining.pop(index)
+        rows = range(top, bottom + 1) if start_row == top else range(bottom, top - 1, -1)
+        for row in rows:
+            _line(moves, row, first, last, size, module_mm, reverse)
+            reverse = not reverse
+        _, x, y = moves[-1]
+    return Toolpath("rectangles", module_mm, moves)
+
+def build_toolpath(source, strategy="runs", module_mm=None):
+    """Toolpath for a qrcode.QRCode, QRGeometry or module matrix with the given strategy."""
+    module_mm = module_mm or getattr(source, "module_mm", None) or 0.25
+    builders = {"modules": module_raster, "runs": run_raster, "rectangles": rectangle_raster}
+    if strategy not in builders:
+        raise ValueError(f"strategy must be one of {', '.join(STRATEGIES)}")
+    return builders[strategy](matrix_of(source), module_mm)
+
+def compare_strategies(source, module_mm=None, engraver=None):
+    """Stats per strategy plus the saving of each against the per-module raster."""
+    module_mm = module_mm or getattr(source, "module_mm", None) or 0.25
+    matrix = matrix_of(source)
+    results = {strategy: build_toolpath(matrix, strategy, module_mm).stats(engraver) for strategy in STRATEGIES}
+    baseline = results["modules"]["cycle_seconds"]
+    for stats in results.values():
+        stats["saved_percent"] = round((baseline - stats["cycle_seconds"]) / baseline * 100, 1) if baseline else 0.0
+    return results
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from .geometry import qr_matrix
+
+    payloads = sys.argv[1:] or [f"{c}-V010-L2025-01-{n:05d}" for c in ("ERC", "LINER", "PAD", "SLEEPER")
+                                for n in range(1, 26)]
+    totals = {strategy: 0.0 for strategy in STRATEGIES}
+    travel = {strategy: 0.0 for strategy in STRATEGIES}
+    start = time.perf_counter()
+    for payload in payloads:
+        matrix, _ = qr_matrix(payload)
+        for strategy, stats in compare_strategies(matrix).items():
+            totals[strategy] += stats["cycle_seconds"]
+            travel[strategy] += stats["travel_mm"]
+    elapsed = time.perf_counter() - start
+
+    count = len(payloads)
+    print(f"payloads:            {count}")
+    for strategy in STRATEGIES:
+        saved = (totals["modules"] - totals[strategy]) / totals["modules"] * 100
+        print(f"{strategy:<12} cycle {totals[strategy] / count:6.3f}s/item  "
+              f"travel {travel[strategy] / count:7.1f}mm/item  saved {saved:5.1f}%")
+    print(f"planning time:       {elapsed / count * 1000:.2f} ms/item (all strategies)")
@@ -0,0 +1,163 @@
+"""
+Post-engrave verification.
+
+After a burn the station camera captures the mark and MarkVerifier decodes
+and grades it with ISO/IEC 15415-style letter grades (A best, F unreadable),
+taking the worse of two parameters:
+
+  symbol contrast   reflectance difference between burned and bare metal
+  unused ECC        error correction left after damaged modules; the budget
+                    is the engraved level's recovery capacity (L 7%, M 15%,
+                    Q 25%, H 30%, from geometry.error_correction)
+
+SimulatedCamera stands in for the camera locally: it draws contrast and
+module damage from normal distributions, flips that many modules of the
+burned geometry and renders the result to a grayscale image. MarkVerifier
+decodes the image with OpenCV's QRCodeDetector, so a mark only counts as
+read when its payload actually comes back. opencv-python-headless (and
+numpy) are optional: without them no image is rendered and readability
+falls back to the ECC budget alone. The line runs verify() on its own
+worker pool, so it never adds to a station's cycle time.
+"""
+
+import functools
+import random
+import threading
+import time
+
+from .geometry import geometry_modules
+
+GRADES = ("A", "B", "C", "D", "F")
+GRADE_VALUES = {"A": 4.0, "B": 3.0, "C": 2.0, "D": 1.0, "F": 0.0}
+# Lower bounds per grade (A, B, C, D); below the last one is F
+CONTRAST_THRESHOLDS = (0.70, 0.55, 0.40, 0.20)
+UNUSED_ECC_THRESHOLDS = (0.62, 0.50, 0.37, 0.25)
+# Share of codewords each error-correction level can recover
+ECC_RECOVERY = {"L": 0.07, "M": 0.15, "Q": 0.25, "H": 0.30}
+MODULE_PIXELS = 8
+QUIET_ZONE_MODULES = 4  # added around the mark's own border, as QRCodeDetector expects
+BARE_METAL_LEVEL = 230  # gray level of unburned metal
+
+@functools.lru_cache(maxsize=None)
+def opencv():
+    """(cv2, numpy), or None when opencv-python-headless is not installed."""
+    try:
+        import cv2
+        import numpy
+    except ImportError:
+        return None
+    return cv2, numpy
+
+def render_mark(geometry, flipped, contrast):
+    """Grayscale image of the mark with the modules in flipped inverted; None without numpy/OpenCV."""
+    libs = opencv()
+    if libs is None:
+        return None
+    _, np = libs
+    modules = np.array(geometry_modules(geometry), dtype=bool)
+    for index in flipped:
+        row, col = divmod(index, geometry.size)
+        modules[row, col] = not modules[row, col]
+    burned = round(BARE_METAL_LEVEL * (1.0 - contrast))
+    image = np.where(modules, burned, BARE_METAL_LEVEL).astype(np.uint8)
+    image = np.kron(image, np.ones((MODULE_PIXELS, MODULE_PIXELS), dtype=np.uint8))
+    return np.pad(image, QUIET_ZONE_MODULES * MODULE_PIXELS, constant_values=BARE_METAL_LEVEL)
+
+def decode_mark(image):
+    """Payload decoded from image with QRCodeDetector, or None."""
+    cv2, _ = opencv()
+    text, _, _ = cv2.QRCodeDetector().detectAndDecode(image)
+    return text or None
+
+def _grade(value, thresholds):
+    for grade, threshold in zip(GRADES, thresholds):
+        if value >= threshold:
+            return grade
+    return "F"
+
+class Capture:
+    """What the camera saw: contrast and damaged modules of one mark, and its image when rendered."""
+
+    __slots__ = ("uid", "symbol_contrast", "damaged_modules", "total_modules", "image")
+
+    def __init__(self, uid, symbol_contrast, damaged_modules, total_modules, image=None):
+        self.uid = uid
+        self.symbol_contrast = symbol_contrast
+        self.damaged_modules = damaged_modules
+        self.total_modules = total_modules
+        self.image = image
+
+class SimulatedCamera:
+    """Stand-in camera; damage is the fraction of modules misread (mean/stddev)."""
+
+    name = "simulated"
+
+    def __init__(self, capture_seconds=0.15, contrast_mean=0.75, contrast_stddev=0.08,
+                 damage_mean=0.02, damage_stddev=0.03, time_scale=1.0, seed=None):
+        self.capture_seconds = capture_seconds
+        self.contrast_mean = contrast_mean
+        self.contrast_stddev = contrast_stddev
+        self.damage_mean = damage_mean
+        self.damage_stddev = damage_stddev
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()  # random.Random is shared by the verify workers
+
+    def capture(self, uid, geometry):
+        time.sleep(self.capture_seconds * self.time_scale)
+        total = geometry.size * geometry.size
+        with self.lock:
+            contrast = min(max(self.random.gauss(self.contrast_mean, self.contrast_stddev), 0.0), 1.0)
+            damage = max(self.random.gauss(self.damage_mean, self.damage_stddev), 0.0)
+            damaged = min(round(damage * total), total)
+            flipped = self.random.sample(range(total), damaged)
+        return Capture(uid, contrast, damaged, total, render_mark(geometry, flipped, contrast))
+
+class MarkVerifier:
+    """Decode and grade captures; marks below min_grade fail verification.
+
+    ecc_capacity overrides the recovery share taken from the geometry's error-correction level.
+    """
+
+    def __init__(self, camera=None, min_grade="C", ecc_capacity=None):
+        if min_grade not in GRADES:
+            raise ValueError(f"min_grade must be one of {', '.join(GRADES)}")
+        self.camera = camera or SimulatedCamera()
+        self.min_grade = min_grade
+        self.ecc_capacity = ecc_capacity
+
+    def verify(self, uid, geometry):
+        """Returns {"passed", "decoded", "grade", ...}; reason is set when it did not pass."""
+        capture = self.camera.capture(uid, geometry)
+        damage = capture.damaged_modules / capture.total_modules if capture.total_modules else 1.0
+        capacity = self.ecc_capacity or ECC_RECOVERY[geometry.error_correction]
+        unused_ecc = max(1.0 - damage / capacity, 0.0)
+        if capture.image is not None:
+            decoded = decode_mark(capture.image)
+            readable = decoded == geometry.uid
+        else:
+            readable = unused_ecc > 0 and capture.symbol_contrast >= CONTRAST_THRESHOLDS[-1]
+            decoded = capture.uid if readable else None
+        grade = "F"
+        if readable:
+            grade = max(_grade(capture.symbol_contrast, CONTRAST_THRESHOLDS),
+                        _grade(unused_ecc, UNUSED_ECC_THRESHOLDS), key=GRADES.index)
+        passed = readable and GRADES.index(grade) <= GRADES.index(self.min_grade)
+        result = {
+            "passed": passed,
+            "decoded": decoded,
+            "error_correction": geometry.error_correction,
+            "grade": grade,
+            "grade_value": GRADE_VALUES[grade],
+            "symbol_contrast": round(capture.symbol_contrast, 3),
+            "unused_ecc": round(unused_ecc, 3),
+            "damaged_modules": capture.damaged_modules
+        }
+        if not passed:
+            result["reason"] = "unreadable" if not readable else "low_grade"
+        return result
+
+    def info(self):
+        return {"camera": self.camera.name, "min_grade": self.min_grade,
+                "ecc_capacity": self.ecc_capacity or "per error-correction level",
+                "decoder": "opencv" if opencv() else "ecc_model"}
@@ -0,0 +1,508 @@
+"""
+Compact in-process index of the item catalog.
+
+Holds every item (uid, component, vendor, lot, serial, mfg_date, warranty_years,
+created_at and latest status/location/note) in array-backed columns so /scan,
+/inventory/search and /inventory/stats can be answered without a DB round trip.
+
+String columns are dictionary encoded (one small int per row, one Python string
+per distinct value); dates are stored as day ordinals and timestamps as epoch
+seconds. The index is loaded once and then refreshed incrementally: items
+from a created_at watermark, status rows from a statuses.id watermark (ids
+follow insert order, while updated_at can be old, e.g. offline scanner
+uploads carry the client's event time).
+
+Run this file directly to measure memory per million items.
+"""
+
+from array import array
+from datetime import datetime, date, timedelta
+import heapq
+import logging
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+NO_TIME = -1
+
+def _to_epoch(value):
+    if value is None:
+        return NO_TIME
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int((value - EPOCH).total_seconds())
+
+def _from_epoch(seconds):
+    if seconds == NO_TIME:
+        return None
+    return EPOCH + timedelta(seconds=seconds)
+
+def _to_ordinal(value):
+    if value is None:
+        return 0
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal()
+
+class StringDictionary:
+    """Bidirectional value <-> int code mapping; code 0 is reserved for None."""
+
+    def __init__(self):
+        self.values = [None]
+        self.codes = {None: 0}
+        self.value_bytes = 0  # sys.getsizeof of the stored values, kept as they are added
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+            self.value_bytes += sys.getsizeof(value)
+        return code
+
+    def code_of(self, value):
+        return self.codes.get(value)
+
+    def decode(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+    def nbytes(self):
+        return sys.getsizeof(self.values) + sys.getsizeof(self.codes) + self.value_bytes
+
+class ItemIndex:
+    """Columnar, dictionary-encoded snapshot of items and their latest status."""
+
+    # Rows are addressed by a packed (component, vendor, lot, serial) int key
+    # when the uid round-trips through make_uid(); anything else falls back to
+    # a plain uid -> row dict.
+    LOAD_BATCH = 10000
+
+    def __init__(self, overlap_seconds=5, overlap_status_ids=5000):
+        self.overlap = timedelta(seconds=overlap_seconds)
+        # statuses ids are allocated before commit: a bulk transaction can commit
+        # after a higher id, so each refresh re-reads this many ids behind the
+        # watermark (re-applying a row is harmless)
+        self.overlap_status_ids = overlap_status_ids
+        self._lock = threading.RLock()
+        self.ready = False
+        self.loaded_at = None
+        self.refreshed_at = None
+        self.created_watermark = None
+        self.status_id_watermark = 0
+        self._reset()
+
+    def _reset(self):
+        self.components = StringDictionary()
+        self.vendors = StringDictionary()
+        self.lots = StringDictionary()
+        self.statuses = StringDictionary()
+        self.locations = StringDictionary()
+        self.notes = StringDictionary()
+
+        self.component = array('H')
+        self.vendor = array('H')
+        self.lot = array('I')
+        self.serial = array('I')
+        self.mfg_date = array('i')
+        self.warranty_years = array('B')
+        self.created_at = array('q')
+        self.status = array('H')
+        self.location = array('I')
+        self.note = array('I')
+        self.status_updated_at = array('q')
+
+        self._rows = {}
+        self._odd_uids = {}
+        self._odd_uid_list = {}
+        self._lot_rows = {}  # (component, vendor, lot) codes -> array of rows, for range updates
+        self.status_counts = {}
+        self._key_bytes = 0  # sys.getsizeof of the keys / odd uids / lot entries, so memory_usage() is O(1)
+        self._odd_bytes = 0
+        self._lot_bytes = 0
+
+    # ---------------- keys ----------------
+    def _key(self, component, vendor, lot, serial):
+        return (((component << 16 | vendor) << 24 | lot) << 32) | serial
+
+    def _parse_uid(self, uid):
+        """Split a make_uid() style uid into (component, vendor, lot, serial) or None."""
+        try:
+            head, serial = uid.rsplit("-", 1)
+            component, vendor, lot = head.split("-", 2)
+            serial_no = int(serial)
+        except (ValueError, AttributeError):
+            return None
+        if f"{component}-{vendor}-{lot}-{serial_no:05d}" != uid:
+            return None
+        return component, vendor, lot, serial_no
+
+    def _find_row(self, uid):
+        parts = self._parse_uid(uid)
+        if parts:
+            c = self.components.code_of(parts[0])
+            v = self.vendors.code_of(parts[1])
+            l = self.lots.code_of(parts[2])
+            if c is not None and v is not None and l is not None:
+                row = self._rows.get(self._key(c, v, l, parts[3]))
+                if row is not None:
+                    return row
+        return self._odd_uids.get(uid)
+
+    def uid_at(self, row):
+        uid = self._odd_uid_list.get(row)
+        if uid is not None:
+            return uid
+        return (f"{self.components.decode(self.component[row])}-{self.vendors.decode(self.vendor[row])}-"
+                f"{self.lots.decode(self.lot[row])}-{self.serial[row]:05d}")
+
+    # ---------------- mutation ----------------
+    def _count_status(self, code, delta):
+        self.status_counts[code] = self.status_counts.get(code, 0) + delta
+
+    def add_item(self, uid, component, vendor, lot, mfg_date, warranty_years, created_at,
+                 status=None, location=None, note=None, status_updated_at=None):
+        """Insert an item (no-op for item fields if it is already indexed)."""
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+        with self._lock:
+            parts = self._parse_uid(uid)
+            canonical = parts is not None and parts[:3] == (component, vendor, lot)
+            c = self.components.encode(component)
+            v = self.vendors.encode(vendor)
+            l = self.lots.encode(lot)
+            if canonical:
+                key = self._key(c, v, l, parts[3])
+                row = self._rows.get(key)
+            else:
+                row = self._odd_uids.get(uid)
+
+            if row is None:
+                row = len(self.component)
+                self.component.append(c)
+                self.vendor.append(v)
+                self.lot.append(l)
+                self.serial.append(parts[3] if canonical else 0)
+                self.mfg_date.append(_to_ordinal(mfg_date))
+                self.warranty_years.append(int(warranty_years or 0))
+                self.created_at.append(_to_epoch(created_at))
+                self.status.append(0)
+                self.location.append(0)
+                self.note.append(0)
+                self.status_updated_at.append(NO_TIME)
+                self._count_status(0, 1)
+                lot_rows = self._lot_rows.get((c, v, l))
+                if lot_rows is None:
+                    lot_rows = self._lot_rows[(c, v, l)] = array('I')
+                    self._lot_bytes += sys.getsizeof((c, v, l)) + sys.getsizeof(lot_rows)
+                lot_rows.append(row)
+
+                if canonical:
+                    self._rows[key] = row
+                    self._key_bytes += sys.getsizeof(key)
+                else:
+                    self._odd_uids[uid] = row
+                    self._odd_uid_list[row] = uid
+                    self._odd_bytes += sys.getsizeof(uid)
+
+                if created_at is not None and (self.created_watermark is None or created_at > self.created_watermark):
+                    self.created_watermark = created_at
+
+            if status is not None:
+                self._apply_status_row(row, status, location, note, status_updated_at)
+            return row
+
+    def _apply_status_row(self, row, status, location, note, updated_at):
+        if isinstance(updated_at, str):
+            updated_at = datetime.fromisoformat(updated_at)
+        ts = _to_epoch(updated_at)
+        if ts != NO_TIME and ts < self.status_updated_at[row]:
+            return  # an older status row; the index already holds a newer one
+        new_code = self.statuses.encode(status)
+        self._count_status(self.status[row], -1)
+        self._count_status(new_code, 1)
+        self.status[row] = new_code
+        self.location[row] = self.locations.encode(location)
+        self.note[row] = self.notes.encode(note)
+        self.status_updated_at[row] = ts
+
+    def apply_status(self, uid, status, location=None, note=None, updated_at=None):
+        """Record a status change; returns False if the uid is not indexed."""
+        with self._lock:
+            row = self._find_row(uid)
+            if row is None:
+                return False
+            self._apply_status_row(row, status, location, note, updated_at)
+            return True
+
+    def apply_status_range(self, component, vendor, lot, status, location=None, note=None, updated_at=None,
+                           first_serial=None, last_serial=None):
+        """Record a status change for a lot (optionally a serial range); returns rows changed.
+
+        Only the lot's rows are visited; a serial range narrower than the lot
+        is looked up by packed key, one probe per serial.
+        """
+        with self._lock:
+            c = self.components.code_of(component)
+            v = self.vendors.code_of(vendor)
+            l = self.lots.code_of(lot)
+            lot_rows = self._lot_rows.get((c, v, l))
+            if not lot_rows:
+                return 0
+            low = max(first_serial, 0) if first_serial is not None else 0
+            if first_serial is None and last_serial is None:
+                rows = lot_rows
+            elif last_serial is not None and last_serial - low < len(lot_rows) and last_serial < 1 << 32:
+                keyed = (self._rows.get(self._key(c, v, l, serial)) for serial in range(low, last_serial + 1))
+                rows = [row for row in keyed if row is not None]
+            else:
+                high = last_serial if last_serial is not None else float("inf")
+                rows = [row for row in lot_rows
+                        if row not in self._odd_uid_list and low <= self.serial[row] <= high]
+            for row in rows:
+                self._apply_status_row(row, status, location, note, updated_at)
+            return len(rows)
+
+    # ---------------- loading ----------------
+    def load(self, conn):
+        """Full (re)load from the database."""
+        fresh = ItemIndex(overlap_seconds=self.overlap.total_seconds(), overlap_status_ids=self.overlap_status_ids)
+        cursor = conn.cursor()
+        # Taken before the snapshot: rows committed during the load are re-read by the next refresh
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM statuses")
+        fresh.status_id_watermark = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT i.uid, i.component, i.vendor, i.lot, i.mfg_date, i.warranty_years, i.created_at,
+                   s.status, s.location, s.note, s.updated_at
+            FROM items i
+            LEFT JOIN (
+                SELECT uid, status, location, note, updated_at,
+                       ROW_NUMBER() OVER (PARTITION BY uid ORDER BY updated_at DESC) as rn
+                FROM statuses
+            ) s ON i.uid = s.uid AND s.rn = 1
+        """)
+        while True:
+            batch = cursor.fetchmany(self.LOAD_BATCH)
+            if not batch:
+                break
+            for row in batch:
+                fresh.add_item(*row[:7], status=row[7], location=row[8], note=row[9], status_updated_at=row[10])
+        cursor.close()
+
+        with self._lock:
+            self.__dict__.update({k: v for k, v in fresh.__dict__.items() if k != "_lock"})
+            self.ready = True
+            self.loaded_at = self.refreshed_at = datetime.utcnow()
+        logger.info(f"📇 Item index loaded: {len(self)} items, {self.memory_usage()['bytes_per_item']} bytes/item")
+
+    def refresh(self, conn):
+        """Pull items newer than the created_at watermark and status rows past the statuses.id
+        watermark (each minus an overlap)."""
+        if not self.ready:
+            return self.load(conn)
+        cursor = conn.cursor()
+        added = updated = 0
+
+        since = (self.created_watermark - self.overlap) if self.created_watermark else EPOCH
+        cursor.execute("""
+            SELECT uid, component, vendor, lot, mfg_date, warranty_years, created_at
+            FROM items WHERE created_at >= %s
+        """, (since,))
+        for row in cursor.fetchall():
+            before = len(self)
+            self.add_item(*row)
+            added += len(self) - before
+
+        cursor.execute("""
+            SELECT id, uid, status, location, note, updated_at
+            FROM statuses WHERE id > %s
+            ORDER BY id
+        """, (max(self.status_id_watermark - self.overlap_status_ids, 0),))
+        for status_id, uid, status, location, note, updated_at in cursor.fetchall():
+            updated += self.apply_status(uid, status, location, note, updated_at)
+            self.status_id_watermark = max(self.status_id_watermark, status_id)
+        cursor.close()
+
+        self.refreshed_at = datetime.utcnow()
+        return added, updated
+
+    # ---------------- queries ----------------
+    def __len__(self):
+        return len(self.component)
+
+    def _row_dict(self, row):
+        mfg = self.mfg_date[row]
+        created = _from_epoch(self.created_at[row])
+        updated = _from_epoch(self.status_updated_at[row])
+        return {
+            "uid": self.uid_at(row),
+            "component": self.components.decode(self.component[row]),
+            "vendor": self.vendors.decode(self.vendor[row]),
+            "lot": self.lots.decode(self.lot[row]),
+            "mfg_date": date.fromordinal(mfg).isoformat() if mfg else None,
+            "warranty_years": self.warranty_years[row],
+            "created_at": created.isoformat() if created else None,
+            "status": self.statuses.decode(self.status[row]),
+            "location": self.locations.decode(self.location[row]),
+            "status_updated_at": updated.isoformat() if updated else None
+        }
+
+    def get(self, uid):
+        """Return the indexed item (with note) or None."""
+        with self._lock:
+            row = self._find_row(uid)
+            if row is None:
+                return None
+            item = self._row_dict(row)
+            item["note"] = self.notes.decode(self.note[row])
+            return item
+
+    def search(self, text="", component="", status="", limit=100):
+        """Mirror of /inventory/search: substring on uid/component/vendor, newest first.
+
+        The columns are copied under the lock (a memcpy per array) and scanned
+        outside it, so a long search does not hold up get() / apply_status().
+        """
+        while True:
+            with self._lock:
+                component_code = status_code = None
+                if component:
+                    component_code = self.components.code_of(component)
+                    if component_code is None:
+                        return []
+                if status:
+                    status_code = self.statuses.code_of(status)
+                    if status_code is None:
+                        return []
+                count = len(self)
+                generation = self.component  # replaced wholesale by load()
+                components = list(self.components.values)
+                vendors = list(self.vendors.values)
+                lots = list(self.lots.values)
+                component_col = self.component[:count]
+                vendor_col = self.vendor[:count]
+                lot_col = self.lot[:count]
+                serial_col = self.serial[:count]
+                status_col = self.status[:count]
+                created_col = self.created_at[:count]
+                odd_uids = dict(self._odd_uid_list)
+
+            needle = text.lower()
+            component_hits = {c for c, v in enumerate(components) if v and needle in v.lower()}
+            vendor_hits = {c for c, v in enumerate(vendors) if v and needle in v.lower()}
+            prefixes = {}  # (component, vendor, lot) codes -> lowercased make_uid() prefix
+
+            def uid_matches(row):
+                uid = odd_uids.get(row)
+                if uid is not None:
+                    return needle in uid.lower()
+                group = (component_col[row], vendor_col[row], lot_col[row])
+                prefix = prefixes.get(group)
+                if prefix is None:
+                    prefix = prefixes[group] = f"{components[group[0]]}-{vendors[group[1]]}-{lots[group[2]]}-".lower()
+                return needle in prefix or needle in f"{prefix}{serial_col[row]:05d}"
+
+            def matches(row):
+                if component_code is not None and component_col[row] != component_code:
+                    return False
+                if status_code is not None and status_col[row] != status_code:
+                    return False
+                if needle:
+                    return component_col[row] in component_hits or vendor_col[row] in vendor_hits or uid_matches(row)
+                return True
+
+            rows = heapq.nlargest(limit, (r for r in range(count) if matches(r)), key=lambda r: created_col[r])
+            with self._lock:
+                if self.component is generation:
+                    return [self._row_dict(r) for r in rows]
+            # A full reload swapped the columns mid-search; row numbers no longer match
+
+    def stats(self):
+        """Mirror of /inventory/stats, served from running per-status counters."""
+        with self._lock:
+            return {
+                "total_items": len(self),
+                "status_breakdown": {
+                    (self.statuses.decode(code) or "Unknown"): count
+                    for code, count in self.status_counts.items() if count
+                }
+            }
+
+    def memory_usage(self):
+        """Approximate resident bytes of the index, total and per item."""
+        with self._lock:
+            columns = [self.component, self.vendor, self.lot, self.serial, self.mfg_date,
+                       self.warranty_years, self.created_at, self.status, self.location,
+                       self.note, self.status_updated_at]
+            column_bytes = sum(c.itemsize * len(c) for c in columns)
+            key_bytes = sys.getsizeof(self._rows) + self._key_bytes
+            key_bytes += sys.getsizeof(self._lot_rows) + self._lot_bytes + array('I').itemsize * len(self)
+            odd_bytes = sys.getsizeof(self._odd_uids) + sys.getsizeof(self._odd_uid_list) + self._odd_bytes
+            dictionary_bytes = sum(d.nbytes() for d in (self.components, self.vendors, self.lots,
+                                                         self.statuses, self.locations, self.notes))
+            total = column_bytes + key_bytes + odd_bytes + dictionary_bytes
+            count = len(self)
+            return {
+                "items": count,
+                "column_bytes": column_bytes,
+                "key_bytes": key_bytes,
+                "dictionary_bytes": dictionary_bytes + odd_bytes,
+                "total_bytes": total,
+                "bytes_per_item": round(total / count, 1) if count else 0,
+                "mb_per_million_items": round(total / count * 1_000_000 / (1024 * 1024), 1) if count else 0
+            }
+
+    def info(self):
+        return {
+            "ready": self.ready,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "refreshed_at": self.refreshed_at.isoformat() if self.refreshed_at else None,
+            "memory": self.memory_usage()
+        }
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    components = ["ERC", "LINER", "PAD", "SLEEPER"]
+    vendors = ["V010", "V011", "V012"]
+    statuses = ["Manufactured", "Engraved", "Received", "Inspected", "Installed"]
+    base = datetime(2025, 1, 1)
+
+    tracemalloc.start()
+    index = ItemIndex()
+    start = time.perf_counter()
+    for n in range(count):
+        component = components[n % 4]
+        vendor = vendors[n % 3]
+        lot = f"L2025-{n // 50000:02d}"
+        uid = f"{component}-{vendor}-{lot}-{n:05d}"
+        index.add_item(uid, component, vendor, lot, base.date(), 5, base + timedelta(seconds=n),
+                       status=statuses[n % 5], location="Factory", note="Initial QR generation",
+                       status_updated_at=base + timedelta(seconds=n))
+    build_seconds = time.perf_counter() - start
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    probe = f"PAD-V010-L2025-{(count // 2) // 50000:02d}-{(count // 2) - (count // 2) % 12 + 2:05d}"
+    start = time.perf_counter()
+    for _ in range(10000):
+        index.get(probe)
+    lookup_us = (time.perf_counter() - start) / 10000 * 1e6
+
+    usage = index.memory_usage()
+    print(f"items:               {count:,}")
+    print(f"build time (traced): {build_seconds:.1f}s")
+    print(f"estimated bytes:     {usage['total_bytes']:,} ({usage['bytes_per_item']} B/item)")
+    print(f"tracemalloc bytes:   {traced:,} ({traced / count:.1f} B/item)")
+    print(f"MB per million:      {traced / count * 1_000_000 / (1024 * 1024):.1f}")
+    print(f"uid lookup:          {lookup_us:.2f} us")
+    print(f"stats:               {index.stats()}")
@@ -16,5 +16,7 @@ echo "Installing dependencies..."
 pip install -r requirements.txt
 
 # Start the server
+# One process keeps a single engraving line; threads let /engrave/events (SSE) streams run alongside requests
+# (at most ENGRAVE_EVENTS_MAX_SUBSCRIBERS streams, default 16, so requests always have threads left)
 echo "Starting Flask server..."
-gunicorn --bind 0.0.0.0:5002 combined_backend_service:app
\ No newline at end of file
+gunicorn --bind 0.0.0.0:5002 --workers 1 --threads 32 combined_backend_service:app
\ No newline at end of file
@@ -6,6 +6,9 @@ and functionality as the original project and generate QR service.
 """
 
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import json
 import logging
 import threading
 import time
@@ -13,11 +16,18 @@ import os
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import mysql.connector
+from mysql.connector import pooling
 import sys
 
+# Shared engraving line components live in qr-manufacturing-system/engraving
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from engraving import StatusWriteBuffer, build_toolpath, compare_strategies
+from engraving.config import (build_line, engraving_job_items, layout_optimizer, plan_engraving_job,
+                              prepare_engraving, simulate_engraving_job, simulated_engraver)
+
 # MySQL Database Configuration (Same as Generate QR and Scanning services)
 DB_CONFIG = {
     "host": os.getenv("DB_HOST", "gondola.proxy.rlwy.net"),
@@ -48,15 +58,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# mysql.connector is blocking, so endpoints never call it on the event loop: DB work runs
+# through run_db() on a bounded executor, using connections from a pool of DB_POOL_SIZE.
+# The engraving line's threads (dispatcher, stations, status writer) use their own pool of
+# LINE_DB_POOL_SIZE, so a busy line cannot starve request handlers and vice versa.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+LINE_DB_POOL_SIZE = int(os.getenv("LINE_DB_POOL_SIZE", "5"))
+DB_POOL_WAIT_SECONDS = float(os.getenv("DB_POOL_WAIT_SECONDS", "5"))
+db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="engraving-db")
+db_pools = {}
+db_pool_lock = threading.Lock()
+
+def pooled_connection(pool_name, pool_size):
+    """Connection from the named pool, waiting up to DB_POOL_WAIT_SECONDS when it is exhausted.
+
+    mysql.connector's pool cannot block, so the wait polls with backoff and
+    raises PoolError once the deadline passes.
+    """
+    with db_pool_lock:
+        pool = db_pools.get(pool_name)
+        if pool is None:
+            pool = db_pools[pool_name] = pooling.MySQLConnectionPool(pool_name=pool_name, pool_size=pool_size,
+                                                                     **DB_CONFIG)
+    deadline = time.monotonic() + DB_POOL_WAIT_SECONDS
+    delay = 0.01
+    while True:
+        try:
+            return pool.get_connection()
+        except pooling.errors.PoolError:
+            # Pool exhausted: wait for a connection to come back
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.2)
+
 def get_db_connection():
-    """Get MySQL database connection using same config as Generate QR service."""
+    """Get a pooled MySQL connection (same config as Generate QR service); close() returns it to the pool."""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
+        return pooled_connection("engraving", DB_POOL_SIZE)
+    except pooling.errors.PoolError as e:
+        logger.error(f"❌ Database pool exhausted for {DB_POOL_WAIT_SECONDS}s: {e}")
+        raise HTTPException(status_code=503, detail="Database busy, retry shortly")
     except mysql.connector.Error as e:
         logger.error(f"❌ Database connection failed: {e}")
         raise HTTPException(status_code=500, detail="Database connection failed")
 
+def get_line_db_connection():
+    """Pooled connection for the engraving line's background threads.
+
+    Errors propagate as mysql.connector errors (no HTTPException outside a request);
+    the line logs them and retries.
+    """
+    return pooled_connection("engraving-line", LINE_DB_POOL_SIZE)
+
+async def run_db(fn, *args, **kwargs):
+    """Run blocking DB work on the DB executor so the event loop keeps serving requests."""
+    return await asyncio.get_running_loop().run_in_executor(db_executor, functools.partial(fn, *args, **kwargs))
+
 def test_db_connection():
     """Test database connection."""
     try:
@@ -72,29 +131,23 @@ def test_db_connection():
         logger.error(f"❌ Database connection test failed: {e}")
         return False
 
-# Global engraving state (matching original project)
-engraving_state = {
-    "status": "idle",  # idle, running, paused, stopped
-    "current_job": None,
-    "current_item": None,
-    "processed_count": 0,
-    "total_count": 0,
-    "start_time": None,
-    "pause_time": None,
-    "items": [],
-    "simulate": True,
-    "delay_seconds": 1.0
-}
+# Engraving results are group-committed by a background writer so stations do not
+# wait on MySQL between items; flushed on pause, stop and shutdown.
+status_writer = StatusWriteBuffer(
+    get_line_db_connection,
+    max_batch=int(os.getenv("STATUS_WRITE_BATCH", "50")),
+    max_delay_ms=int(os.getenv("STATUS_WRITE_DELAY_MS", "200")),
+    max_retries=int(os.getenv("STATUS_WRITE_RETRIES", "5")),
+    max_pending=int(os.getenv("STATUS_WRITE_MAX_PENDING", "10000"))
+)
 
-worker_thread = None
-worker_stop_event = threading.Event()
+def update_item_status_after_engraving(uid: str, success: bool, station_id: Optional[str] = None,
+                                       reason: Optional[str] = None, verification: Optional[Dict[str, Any]] = None):
+    """Queue the item's final status row (written by status_writer); failures are out of retries.
 
-def update_item_status_after_engraving(uid: str, success: bool):
-    """Update item status in database after engraving completion."""
+    With verification enabled the note carries the mark's read grade.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         if success:
             status = "Engraved"
             location = "Engraving Station"
@@ -102,90 +155,57 @@ def update_item_status_after_engraving(uid: str, success: bool):
         else:
             status = "Engraving Failed"
             location = "Engraving Station"
-            note = "Laser engraving failed"
+            note = f"Laser engraving failed after retries: {reason}" if reason else "Laser engraving failed"
+        if verification and verification.get("grade"):
+            note = f"{note}; read grade {verification['grade']}"
+        elif verification and verification.get("error"):
+            note = f"{note}; not verified"
+        if station_id:
+            note = f"{note} ({station_id})"
         
         # Insert status into statuses table (same as Generate QR service)
-        cursor.execute("""
-            INSERT INTO statuses (uid, status, location, note, updated_at)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (uid, status, location, note, datetime.now()))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        logger.info(f"✅ Updated database status for {uid}: {status}")
+        status_writer.add(uid, status, location, note, datetime.now())
         
     except Exception as e:
-        logger.error(f"❌ Failed to update database status for {uid}: {e}")
+        logger.error(f"❌ Failed to queue database status for {uid}: {e}")
 
-def engrave_single_item(uid: str, simulate: bool = True):
-    """Engrave a single item (simulation or real hardware)."""
-    try:
-        if simulate:
-            # Simulation mode - just wait
-            delay = engraving_state.get("delay_seconds", 1.0)
-            time.sleep(delay)
-            logger.info(f"✅ Simulated engraving completed for {uid}")
-            return True
-        else:
-            # Real hardware mode would go here
-            # For now, we'll simulate
-            time.sleep(2.0)
-            logger.info(f"✅ Hardware engraving completed for {uid}")
-            return True
-            
-    except Exception as e:
-        logger.error(f"❌ Engraving failed for {uid}: {e}")
-        return False
+async def flush_status_writer():
+    """Wait (off the event loop) until queued engraving results are committed."""
+    flushed = await asyncio.get_running_loop().run_in_executor(None, status_writer.flush)
+    if not flushed:
+        logger.warning("⚠️ Engraving status flush timed out; rows stay queued for retry")
+    return flushed
 
-def worker_loop():
-    """Background worker for engraving operations."""
-    global engraving_state
-    
-    while not worker_stop_event.is_set():
-        try:
-            if engraving_state["status"] != "running":
-                time.sleep(0.1)
-                continue
-            
-            items = engraving_state.get("items", [])
-            processed = engraving_state.get("processed_count", 0)
-            
-            if processed >= len(items):
-                # Job completed
-                engraving_state["status"] = "completed"
-                engraving_state["current_item"] = None
-                logger.info("✅ Engraving job completed")
+# Engraving line: drivers, layout, verification and the ENGRAVING_* settings are shared
+# with the combined backend (engraving/config.py). Results go through status_writer and
+# durable jobs use the line's own connection pool.
+engraving_line = build_line(get_line_db_connection, on_result=update_item_status_after_engraving)
+
+# WebSocket viewers of /engrave/events. A single relay task holds the one broadcaster
+# subscription and fans each event out to every viewer's queue.
+event_viewers = set()
+event_relay_task = None
+
+async def relay_engraving_events():
+    loop = asyncio.get_running_loop()
+    subscription = engraving_line.events.subscribe()
+    try:
+        while True:
+            event = await loop.run_in_executor(None, subscription.get, 1.0)
+            if subscription.closed:
+                subscription = engraving_line.events.subscribe()
+            if event is None:
                 continue
-            
-            # Get next item to engrave
-            current_item = items[processed]
-            uid = current_item.get("uid")
-            
-            if uid:
-                engraving_state["current_item"] = uid
-                logger.info(f"🔥 Starting engraving for {uid}")
-                
-                # Perform engraving
-                success = engrave_single_item(uid, engraving_state.get("simulate", True))
-                
-                # Update database status
-                update_item_status_after_engraving(uid, success)
-                
-                if success:
-                    engraving_state["processed_count"] += 1
-                    logger.info(f"✅ Engraving completed for {uid} ({engraving_state['processed_count']}/{len(items)})")
-                else:
-                    logger.error(f"❌ Engraving failed for {uid}")
-                    # Continue with next item even if one fails
-                    engraving_state["processed_count"] += 1
-            else:
-                # Skip invalid item
-                engraving_state["processed_count"] += 1
-                
-        except Exception as e:
-            logger.error(f"Worker error: {e}")
-            time.sleep(1.0)
+            for viewer in list(event_viewers):
+                try:
+                    viewer.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Slow viewer: disconnect it rather than buffer without bound
+                    event_viewers.discard(viewer)
+                    viewer.get_nowait()
+                    viewer.put_nowait(None)
+    finally:
+        subscription.close()
 
 @app.on_event("startup")
 async def startup_event():
@@ -194,24 +214,32 @@ async def startup_event():
         logger.info("🚀 Starting Engraving Service...")
         
         # Test database connection
-        if test_db_connection():
+        if await run_db(test_db_connection):
             logger.info("✅ Database connection established")
         else:
             raise Exception("Database connection failed")
         
         # Test with simple query
-        try:
+        def show_tables():
             conn = get_db_connection()
             cursor = conn.cursor()
             cursor.execute("SHOW TABLES")
             tables = cursor.fetchall()
             cursor.close()
             conn.close()
+            return tables
+
+        try:
+            tables = await run_db(show_tables)
             logger.info(f"✅ Database test successful, found {len(tables)} tables")
         except Exception as e:
             logger.warning(f"⚠️ Database test failed: {e}")
-            
-        logger.info("🔧 Engraving Service ready")
+
+        # Recovery of a durable job reads the DB too
+        await run_db(engraving_line.start)
+        global event_relay_task
+        event_relay_task = asyncio.create_task(relay_engraving_events())
+        logger.info(f"🔧 Engraving Service ready ({len(engraving_line.stations)} station(s))")
         
     except Exception as e:
         logger.error(f"❌ Startup failed: {e}")
@@ -221,11 +249,11 @@ async def startup_event():
 async def shutdown_event():
     """Clean up resources on shutdown."""
     try:
-        global worker_thread, worker_stop_event
-        
-        if worker_thread and worker_thread.is_alive():
-            worker_stop_event.set()
-            worker_thread.join(timeout=5)
+        await run_db(engraving_line.shutdown, timeout=5)
+        await run_db(status_writer.close, timeout=10)
+        db_executor.shutdown(wait=False)
+        if event_relay_task:
+            event_relay_task.cancel()
             
         logger.info("✅ Engraving Service shutdown complete")
         
@@ -233,142 +261,288 @@ async def shutdown_event():
         logger.error(f"❌ Shutdown error: {e}")
 
 # Original Project API Endpoints
+def latest_manufactured_items() -> List[Dict[str, Any]]:
+    """Default items for a job without "items" / "uids": the latest 50 manufactured items."""
+    # Get manufactured items from database (same as Generate QR service)
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT DISTINCT i.uid, i.component, i.lot, i.created_at
+            FROM items i
+            JOIN statuses s ON i.uid = s.uid
+            WHERE s.status = 'Manufactured' 
+            ORDER BY i.created_at DESC 
+            LIMIT 50
+        """)
+        manufactured_items = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return manufactured_items
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Failed to get manufactured items: {e}")
+        return []
+
 @app.post("/engrave/start")
 async def start_engraving(request: Dict[str, Any]):
-    """Start engraving operation (original project API)."""
+    """Start (queue) an engraving job (original project API).
+
+    Optional "ordering": "changeover" groups items by component and lot (respecting item
+    "priority") to cut fixture swaps; the response's "ordering" report compares it with FIFO.
+    Jobs run alongside each other; a job with a higher "priority" (default 0) preempts
+    lower-priority jobs at the next item boundary, and they resume once it is done.
+    """
     try:
-        global engraving_state
-        
-        if engraving_state["status"] == "running":
-            return {"error": "Engraving is already running"}, 400
-        
-        uids = request.get("uids", [])
         simulate = request.get("simulate", True)
         delay_seconds = request.get("delay_seconds", 1.0)
+        try:
+            priority = int(request.get("priority", 0))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="priority must be an integer")
         
-        if not uids:
-            # Get manufactured items from database (same as Generate QR service)
-            try:
-                conn = get_db_connection()
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute("""
-                    SELECT DISTINCT i.uid 
-                    FROM items i
-                    JOIN statuses s ON i.uid = s.uid
-                    WHERE s.status = 'Manufactured' 
-                    ORDER BY i.created_at DESC 
-                    LIMIT 50
-                """)
-                manufactured_items = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                items = [{"uid": item["uid"]} for item in manufactured_items]
-            except Exception as e:
-                logger.error(f"❌ Failed to get manufactured items: {e}")
-                items = []
-        else:
-            items = [{"uid": uid} for uid in uids]
-        
+        items = await run_db(engraving_job_items, request, latest_manufactured_items)
         if not items:
             return {"error": "No items to engrave"}
+        try:
+            items, ordering = plan_engraving_job(engraving_line, request, items)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Initialize engraving state
-        engraving_state.update({
-            "status": "running",
-            "items": items,
-            "processed_count": 0,
-            "total_count": len(items),
-            "start_time": datetime.utcnow(),
-            "current_item": None,
-            "simulate": simulate,
-            "delay_seconds": delay_seconds
-        })
-        
-        logger.info(f"🔥 Started engraving job with {len(items)} items (simulate={simulate})")
+        job_id, error = await run_db(engraving_line.start_job, items, simulate=simulate,
+                                     delay_seconds=delay_seconds, priority=priority)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
         
         return {
             "ok": True,
             "message": "Engraving started",
+            "job_id": job_id,
+            "priority": priority,
             "total_items": len(items),
-            "simulate": simulate
+            "stations": len([s for s in engraving_line.stations.values() if s.enabled]),
+            "simulate": simulate,
+            "ordering": ordering
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to start engraving: {e}")
         return {"error": f"Failed to start engraving: {str(e)}"}, 500
 
+@app.post("/engrave/plan")
+async def plan_engraving(request: Dict[str, Any]):
+    """Preview a job's ordering and the estimated changeover time saved vs FIFO (nothing is started)."""
+    request = {"ordering": "changeover", **request}
+    items = await run_db(engraving_job_items, request, latest_manufactured_items)
+    if not items:
+        raise HTTPException(status_code=400, detail="No items to engrave")
+    try:
+        items, ordering = plan_engraving_job(engraving_line, request, items)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ordering": ordering, "order": [item["uid"] for item in items]}
+
+@app.post("/engrave/simulate")
+async def simulate_engraving(request: Dict[str, Any]):
+    """Project throughput, queue lengths and station utilization on a virtual clock (nothing is engraved).
+
+    Body: "count" (synthetic lot; "components", "lot_size") or "items"/"uids", plus optional "stations",
+    "burn_time" ({"kind": "normal", "mean": 2.0, "stddev": 0.1}), "fault_rate", "retries",
+    "changeover", "ordering", "arrival_rate_per_hour" and "seed".
+    """
+    try:
+        return await run_db(simulate_engraving_job, engraving_line, request, latest_manufactured_items)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/engrave/layout")
+async def engraving_layout(request: Dict[str, Any]):
+    """Compare QR layouts (version, error correction, mask) by estimated burn time for a part or lot.
+
+    Body: "uid" or "uids" (up to 200), optional "component" and "policy" overrides.
+    """
+    uids = request.get("uids") or ([request["uid"]] if request.get("uid") else [])
+    if not uids:
+        raise HTTPException(status_code=400, detail="uid or uids is required")
+    if len(uids) > 200:
+        raise HTTPException(status_code=400, detail="At most 200 uids per layout report")
+    try:
+        # Rendering every variant is CPU work; keep it off the event loop
+        return await run_db(layout_optimizer.report, uids, request.get("component"), request.get("policy"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/engrave/toolpath/{uid}")
+async def engraving_toolpath(uid: str, strategy: str = "rectangles", gcode: bool = False):
+    """Laser toolpath for an item's burn geometry, with cycle times of every strategy."""
+    def plan():
+        geometry = prepare_engraving(uid)
+        toolpath = build_toolpath(geometry, strategy)
+        result = {
+            "uid": uid,
+            "strategy": strategy,
+            "module_mm": geometry.module_mm,
+            "timing_model": simulated_engraver.info(),
+            "strategies": compare_strategies(geometry, engraver=simulated_engraver)
+        }
+        if gcode:
+            result["gcode"] = toolpath.gcode(simulated_engraver)
+        return result
+
+    try:
+        return await run_db(plan)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def control_job(action, job_id):
+    """Run stop/pause/resume for one job (or all when job_id is None)."""
+    try:
+        return await run_db(action, job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
 @app.post("/engrave/stop")
-async def stop_engraving():
-    """Stop engraving operation (original project API)."""
-    global engraving_state
-    
-    engraving_state["status"] = "stopped"
-    engraving_state["current_item"] = None
-    
-    logger.info("🛑 Engraving stopped")
-    
+async def stop_engraving(job_id: Optional[int] = None):
+    """Stop one job (?job_id=) or every active job (original project API)."""
+    await control_job(engraving_line.stop, job_id)
+    await flush_status_writer()
     return {"ok": True, "message": "Engraving stopped"}
 
 @app.post("/engrave/pause")
-async def pause_engraving():
-    """Pause engraving operation (original project API)."""
-    global engraving_state
-    
-    if engraving_state["status"] == "running":
-        engraving_state["status"] = "paused"
-        engraving_state["pause_time"] = datetime.utcnow()
-        logger.info("⏸️ Engraving paused")
+async def pause_engraving(job_id: Optional[int] = None):
+    """Pause one job (?job_id=) or every running job (original project API)."""
+    if await control_job(engraving_line.pause, job_id):
+        await flush_status_writer()
         return {"ok": True, "message": "Engraving paused"}
     
     return {"error": "No active engraving to pause"}, 400
 
 @app.post("/engrave/resume")
-async def resume_engraving():
-    """Resume engraving operation (original project API)."""
-    global engraving_state
-    
-    if engraving_state["status"] == "paused":
-        engraving_state["status"] = "running"
-        engraving_state["pause_time"] = None
-        logger.info("▶️ Engraving resumed")
+async def resume_engraving(job_id: Optional[int] = None):
+    """Resume one job (?job_id=) or every paused job (original project API)."""
+    if await control_job(engraving_line.resume, job_id):
         return {"ok": True, "message": "Engraving resumed"}
     
     return {"error": "No paused engraving to resume"}, 400
 
 @app.get("/engrave/status")
 async def get_engraving_status():
-    """Get current engraving status (original project API)."""
-    global engraving_state
-    
-    # Calculate progress
-    processed = engraving_state.get("processed_count", 0)
-    total = engraving_state.get("total_count", 0)
-    progress = (processed / total * 100) if total > 0 else 0
-    
-    # Calculate elapsed time
-    start_time = engraving_state.get("start_time")
-    elapsed_seconds = 0
-    if start_time:
-        elapsed_seconds = (datetime.utcnow() - start_time).total_seconds()
-    
-    status = {
-        "status": engraving_state["status"],
-        "current_item": engraving_state.get("current_item"),
-        "processed_count": processed,
-        "total_count": total,
-        "progress_percent": round(progress, 1),
-        "elapsed_seconds": round(elapsed_seconds, 1),
-        "simulate": engraving_state.get("simulate", True),
-        "delay_seconds": engraving_state.get("delay_seconds", 1.0)
-    }
-    
-    return status
+    """Get current engraving status, per-station detail and aggregate throughput."""
+    return engraving_line.status()
 
-@app.get("/items/manufactured")
-async def get_manufactured_items(limit: int = 50):
-    """Get manufactured items (original project API)."""
+@app.get("/engrave/metrics")
+async def engraving_metrics():
+    """Rolling throughput, per-phase latency percentiles (queue wait, prepare, burn, write-back) and utilization."""
+    report = engraving_line.metrics_report()
+    # write_back only covers queueing the status row; the group commit itself happens in status_writer
+    report["status_writer"] = status_writer.stats()
+    return report
+
+@app.get("/engrave/dead-letter")
+async def engraving_dead_letters(limit: int = 100, job_id: Optional[int] = None):
+    """Items that failed every attempt (newest first), pending retries and failure counts by reason."""
+    return engraving_line.dead_letters(min(limit, 500), job_id=job_id)
+
+@app.websocket("/engrave/events")
+async def engraving_events(websocket: WebSocket):
+    """Push engraving progress (item_started, item_finished, progress, state, station) to a viewer."""
+    await websocket.accept()
+    viewer = asyncio.Queue(maxsize=500)
+    event_viewers.add(viewer)
+    try:
+        await websocket.send_text(json.dumps({"type": "snapshot", "data": engraving_line.status()}, default=str))
+        while True:
+            try:
+                event = await asyncio.wait_for(viewer.get(), timeout=15)
+            except asyncio.TimeoutError:
+                await websocket.send_text(json.dumps({"type": "ping"}))
+                continue
+            if event is None:
+                await websocket.close(code=1013)
+                break
+            await websocket.send_text(event.json)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_viewers.discard(viewer)
+
+@app.get("/engrave/stations")
+async def list_engraving_stations():
+    """List registered engraving stations."""
+    status = engraving_line.status()
+    return {"stations": status["stations"], "throughput": status["throughput"]}
+
+@app.post("/engrave/stations")
+async def add_engraving_station(request: Dict[str, Any]):
+    """Register a new engraving station: { "id": "laser-4" }"""
+    station_id = (request.get("id") or "").strip()
+    if not station_id:
+        raise HTTPException(status_code=400, detail="id is required")
+    try:
+        engraving_line.add_station(station_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ok": True, "message": f"Station {station_id} registered"}
+
+@app.delete("/engrave/stations/{station_id}")
+async def remove_engraving_station(station_id: str):
+    """Unregister an idle engraving station."""
+    try:
+        engraving_line.remove_station(station_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown station '{station_id}'")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ok": True, "message": f"Station {station_id} removed"}
+
+@app.post("/engrave/stations/{station_id}/{action}")
+async def set_engraving_station_enabled(station_id: str, action: str):
+    """Enable or disable a station; a disabled station finishes its current item and takes no more."""
+    if action not in ("enable", "disable"):
+        raise HTTPException(status_code=400, detail="action must be 'enable' or 'disable'")
+    try:
+        # Disabling hands lookahead items back to the job store (a DB write)
+        await run_db(engraving_line.set_station_enabled, station_id, action == "enable")
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown station '{station_id}'")
+    return {"ok": True, "message": f"Station {station_id} {action}d"}
+
+@app.get("/engrave/jobs")
+async def list_engraving_jobs(limit: int = 20):
+    """List recent engraving jobs with per-state item counts (durable queue only)."""
+    if not engraving_line.store.durable:
+        raise HTTPException(status_code=400, detail="Durable engraving queue is disabled")
+    jobs = await run_db(engraving_line.store.list_jobs, min(max(limit, 1), 100))
+    return {"jobs": jobs, "current_job_id": engraving_line.job_id}
+
+@app.get("/engrave/jobs/{job_id}")
+async def get_engraving_job(job_id: int, state: Optional[str] = None):
+    """List a job's items, optionally filtered by ?state=uncertain etc."""
+    if not engraving_line.store.durable:
+        raise HTTPException(status_code=400, detail="Durable engraving queue is disabled")
+    items = await run_db(engraving_line.store.get_job_items, job_id, state)
+    if not items:
+        raise HTTPException(status_code=404, detail="Job not found or no matching items")
+    return {"job_id": job_id, "items": items, "count": len(items)}
+
+@app.post("/engrave/jobs/{job_id}/items/{uid}/resolve")
+async def resolve_engraving_item(job_id: int, uid: str, request: Dict[str, Any]):
+    """Resolve an item interrupted mid-burn: { "engraved": true } marks it done, false re-queues it."""
+    if not engraving_line.store.durable:
+        raise HTTPException(status_code=400, detail="Durable engraving queue is disabled")
+    engraved = request.get("engraved")
+    if not isinstance(engraved, bool):
+        raise HTTPException(status_code=400, detail="engraved (true/false) is required")
+    if not await run_db(engraving_line.resolve_item, job_id, uid, engraved):
+        raise HTTPException(status_code=404, detail=f"No uncertain item {uid} in job {job_id}")
+    return {"ok": True, "message": f"{uid} marked {'engraved' if engraved else 'for re-engraving'}"}
+
+def fetch_manufactured_items(limit: int) -> List[Dict[str, Any]]:
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         cursor.execute("""
             SELECT DISTINCT i.uid, i.component, i.vendor, i.lot, 
@@ -382,8 +556,31 @@ async def get_manufactured_items(limit: int = 50):
         """, (limit,))
         items = cursor.fetchall()
         cursor.close()
+        return items
+    finally:
+        conn.close()
+
+def insert_status_row(uid: str, status: str, location: str, note: str):
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO statuses (uid, status, location, note, updated_at)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (uid, status, location, note, datetime.now()))
+        conn.commit()
+        cursor.close()
+    finally:
         conn.close()
+
+@app.get("/items/manufactured")
+async def get_manufactured_items(limit: int = 50):
+    """Get manufactured items (original project API)."""
+    try:
+        items = await run_db(fetch_manufactured_items, limit)
         return {"success": True, "items": items}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get manufactured items: {e}")
         raise HTTPException(status_code=500, detail="Failed to get manufactured items")
@@ -400,22 +597,13 @@ async def update_item_status(request: Dict[str, Any]):
         if not uid or not status:
             raise HTTPException(status_code=400, detail="uid and status are required")
         
-        # Insert status into database (same as Generate QR service)
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Insert status into statuses table
-        cursor.execute("""
-            INSERT INTO statuses (uid, status, location, note, updated_at)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (uid, status, location, note, datetime.now()))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+        # Insert status into statuses table (same as Generate QR service)
+        await run_db(insert_status_row, uid, status, location, note)
         
         return {"ok": True, "message": "Status updated"}
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to update status: {e}")
         return {"error": f"Failed to update status: {str(e)}"}, 500
@@ -427,7 +615,7 @@ async def health_check():
         "status": "healthy",
         "service": "engraving-service",
         "timestamp": datetime.utcnow().isoformat(),
-        "engraving_status": engraving_state["status"]
+        "engraving_status": engraving_line.overall_status()
     }
 
 @app.get("/stats")
@@ -438,7 +626,9 @@ async def get_service_stats():
         "version": "1.0.0",
         "status": "running",
         "database": "mysql",
-        "engraving_state": engraving_state,
+        "engraving_state": engraving_line.status(),
+        "engraving_events": {**engraving_line.events.stats(), "websocket_viewers": len(event_viewers)},
+        "status_writer": status_writer.stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -0,0 +1,232 @@
+"""
+Transactional status writes shared by the bulk, range and sync endpoints.
+
+Each function takes an open connection, runs its statements in one explicit
+transaction (DB_CONFIG runs in autocommit) and commits; on any error it rolls
+back and re-raises, so the caller maps the error to a response. Nothing here
+imports Flask or mysql-connector, which keeps the transaction logic testable
+against a scripted connection.
+"""
+
+from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 500  # rows per multi-row INSERT / IN list
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+def _is_unknown_column(error):
+    return "Unknown column" in str(error)
+
+def _update_current_status(cur, sql, params):
+    """Run an items.current_status UPDATE; skipped when the column does not exist."""
+    try:
+        cur.execute(sql, params)
+    except Exception as e:
+        if not _is_unknown_column(e):
+            raise
+        logger.info("current_status column not found in items table, skipping update")
+        return False
+    return True
+
+def _insert_statuses(cur, rows):
+    for start in range(0, len(rows), CHUNK):
+        # mysql-connector turns executemany on INSERT ... VALUES into one multi-row INSERT
+        cur.executemany("""
+        INSERT INTO statuses (uid, status, location, note, updated_at, employee_id)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """, rows[start:start + CHUNK])
+
+def set_status_bulk(conn, uids, new_status, location, note, employee_id, updated_at):
+    """Write one status for every existing uid in uids (unique, non-blank).
+
+    Returns the uids that exist, in input order; the others are skipped.
+    """
+    cur = conn.cursor()
+    conn.start_transaction()
+    try:
+        existing = set()
+        for start in range(0, len(uids), CHUNK):
+            chunk = uids[start:start + CHUNK]
+            cur.execute(f"SELECT uid FROM items WHERE uid IN ({_placeholders(chunk)})", chunk)
+            existing.update(row[0] for row in cur.fetchall())
+        valid = [uid for uid in uids if uid in existing]
+
+        _insert_statuses(cur, [(uid, new_status, location, note, updated_at, employee_id) for uid in valid])
+        for start in range(0, len(valid), CHUNK):
+            chunk = valid[start:start + CHUNK]
+            if not _update_current_status(
+                    cur, f"UPDATE items SET current_status=%s WHERE uid IN ({_placeholders(chunk)})",
+                    [new_status] + chunk):
+                break
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return valid
+
+def lot_range_filter(component, vendor, lot, first_serial=None, last_serial=None):
+    """WHERE clause (on items aliased i) and params for a lot, optionally a serial range (inclusive)."""
+    # make_uid() prefix keeps the scan on the primary key; serials are the uid's last part
+    prefix = f"{component}-{vendor}-{lot}-".replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    where = "i.component=%s AND i.vendor=%s AND i.lot=%s AND i.uid LIKE %s"
+    params = [component, vendor, lot, prefix + "%"]
+    if first_serial is not None:
+        where += " AND CAST(SUBSTRING_INDEX(i.uid, '-', -1) AS UNSIGNED) >= %s"
+        params.append(first_serial)
+    if last_serial is not None:
+        where += " AND CAST(SUBSTRING_INDEX(i.uid, '-', -1) AS UNSIGNED) <= %s"
+        params.append(last_serial)
+    return where, params
+
+def set_status_range(conn, component, vendor, lot, new_status, location, note, employee_id, updated_at,
+                     first_serial=None, last_serial=None):
+    """Write one status for a lot (or a serial range of it) on the server; returns items updated.
+
+    The status rows are written with INSERT ... SELECT and current_status with
+    one UPDATE, so no uids cross the wire.
+    """
+    where, params = lot_range_filter(component, vendor, lot, first_serial, last_serial)
+    cur = conn.cursor()
+    conn.start_transaction()
+    try:
+        cur.execute(f"""
+        INSERT INTO statuses (uid, status, location, note, updated_at, employee_id)
+        SELECT i.uid, %s, %s, %s, %s, %s
+        FROM items i
+        WHERE {where}
+        """, [new_status, location, note, updated_at, employee_id] + params)
+        updated = cur.rowcount
+        _update_current_status(cur, f"UPDATE items i SET i.current_status=%s WHERE {where}", [new_status] + params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return updated
+
+def parse_client_timestamp(value, now):
+    """Client event time as naive UTC, clamped to now; None when absent. Raises ValueError."""
+    if not value:
+        return None
+    ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(ts, now)
+
+def apply_sync_events(conn, device_id, events, employee_id, check_role, now):
+    """Apply an ordered batch of offline status events; returns (results, applied).
+
+    check_role(employee_id, new_status) returns an error string or None.
+    results holds one dict per event ("applied", "rejected" or "duplicate");
+    applied lists (uid, status, location, note, updated_at) for the index.
+    The sync_events rows are written before the status rows, so an upload
+    racing another one with the same keys fails on the unique key (the
+    error propagates) before any status is written.
+    """
+    cur = conn.cursor(dictionary=True)
+    conn.start_transaction()
+    try:
+        events = [event if isinstance(event, dict) else {} for event in events]
+        keys = list({str(e.get("idempotency_key") or "").strip() for e in events} - {""})
+        uids = list({str(e.get("uid") or "").strip() for e in events} - {""})
+
+        # Replays: keys already recorded by an earlier upload
+        seen = {}
+        for start in range(0, len(keys), CHUNK):
+            chunk = keys[start:start + CHUNK]
+            cur.execute(f"""
+                SELECT idempotency_key, uid, status, result, error FROM sync_events
+                WHERE idempotency_key IN ({_placeholders(chunk)})
+            """, chunk)
+            seen.update((row["idempotency_key"], row) for row in cur.fetchall())
+
+        existing = set()
+        for start in range(0, len(uids), CHUNK):
+            chunk = uids[start:start + CHUNK]
+            cur.execute(f"SELECT uid FROM items WHERE uid IN ({_placeholders(chunk)})", chunk)
+            existing.update(row["uid"] for row in cur.fetchall())
+
+        results, status_rows, sync_rows, applied = [], [], [], []
+        for event in events:
+            key = str(event.get("idempotency_key") or "").strip()
+            uid = str(event.get("uid") or "").strip()
+            new_status = event.get("new_status") or event.get("status")
+            event_employee = event.get("employee_id") or employee_id
+            result = {"idempotency_key": key, "uid": uid}
+            results.append(result)
+            if not key:
+                result.update({"result": "rejected", "error": "idempotency_key is required"})
+                continue
+            if key in seen:
+                original = seen[key]
+                result.update({"result": "duplicate", "original_result": original["result"]})
+                if original.get("error"):
+                    result["error"] = original["error"]
+                continue
+
+            error = None
+            client_ts = None
+            try:
+                client_ts = parse_client_timestamp(event.get("client_timestamp"), now)
+            except ValueError:
+                error = "Invalid client_timestamp"
+            if not error and (not uid or not new_status):
+                error = "uid and new_status are required"
+            elif not error and uid not in existing:
+                error = "UID not found in database"
+            elif not error and event_employee:
+                error = check_role(event_employee, new_status)
+
+            outcome = "rejected" if error else "applied"
+            result["result"] = outcome
+            if error:
+                result["error"] = error
+            else:
+                location = event.get("location", "MobileApp")
+                note = event.get("note", "")
+                updated_at = client_ts or now
+                status_rows.append((uid, new_status, location, note, updated_at, event_employee))
+                applied.append((uid, new_status, location, note, updated_at))
+            # Rejections are recorded too, so a replay gets the same answer
+            sync_rows.append((key, device_id, uid or None, new_status, outcome, error, client_ts, now))
+            seen[key] = {"result": outcome, "error": error}
+
+        # Keys first: a concurrent upload of the same keys waits here and then fails
+        for start in range(0, len(sync_rows), CHUNK):
+            cur.executemany("""
+            INSERT INTO sync_events
+            (idempotency_key, device_id, uid, status, result, error, client_timestamp, received_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            """, sync_rows[start:start + CHUNK])
+
+        _insert_statuses(cur, status_rows)
+
+        touched = list(dict.fromkeys(row[0] for row in applied))
+        for start in range(0, len(touched), CHUNK):
+            chunk = touched[start:start + CHUNK]
+            # current_status follows the newest status row, whichever device wrote it
+            if not _update_current_status(cur, f"""
+                    UPDATE items i
+                    JOIN (
+                        SELECT uid, status,
+                               ROW_NUMBER() OVER (PARTITION BY uid ORDER BY updated_at DESC, id DESC) as rn
+                        FROM statuses
+                        WHERE uid IN ({_placeholders(chunk)})
+                    ) latest ON latest.uid = i.uid AND latest.rn = 1
+                    SET i.current_status = latest.status
+                    """, chunk):
+                break
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return results, applied
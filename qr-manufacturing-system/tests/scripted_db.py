@@ -0,0 +1,54 @@
+"""Scripted stand-in for a mysql.connector connection (no database needed)."""
+
+
+class ScriptedCursor:
+    def __init__(self, conn, dictionary=False):
+        self.conn = conn
+        self.rows = []
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        self.conn.log.append((" ".join(sql.split()), tuple(params)))
+        result = self.conn.results.pop(0) if self.conn.results else {}
+        if "error" in result:
+            raise result["error"]
+        self.rows = list(result.get("rows", []))
+        self.rowcount = result.get("rowcount", len(self.rows))
+
+    def executemany(self, sql, rows):
+        self.execute(sql, [tuple(row) for row in rows])
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class ScriptedConnection:
+    """Records SQL and transaction calls; each execute() consumes the next scripted result."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.log = []
+        self.events = []
+
+    def cursor(self, dictionary=False):
+        return ScriptedCursor(self, dictionary)
+
+    def start_transaction(self):
+        self.events.append("start")
+
+    def commit(self):
+        self.events.append("commit")
+
+    def rollback(self):
+        self.events.append("rollback")
+
+    def close(self):
+        self.events.append("close")
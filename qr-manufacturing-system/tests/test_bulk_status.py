@@ -0,0 +1,52 @@
+"""Bulk status writes commit as one transaction or not at all (scripted connection)."""
+
+from datetime import datetime
+
+import pytest
+
+import status_updates
+from scripted_db import ScriptedConnection
+from status_updates import set_status_bulk
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def writes(conn):
+    return [sql for sql, _ in conn.log if sql.startswith(("INSERT", "UPDATE"))]
+
+
+def bulk(conn, uids):
+    return set_status_bulk(conn, uids, "Received", "Dock", "", "E1", NOW)
+
+
+def test_bulk_commits_once_and_skips_unknown_uids():
+    conn = ScriptedConnection([{"rows": [("U1",)]}, {"rowcount": 1}, {"rowcount": 1}])
+    assert bulk(conn, ["U1", "missing"]) == ["U1"]
+    insert, update = writes(conn)
+    assert "INSERT INTO statuses" in insert and "UPDATE items SET current_status" in update
+    assert conn.log[1][1] == (("U1", "Received", "Dock", "", NOW, "E1"),)
+    assert conn.events == ["start", "commit"]
+
+
+def test_bulk_rolls_back_when_a_later_statement_fails():
+    conn = ScriptedConnection([{"rows": [("U1",), ("U2",)]}, {"rowcount": 2},
+                               {"error": RuntimeError("Lock wait timeout exceeded")}])
+    with pytest.raises(RuntimeError):
+        bulk(conn, ["U1", "U2"])
+    assert conn.events == ["start", "rollback"]
+
+
+def test_bulk_without_current_status_column_still_commits():
+    conn = ScriptedConnection([{"rows": [("U1",)]}, {"rowcount": 1},
+                               {"error": RuntimeError("1054: Unknown column 'current_status'")}])
+    assert bulk(conn, ["U1"]) == ["U1"]
+    assert conn.events == ["start", "commit"]
+
+
+def test_bulk_chunks_lookups_and_writes(monkeypatch):
+    monkeypatch.setattr(status_updates, "CHUNK", 2)
+    uids = ["U1", "U2", "U3"]
+    conn = ScriptedConnection([{"rows": [("U1",), ("U2",)]}, {"rows": [("U3",)]}])
+    assert bulk(conn, uids) == uids
+    assert [sql.split()[0] for sql, _ in conn.log] == ["SELECT", "SELECT", "INSERT", "INSERT", "UPDATE", "UPDATE"]
+    assert conn.events == ["start", "commit"]
@@ -0,0 +1,113 @@
+"""SimulatedEngraver, and TcpEngraver against the device_server stand-in."""
+
+import socket
+import time
+
+import pytest
+
+from engraving.device_server import EngraverDeviceServer
+from engraving.drivers import EngraverError, SimulatedEngraver, TcpEngraver, make_driver
+from engraving.geometry import geometry_from_matrix
+from engraving.job_store import MemoryJobStore
+from engraving.line import EngravingLine
+
+MATRIX = [
+    [True, True, False, True],
+    [False, True, True, False],
+    [True, False, False, True],
+    [True, True, True, True],
+]
+
+
+def geometry(uid="ERC-V010-L1-00001"):
+    return geometry_from_matrix(uid, MATRIX)
+
+
+def fast_model(**kwargs):
+    return SimulatedEngraver(time_scale=0.001, jitter=0.0, seed=1, **kwargs)
+
+
+@pytest.fixture
+def device():
+    server = EngraverDeviceServer(port=0, model=fast_model())
+    host, port = server.start()
+    yield server, host, port
+    server.stop()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_simulated_estimate_and_faults():
+    g = geometry()
+    estimate = fast_model().estimate(g)
+    assert estimate["total"] == pytest.approx(
+        estimate["setup"] + estimate["mark"] + estimate["jump"] + estimate["switching"])
+    assert estimate["mark"] > 0 and estimate["jump"] > 0
+    assert fast_model().engrave(g) is True
+    assert fast_model(fault_rate=1.0).engrave(g) is False
+
+
+def test_tcp_engrave_round_trip(device):
+    server, host, port = device
+    driver = TcpEngraver(host, port)
+    try:
+        assert driver.ping()
+        assert driver.engrave(geometry("A-1")) is True
+        assert driver.engrave(geometry("A-2"), min_seconds=0.5) is True  # connection reused
+        assert server.jobs_received == 2
+    finally:
+        driver.close()
+
+
+def test_tcp_device_fault_is_false(device):
+    server, host, port = device
+    server.model = fast_model(fault_rate=1.0)
+    driver = TcpEngraver(host, port)
+    try:
+        assert driver.engrave(geometry()) is False
+    finally:
+        driver.close()
+
+
+def test_tcp_unreachable_raises_with_reason():
+    driver = TcpEngraver("127.0.0.1", free_port(), connect_timeout=1.0)
+    with pytest.raises(EngraverError) as error:
+        driver.engrave(geometry())
+    assert error.value.reason == "unreachable"
+
+
+def test_make_driver():
+    assert isinstance(make_driver("simulated"), SimulatedEngraver)
+    tcp = make_driver("tcp://127.0.0.1:9100")
+    assert (tcp.host, tcp.port) == ("127.0.0.1", 9100)
+    for spec in ("tcp://nohost", "serial:///dev/ttyUSB0"):
+        with pytest.raises(ValueError):
+            make_driver(spec)
+
+
+def test_line_engraves_through_tcp_driver(device):
+    server, host, port = device
+    driver = TcpEngraver(host, port)
+    results = []
+
+    def engrave(uid, simulate, delay_seconds):
+        return driver.engrave(geometry(uid))
+
+    line = EngravingLine(engrave, on_result=lambda uid, ok, *rest: results.append((uid, ok)),
+                         station_names=["S1", "S2"], store=MemoryJobStore())
+    try:
+        job_id, error = line.start_job([{"uid": f"ERC-{n}"} for n in range(6)])
+        assert error is None
+        deadline = time.monotonic() + 10
+        while line.jobs[job_id].status != "completed" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert line.jobs[job_id].status == "completed"
+        assert sorted(results) == [(f"ERC-{n}", True) for n in range(6)]
+        assert server.jobs_received == 6
+    finally:
+        line.shutdown()
+        driver.close()
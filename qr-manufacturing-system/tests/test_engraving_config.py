@@ -0,0 +1,25 @@
+"""Job helpers shared by both services (engraving/config.py)."""
+
+from engraving import config
+
+
+class FakeLine:
+    def __init__(self, enabled):
+        self.stations = {f"S{n}": type("Station", (), {"enabled": on})() for n, on in enumerate(enabled)}
+
+
+def test_job_items_come_from_the_request_before_the_default_query():
+    def fetch():
+        raise AssertionError("default items queried")
+
+    assert config.engraving_job_items({"items": [{"uid": "A", "priority": 2}, {"priority": 1}]}, fetch) == \
+        [{"uid": "A", "priority": 2}]
+    assert config.engraving_job_items({"uids": ["A"]}, fetch) == [{"uid": "A"}]
+    rows = [{"uid": "A", "component": "ERC", "lot": "L1", "created_at": None}]
+    assert config.engraving_job_items({}, lambda: rows) == [{"uid": "A", "component": "ERC", "lot": "L1"}]
+
+
+def test_simulation_defaults_to_the_enabled_station_count():
+    report = config.simulate_engraving_job(FakeLine([True, False, True]), {"count": 10, "seed": 1}, list)
+    assert report["stations"] == 2
+    assert config.enabled_station_count(FakeLine([False])) == 1
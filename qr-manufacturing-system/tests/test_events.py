@@ -0,0 +1,24 @@
+import pytest
+
+from engraving.events import EventBroadcaster, TooManySubscribers
+
+
+def test_subscriber_cap_rejects_and_frees_slots():
+    events = EventBroadcaster()
+    first = events.subscribe(max_subscribers=2)
+    events.subscribe(max_subscribers=2)
+    with pytest.raises(TooManySubscribers):
+        events.subscribe(max_subscribers=2)
+    first.close()
+    first.close()  # closing twice (generator finally + response close) is harmless
+    events.subscribe(max_subscribers=2)
+    assert events.stats()["subscribers"] == 2
+
+
+def test_replay_after_last_event_id():
+    events = EventBroadcaster()
+    for n in range(3):
+        events.publish("progress", {"n": n})
+    sub = events.subscribe(last_event_id=1)
+    assert [sub.get(timeout=0).data["n"] for _ in range(2)] == [1, 2]
+    assert sub.get(timeout=0) is None
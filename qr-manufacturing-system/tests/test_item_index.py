@@ -0,0 +1,146 @@
+import sys
+import threading
+from array import array
+from datetime import date, datetime
+
+from item_index import ItemIndex
+
+
+class FakeCursor:
+    """Answers the index's refresh queries from in-memory tables."""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        if "FROM items" in sql:
+            self.rows = [row for row in self.db["items"] if row[6] >= params[0]]
+        elif "FROM statuses WHERE id >" in sql:
+            self.rows = [row for row in self.db["statuses"] if row[0] > params[0]]
+        else:
+            raise AssertionError(sql)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+
+def loaded_index(overlap_status_ids=0):
+    index = ItemIndex(overlap_status_ids=overlap_status_ids)
+    index.add_item("ERC-V010-L1-00001", "ERC", "V010", "L1", date(2025, 1, 1), 5, datetime(2025, 1, 1),
+                   status="Manufactured", status_updated_at=datetime(2025, 1, 1))
+    index.ready = True
+    index.status_id_watermark = 10
+    return index
+
+
+def test_refresh_picks_up_status_with_old_client_timestamp():
+    index = loaded_index()
+    db = {"items": [], "statuses": [
+        # Offline upload: a new id, but updated_at is the scanner's (old) event time
+        (11, "ERC-V010-L1-00001", "Received", "Depot", "", datetime(2025, 1, 2)),
+    ]}
+    assert index.refresh(FakeConn(db)) == (0, 1)
+    assert index.get("ERC-V010-L1-00001")["status"] == "Received"
+    assert index.status_id_watermark == 11
+
+
+def test_refresh_rereads_ids_committed_late():
+    index = loaded_index(overlap_status_ids=5)
+    db = {"items": [], "statuses": [(12, "ERC-V010-L1-00001", "Received", "Depot", "", datetime(2025, 1, 2))]}
+    index.refresh(FakeConn(db))
+    # id 11 belonged to a transaction that committed after id 12 was read
+    db["statuses"].append((11, "ERC-V010-L1-00001", "Inspected", "Depot", "", datetime(2025, 1, 3)))
+    index.refresh(FakeConn(db))
+    assert index.get("ERC-V010-L1-00001")["status"] == "Inspected"
+
+
+def test_memory_usage_matches_a_full_recount():
+    index = loaded_index()
+    index.add_item("odd-uid", "PAD", "V011", "L2", date(2025, 1, 1), 3, datetime(2025, 1, 2), note="scratched")
+    usage = index.memory_usage()
+    keys = sys.getsizeof(index._rows) + sum(sys.getsizeof(k) for k in index._rows)
+    keys += sys.getsizeof(index._lot_rows) + sum(sys.getsizeof(k) + sys.getsizeof(array("I")) + 4 * len(rows)
+                                                 for k, rows in index._lot_rows.items())
+    dictionaries = sum(sys.getsizeof(d.values) + sys.getsizeof(d.codes)
+                       + sum(sys.getsizeof(v) for v in d.values if v is not None)
+                       for d in (index.components, index.vendors, index.lots,
+                                 index.statuses, index.locations, index.notes))
+    odd = (sys.getsizeof(index._odd_uids) + sys.getsizeof(index._odd_uid_list)
+           + sum(sys.getsizeof(u) for u in index._odd_uids))
+    assert usage["key_bytes"] == keys
+    assert usage["dictionary_bytes"] == dictionaries + odd
+
+
+def lot_index(count=10):
+    index = ItemIndex()
+    for serial in range(1, count + 1):
+        index.add_item(f"ERC-V010-L1-{serial:05d}", "ERC", "V010", "L1", date(2025, 1, 1), 5, datetime(2025, 1, 1))
+    index.add_item("PAD-V010-L1-00001", "PAD", "V010", "L1", date(2025, 1, 1), 5, datetime(2025, 1, 1))
+    index.add_item("odd-uid", "ERC", "V010", "L1", date(2025, 1, 1), 5, datetime(2025, 1, 1))
+    return index
+
+
+def test_apply_status_range_touches_only_the_lot_and_range():
+    index = lot_index()
+    assert index.apply_status_range("ERC", "V010", "L1", "Received", first_serial=3, last_serial=5) == 3
+    assert [index.get(f"ERC-V010-L1-{s:05d}")["status"] for s in (2, 3, 5, 6)] == [None, "Received", "Received", None]
+    # An open-ended range skips uids without a serial; a whole-lot update includes them
+    assert index.apply_status_range("ERC", "V010", "L1", "Inspected", first_serial=9) == 2
+    assert index.apply_status_range("ERC", "V010", "L1", "Installed") == 11
+    assert index.get("odd-uid")["status"] == "Installed"
+    assert index.get("PAD-V010-L1-00001")["status"] is None
+    assert index.apply_status_range("ERC", "V010", "L9", "Installed") == 0
+
+
+def test_apply_status_range_does_not_walk_other_lots(monkeypatch):
+    index = lot_index()
+    for serial in range(1, 1001):
+        index.add_item(f"ERC-V010-L2-{serial:05d}", "ERC", "V010", "L2", date(2025, 1, 1), 5, datetime(2025, 1, 1))
+    monkeypatch.setattr(index, "lot", None)  # the range path must not scan the lot column
+    assert index.apply_status_range("ERC", "V010", "L1", "Received", first_serial=1, last_serial=10) == 10
+    assert index.apply_status_range("ERC", "V010", "L1", "Received") == 11
+
+
+def test_search_matches_uid_component_vendor_and_odd_uids():
+    index = lot_index()
+    assert [item["uid"] for item in index.search("l1-0001")] == ["ERC-V010-L1-00010"]
+    assert len(index.search("L1-0000")) == 10  # ERC 1-9 and PAD 1
+    assert len(index.search("pad")) == 1
+    assert [item["uid"] for item in index.search("odd")] == ["odd-uid"]
+    assert len(index.search("v010", component="PAD")) == 1
+    assert index.search("", status="Received") == []
+
+
+def test_search_scans_without_holding_the_lock(monkeypatch):
+    index = lot_index()
+    import item_index
+    free = []
+    nlargest = item_index.heapq.nlargest
+
+    def try_lock():
+        acquired = index._lock.acquire(blocking=False)
+        if acquired:
+            index._lock.release()
+        free.append(acquired)
+
+    def probe(*args, **kwargs):
+        probe_thread = threading.Thread(target=try_lock)
+        probe_thread.start()
+        probe_thread.join()
+        return nlargest(*args, **kwargs)
+
+    monkeypatch.setattr(item_index.heapq, "nlargest", probe)
+    assert len(index.search("erc")) == 11
+    assert free == [True]
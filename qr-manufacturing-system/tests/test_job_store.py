@@ -0,0 +1,159 @@
+"""MySQLJobStore claim/lease transitions against a scripted connection."""
+
+import logging
+
+import pytest
+
+from engraving.job_store import MySQLJobStore
+from scripted_db import ScriptedConnection
+
+
+def store_with(*results, lease_seconds=60):
+    conn = ScriptedConnection(results)
+    store = MySQLJobStore(lambda: conn, lease_seconds=lease_seconds)
+    store._schema_ready = True
+    return store, conn
+
+
+ITEM = {"uid": "ERC-1", "job_id": 3, "seq": 0, "item_id": 41, "failures": 0}
+
+
+def test_claim_leases_next_item_in_one_transaction():
+    store, conn = store_with({"rows": [{"id": 41, "seq": 0, "uid": "ERC-1", "failures": 2}]}, {"rowcount": 1})
+    item = store.claim(3, "S1")
+    assert item == {"uid": "ERC-1", "job_id": 3, "seq": 0, "item_id": 41, "failures": 2}
+    select, update = conn.log
+    assert "FOR UPDATE SKIP LOCKED" in select[0]
+    assert "state = 'claimed' AND lease_expires_at < UTC_TIMESTAMP()" in select[0]
+    assert "SET state = 'claimed'" in update[0]
+    assert update[1] == ("S1", store.owner, 60, 41)
+    assert conn.events == ["start", "commit", "close"]
+
+
+def test_claim_with_nothing_queued():
+    store, conn = store_with({"rows": []})
+    assert store.claim(3, "S1") is None
+    assert conn.events == ["start", "commit", "close"]
+
+
+def test_claim_rolls_back_on_error():
+    store, conn = store_with({"rows": [{"id": 41, "seq": 0, "uid": "ERC-1", "failures": 0}]},
+                             {"error": RuntimeError("lock wait timeout")})
+    with pytest.raises(RuntimeError):
+        store.claim(3, "S1")
+    assert conn.events == ["start", "rollback", "close"]
+
+
+@pytest.mark.parametrize("rowcount, started", [(1, True), (0, False)])
+def test_start_item_requires_our_claim(rowcount, started):
+    store, conn = store_with({"rowcount": rowcount})
+    assert store.start_item(ITEM) is started
+    sql, params = conn.log[0]
+    assert "SET state = 'burning'" in sql and "owner = %s AND state = 'claimed'" in sql
+    assert params == (60, 41, store.owner)
+
+
+@pytest.mark.parametrize("rowcount, renewed", [(1, True), (0, False)])
+def test_renew_extends_only_our_burning_lease(rowcount, renewed):
+    store, conn = store_with({"rowcount": rowcount})
+    assert store.renew(ITEM) is renewed
+    sql, params = conn.log[0]
+    assert "state = 'burning'" in sql
+    assert params == (60, 41, store.owner)
+
+
+@pytest.mark.parametrize("previous", ["burning", "uncertain"])
+def test_finish_item_settles_burning_or_swept(previous):
+    store, conn = store_with({"rows": [(previous,)]}, {"rowcount": 1})
+    assert store.finish_item(ITEM, True) == previous
+    select, update = conn.log
+    assert "state IN ('burning', 'uncertain')" in select[0] and "FOR UPDATE" in select[0]
+    assert update[1][0] == "done"
+    assert conn.events == ["start", "commit", "close"]
+
+
+def test_finish_item_not_ours_changes_nothing_and_warns(caplog):
+    store, conn = store_with({"rows": []})
+    with caplog.at_level(logging.WARNING, logger="engraving.job_store"):
+        assert store.finish_item(ITEM, False, "device_fault") is None
+    assert len(conn.log) == 1  # no UPDATE
+    assert "changed nothing" in caplog.text
+
+
+def test_retry_item_parks_for_reclaim():
+    store, conn = store_with({"rows": [("burning",)]}, {"rowcount": 1})
+    item = {**ITEM, "failures": 1}
+    assert store.retry_item(item, "device_fault") == "burning"
+    assert "state = 'retry'" in conn.log[1][0]
+    assert conn.log[1][1] == ("device_fault", 41)
+
+
+@pytest.mark.parametrize("rowcount, reclaimed", [(1, True), (0, False)])
+def test_reclaim_only_from_retry(rowcount, reclaimed):
+    store, conn = store_with({"rowcount": rowcount})
+    assert store.reclaim(ITEM, "S2") is reclaimed
+    assert "state = 'retry'" in conn.log[0][0]
+
+
+def test_release_returns_unstarted_claim():
+    store, conn = store_with({"rowcount": 1})
+    store.release(ITEM)
+    sql, params = conn.log[0]
+    assert "SET state = 'queued'" in sql and "state = 'claimed'" in sql
+    assert params == (41, store.owner)
+
+
+def test_sweep_flags_expired_burns_per_job():
+    store, conn = store_with({"rows": [(3, 2), (5, 1)]}, {"rowcount": 3})
+    assert store.sweep() == {3: 2, 5: 1}
+    assert "SET state = 'uncertain'" in conn.log[1][0]
+    assert conn.events == ["start", "commit", "close"]
+
+
+def test_sweep_with_nothing_expired_writes_nothing():
+    store, conn = store_with({"rows": []})
+    assert store.sweep() == {}
+    assert len(conn.log) == 1
+
+
+def test_renew_jobs_extends_only_our_open_jobs():
+    store, conn = store_with({"rowcount": 2})
+    assert store.renew_jobs() == 2
+    sql, params = conn.log[0]
+    assert "SET lease_expires_at = UTC_TIMESTAMP() + INTERVAL %s SECOND" in sql
+    assert params == (60, store.owner)
+
+
+def test_recover_adopts_only_jobs_whose_lease_expired():
+    job = {"id": 3, "status": "running", "priority": 1, "simulate": 1, "delay_seconds": 0.5,
+           "total_count": 4, "created_at": None}
+    store, conn = store_with({"rows": [job]}, {"rowcount": 1}, {"rowcount": 1}, {"rowcount": 1},
+                             {"rows": [{"job_id": 3, "state": "done", "count": 1},
+                                       {"job_id": 3, "state": "uncertain", "count": 1}]})
+    [recovered] = store.recover()
+    assert recovered["job_id"] == 3
+    assert (recovered["processed_count"], recovered["uncertain_count"]) == (1, 1)
+    select, adopt, requeue, flag = conn.log[:4]
+    assert "NOT (owner <=> %s)" in select[0] and select[1] == (store.owner,)
+    assert "lease_expires_at IS NULL OR lease_expires_at < UTC_TIMESTAMP()" in select[0]
+    assert "FOR UPDATE SKIP LOCKED" in select[0]
+    assert "UPDATE engrave_jobs SET owner = %s" in adopt[0] and adopt[1] == (store.owner, 60, 3)
+    assert "lease_expires_at < UTC_TIMESTAMP()" in requeue[0] and "owner <>" not in requeue[0]
+    assert "state = 'burning' AND lease_expires_at < UTC_TIMESTAMP()" in flag[0]
+    assert conn.events == ["start", "commit", "close"]
+
+
+def test_recover_leaves_live_owners_alone():
+    store, conn = store_with({"rows": []})
+    assert store.recover() == []
+    assert len(conn.log) == 1
+    assert conn.events == ["start", "commit", "close"]
+
+
+def test_recover_rolls_back_on_error():
+    job = {"id": 3, "status": "running", "priority": 0, "simulate": 0, "delay_seconds": 0,
+           "total_count": 1, "created_at": None}
+    store, conn = store_with({"rows": [job]}, {"error": RuntimeError("lost connection")})
+    with pytest.raises(RuntimeError):
+        store.recover()
+    assert conn.events == ["start", "rollback", "close"]
@@ -0,0 +1,90 @@
+"""EngravingLine must not hold its lock across job store calls (MySQL round trips)."""
+
+import threading
+import time
+
+from engraving.job_store import MemoryJobStore
+from engraving.line import EngravingLine
+
+
+class SlowStore(MemoryJobStore):
+    """Memory store whose writes block until the test lets them through."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+
+    def _wait(self):
+        self.entered.set()
+        assert self.gate.wait(5)
+
+    def create_job(self, *args, **kwargs):
+        self._wait()
+        return super().create_job(*args, **kwargs)
+
+    def cancel(self, job_id):
+        self._wait()
+        return super().cancel(job_id)
+
+    def set_job_status(self, job_id, status):
+        self._wait()
+        return super().set_job_status(job_id, status)
+
+
+def engrave(uid, simulate, delay_seconds):
+    time.sleep(delay_seconds)
+    return True
+
+
+def make_line(store):
+    return EngravingLine(engrave, station_names=["S1"], store=store)
+
+
+def run_in_thread(fn, *args):
+    thread = threading.Thread(target=fn, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def timed_status(line):
+    started = time.monotonic()
+    line.status()
+    return time.monotonic() - started
+
+
+def test_status_is_not_blocked_by_create_job():
+    store = SlowStore()
+    line = make_line(store)
+    try:
+        worker = run_in_thread(line.start_job, [{"uid": "ERC-1"}])
+        assert store.entered.wait(5)
+        assert timed_status(line) < 0.5
+        store.gate.set()
+        worker.join(5)
+        assert not worker.is_alive()
+    finally:
+        store.gate.set()
+        line.shutdown()
+
+
+def test_status_is_not_blocked_by_stop_or_pause():
+    store = SlowStore()
+    store.gate.set()
+    line = make_line(store)
+    try:
+        job_id, error = line.start_job([{"uid": f"ERC-{n}"} for n in range(50)], delay_seconds=0.05)
+        assert error is None
+        for action in (line.pause, line.stop):
+            store.gate.clear()
+            store.entered.clear()
+            worker = run_in_thread(action, job_id)
+            assert store.entered.wait(5)
+            assert timed_status(line) < 0.5
+            store.gate.set()
+            worker.join(5)
+            assert not worker.is_alive()
+        assert line.jobs[job_id].status == "stopped"
+    finally:
+        store.gate.set()
+        line.shutdown()
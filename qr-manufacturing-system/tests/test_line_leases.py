@@ -0,0 +1,60 @@
+"""Leases of items on the laser are kept alive; late settles clear the uncertain count."""
+
+import time
+
+from engraving.job_store import MemoryJobStore
+from engraving.line import EngravingLine
+
+
+class LeaseStore(MemoryJobStore):
+    """Durable-looking memory store that records renewals and flags job 1 as swept once."""
+
+    durable = True
+    lease_seconds = 0.3
+
+    def __init__(self):
+        super().__init__()
+        self.renewed = 0
+        self.swept = False
+
+    def renew(self, item):
+        self.renewed += 1
+        return True
+
+    def sweep(self):
+        if self.swept or 1 not in self.queues:
+            return {}
+        self.swept = True
+        return {1: 1}
+
+    def finish_item(self, item, success, reason=None):
+        return "uncertain"
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_long_burn_renews_lease_and_settles_uncertain():
+    store = LeaseStore()
+
+    def engrave(uid, simulate, delay_seconds):
+        time.sleep(2.5)
+        return True
+
+    line = EngravingLine(engrave, station_names=["S1"], store=store)
+    try:
+        job_id, error = line.start_job([{"uid": "ERC-1"}])
+        assert error is None
+        assert wait_for(lambda: line.jobs[job_id].status == "completed")
+        assert store.swept
+        assert store.renewed >= 2
+        assert line.jobs[job_id].uncertain_count == 0
+        assert not line.burning
+    finally:
+        line.shutdown()
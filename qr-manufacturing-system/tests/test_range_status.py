@@ -0,0 +1,34 @@
+"""Range status writes run on the server in one transaction (scripted connection)."""
+
+from datetime import datetime
+
+import pytest
+
+from scripted_db import ScriptedConnection
+from status_updates import lot_range_filter, set_status_range
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def test_range_filter_escapes_like_wildcards_in_the_prefix():
+    where, params = lot_range_filter("ERC", "V_1", "L%1", 10, 20)
+    assert params == ["ERC", "V_1", "L%1", "ERC-V\\_1-L\\%1-%", 10, 20]
+    assert where.count("SUBSTRING_INDEX") == 2
+
+
+def test_range_writes_with_insert_select_and_one_update():
+    conn = ScriptedConnection([{"rowcount": 3}, {"rowcount": 3}])
+    assert set_status_range(conn, "ERC", "V010", "L1", "Received", "Dock", "", "E1", NOW, 1, 3) == 3
+    (insert, insert_params), (update, update_params) = conn.log
+    assert "INSERT INTO statuses" in insert and "SELECT i.uid" in insert
+    assert insert_params[:5] == ("Received", "Dock", "", NOW, "E1")
+    assert update.startswith("UPDATE items i SET i.current_status=%s")
+    assert update_params == ("Received", "ERC", "V010", "L1", "ERC-V010-L1-%", 1, 3)
+    assert conn.events == ["start", "commit"]
+
+
+def test_range_rolls_back_when_current_status_update_fails():
+    conn = ScriptedConnection([{"rowcount": 3}, {"error": RuntimeError("Deadlock found")}])
+    with pytest.raises(RuntimeError):
+        set_status_range(conn, "ERC", "V010", "L1", "Received", "Dock", "", "E1", NOW)
+    assert conn.events == ["start", "rollback"]
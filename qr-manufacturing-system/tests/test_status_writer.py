@@ -0,0 +1,44 @@
+"""StatusWriteBuffer retry, row-by-row fallback and backpressure."""
+
+import threading
+
+from engraving.status_writer import StatusWriteBuffer
+from scripted_db import ScriptedConnection
+
+
+def test_failing_batch_falls_back_to_rows_and_dead_letters_the_bad_one():
+    error = {"error": RuntimeError("Data too long for column 'note'")}
+    conn = ScriptedConnection([error, error, error, {}, error, {}])
+    writer = StatusWriteBuffer(lambda: conn, max_batch=3, max_delay_ms=10000, max_retries=2)
+    writer.RETRY_DELAY_SECONDS = 0
+    for n in range(3):
+        writer.add(f"U{n}", "Engraved", "Engraving Station", "ok")
+    assert writer.flush(timeout=5)
+    stats = writer.stats()
+    assert (stats["failures"], stats["retries"]) == (3, 2)
+    assert (stats["rows_written"], stats["dead_lettered"], stats["pending"]) == (2, 1, 0)
+    # Three multi-row attempts, then one INSERT per row
+    assert [len(params) for _, params in conn.log] == [3, 3, 3, 5, 5, 5]
+    assert conn.log[4][1][0] == "U1"
+    writer.close()
+
+
+def test_full_buffer_applies_backpressure_then_drops():
+    release = threading.Event()
+    conn = ScriptedConnection([])
+
+    def get_conn():
+        release.wait(5)
+        return conn
+
+    writer = StatusWriteBuffer(get_conn, max_batch=1, max_delay_ms=0, max_pending=1, add_timeout=0.05)
+    assert writer.add("U1", "Engraved", "Engraving Station", "ok")
+    assert writer.add("U2", "Engraved", "Engraving Station", "ok")
+    # U1 is held by the blocked writer and U2 fills the buffer
+    assert writer.add("U3", "Engraved", "Engraving Station", "ok") is False
+    release.set()
+    assert writer.flush(timeout=5)
+    stats = writer.stats()
+    assert stats["dropped"] == 1 and stats["backpressure_waits"] >= 1
+    assert stats["rows_written"] == 2
+    writer.close()
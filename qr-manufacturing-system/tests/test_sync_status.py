@@ -0,0 +1,116 @@
+"""Offline sync batches commit as one transaction or not at all.
+
+The scripted-connection tests always run. The idempotency test against a
+real database needs Flask and mysql-connector, QR_TEST_DATABASE=1 and
+DB_HOST / DB_PORT / DB_USER / DB_PASS / DB_NAME pointing at a disposable
+database with the items, statuses and sync_events tables.
+"""
+
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+
+from scripted_db import ScriptedConnection
+from status_updates import apply_sync_events, parse_client_timestamp
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+def allow_all(employee_id, new_status):
+    return None
+
+
+def sync(conn, events, check_role=allow_all):
+    return apply_sync_events(conn, "scanner-1", events, "E1", check_role, NOW)
+
+
+def writes(conn):
+    return [sql for sql, _ in conn.log if sql.startswith(("INSERT", "UPDATE"))]
+
+
+def test_client_timestamp_is_utc_and_never_in_the_future():
+    assert parse_client_timestamp("2025-06-01T12:00:00+02:00", NOW) == datetime(2025, 6, 1, 10, 0)
+    assert parse_client_timestamp("2030-01-01T00:00:00Z", NOW) == NOW
+    assert parse_client_timestamp(None, NOW) is None
+    with pytest.raises(ValueError):
+        parse_client_timestamp("yesterday", NOW)
+
+
+def test_sync_applies_rejects_and_reports_duplicates():
+    conn = ScriptedConnection([
+        {"rows": [{"idempotency_key": "k0", "uid": "U1", "status": "Received", "result": "applied", "error": None}]},
+        {"rows": [{"uid": "U1"}]},
+    ])
+    results, applied = sync(conn, [
+        {"idempotency_key": "k0", "uid": "U1", "new_status": "Received"},
+        {"idempotency_key": "k1", "uid": "U1", "new_status": "Inspected", "client_timestamp": "2025-12-31T08:00:00"},
+        {"idempotency_key": "k2", "uid": "missing", "new_status": "Inspected"},
+        {"uid": "U1", "new_status": "Inspected"},
+    ])
+    assert [r["result"] for r in results] == ["duplicate", "applied", "rejected", "rejected"]
+    assert applied == [("U1", "Inspected", "MobileApp", "", datetime(2025, 12, 31, 8, 0))]
+    sync_insert, status_insert, current = writes(conn)
+    assert "INTO sync_events" in sync_insert and "INTO statuses" in status_insert and "UPDATE items i" in current
+    # Rejections are recorded as well, so a replay gets the same answer
+    assert [row[4] for row in conn.log[2][1]] == ["applied", "rejected"]
+    assert conn.events == ["start", "commit"]
+
+
+def test_sync_role_check_uses_per_event_employee():
+    conn = ScriptedConnection([{"rows": []}, {"rows": [{"uid": "U1"}]}])
+    checked = []
+
+    def deny(employee_id, new_status):
+        checked.append(employee_id)
+        return "Role 'viewer' not allowed"
+
+    results, applied = sync(conn, [{"idempotency_key": "k1", "uid": "U1", "new_status": "Received",
+                                    "employee_id": "E2"}], check_role=deny)
+    assert checked == ["E2"]
+    assert results[0]["error"] == "Role 'viewer' not allowed" and applied == []
+
+
+def test_sync_conflicting_upload_applies_nothing():
+    conn = ScriptedConnection([{"rows": []}, {"rows": [{"uid": "U1"}]},
+                               {"error": RuntimeError("1062: Duplicate entry 'k1'")}])
+    with pytest.raises(RuntimeError):
+        sync(conn, [{"idempotency_key": "k1", "uid": "U1", "new_status": "Received"}])
+    assert conn.events == ["start", "rollback"]
+    # The keys are written before the status rows, so the conflict stops the batch first
+    assert not any("INTO statuses" in sql for sql in writes(conn))
+
+
+@pytest.mark.skipif(os.getenv("QR_TEST_DATABASE") != "1", reason="needs a disposable MySQL test database")
+def test_sync_replay_is_idempotent_against_mysql():
+    pytest.importorskip("flask")
+    pytest.importorskip("mysql.connector")
+    os.environ.setdefault("ENGRAVING_DURABLE_QUEUE", "false")
+    os.environ.setdefault("ITEM_INDEX_ENABLED", "false")
+    import combined_backend_service as backend
+
+    client = backend.app.test_client()
+    uid = f"TEST-{uuid.uuid4().hex[:8]}"
+    conn = backend.get_db_conn()
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO items (uid, component, vendor, lot, mfg_date, warranty_years, created_at)
+        VALUES (%s, 'TEST', 'V000', 'L0', CURDATE(), 1, UTC_TIMESTAMP())
+    """, (uid,))
+    body = {"device_id": "pytest", "events": [
+        {"idempotency_key": f"{uid}-1", "uid": uid, "new_status": "Received"},
+        {"idempotency_key": f"{uid}-2", "uid": uid, "new_status": "Inspected"}]}
+    try:
+        first = client.post("/sync/status_events", json=body).get_json()
+        second = client.post("/sync/status_events", json=body).get_json()
+        assert first["applied"] == 2
+        assert second["duplicate"] == 2 and second["applied"] == 0
+        cur.execute("SELECT COUNT(*) FROM statuses WHERE uid = %s", (uid,))
+        assert cur.fetchone()[0] == 2
+    finally:
+        cur.execute("DELETE FROM sync_events WHERE uid = %s", (uid,))
+        cur.execute("DELETE FROM statuses WHERE uid = %s", (uid,))
+        cur.execute("DELETE FROM items WHERE uid = %s", (uid,))
+        cur.close()
+        conn.close()
@@ -0,0 +1,55 @@
+"""MarkVerifier grading: ECC budget per engraved level, and OpenCV decoding when installed."""
+
+import pytest
+
+from engraving import verification
+from engraving.geometry import geometry_from_matrix
+from engraving.verification import Capture, MarkVerifier, SimulatedCamera
+
+MATRIX = [[(row * 7 + col * 3) % 5 < 2 for col in range(10)] for row in range(10)]
+
+
+class FixedCamera:
+    """Reports a fixed share of damaged modules (no image, so the ECC model decides)."""
+
+    name = "fixed"
+
+    def __init__(self, damage, contrast=0.8):
+        self.damage = damage
+        self.contrast = contrast
+
+    def capture(self, uid, geometry):
+        total = geometry.size * geometry.size
+        return Capture(uid, self.contrast, round(self.damage * total), total)
+
+
+@pytest.mark.parametrize("level, passed", [("L", False), ("M", False), ("Q", True), ("H", True)])
+def test_ecc_budget_follows_the_engraved_level(level, passed):
+    geometry = geometry_from_matrix("ERC-V010-L1-00001", MATRIX, error_correction=level)
+    result = MarkVerifier(FixedCamera(damage=0.10)).verify("ERC-V010-L1-00001", geometry)
+    assert result["error_correction"] == level
+    assert result["passed"] is passed
+    expected = max(1 - 0.10 / verification.ECC_RECOVERY[level], 0)
+    assert result["unused_ecc"] == pytest.approx(expected, abs=1e-3)
+
+
+def test_without_opencv_readability_comes_from_the_ecc_model(monkeypatch):
+    monkeypatch.setattr(verification, "opencv", lambda: None)
+    geometry = geometry_from_matrix("ERC-V010-L1-00001", MATRIX)
+    camera = SimulatedCamera(capture_seconds=0, damage_mean=0.0, damage_stddev=0.0, seed=1)
+    assert camera.capture("ERC-V010-L1-00001", geometry).image is None
+    result = MarkVerifier(camera).verify("ERC-V010-L1-00001", geometry)
+    assert result["decoded"] == "ERC-V010-L1-00001"
+
+
+def test_rendered_mark_is_decoded_with_opencv():
+    pytest.importorskip("cv2")
+    pytest.importorskip("qrcode")
+    from engraving.geometry import render_qr_geometry
+
+    geometry = render_qr_geometry("ERC-V010-L1-00001", error_correction="Q")
+    clean = SimulatedCamera(capture_seconds=0, contrast_stddev=0.0, damage_mean=0.0, damage_stddev=0.0, seed=1)
+    result = MarkVerifier(clean).verify("ERC-V010-L1-00001", geometry)
+    assert result["decoded"] == "ERC-V010-L1-00001" and result["passed"]
+    wrecked = SimulatedCamera(capture_seconds=0, contrast_stddev=0.0, damage_mean=0.5, damage_stddev=0.0, seed=1)
+    assert MarkVerifier(wrecked).verify("ERC-V010-L1-00001", geometry)["reason"] == "unreadable"
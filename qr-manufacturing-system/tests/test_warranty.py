@@ -0,0 +1,22 @@
+from datetime import date, datetime
+
+from warranty import compute_expiry_date
+
+
+def test_calendar_years():
+    assert compute_expiry_date(date(2023, 3, 15), 5) == date(2028, 3, 15)
+
+
+def test_leap_day_rolls_back_like_mysql_date_add():
+    assert compute_expiry_date(date(2024, 2, 29), 1) == date(2025, 2, 28)
+    assert compute_expiry_date(date(2024, 2, 29), 4) == date(2028, 2, 29)
+
+
+def test_accepts_strings_and_datetimes():
+    assert compute_expiry_date("2020-05-01", 2) == date(2022, 5, 1)
+    assert compute_expiry_date(datetime(2020, 5, 1, 12, 30), 2) == date(2022, 5, 1)
+
+
+def test_missing_inputs():
+    assert compute_expiry_date(None, 3) is None
+    assert compute_expiry_date(date(2020, 1, 1), None) is None
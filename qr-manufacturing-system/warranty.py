@@ -0,0 +1,26 @@
+"""
+Warranty expiry rule shared by the backend services and the legacy scanning service.
+
+Expiry is mfg_date plus warranty_years calendar years, matching the
+items.expiry_date generated column (see migrate_expiry_date.py).
+"""
+
+from datetime import datetime
+
+def compute_expiry_date(mfg_date, warranty_years):
+    """mfg_date plus warranty_years calendar years.
+
+    Same rule as the items.expiry_date generated column
+    (DATE_ADD(mfg_date, INTERVAL warranty_years YEAR)): Feb 29 rolls back to Feb 28.
+    """
+    if mfg_date is None or warranty_years is None:
+        return None
+    if isinstance(mfg_date, str):
+        mfg_date = datetime.strptime(mfg_date[:10], "%Y-%m-%d").date()
+    if isinstance(mfg_date, datetime):
+        mfg_date = mfg_date.date()
+    year = mfg_date.year + int(warranty_years)
+    try:
+        return mfg_date.replace(year=year)
+    except ValueError:
+        return mfg_date.replace(year=year, day=28)
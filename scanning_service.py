@@ -11,7 +11,13 @@ DB: MySQL (sih_qr_db)
 
 from flask import Flask, request, jsonify
 import mysql.connector
-from datetime import datetime, timedelta
+from datetime import datetime
+from pathlib import Path
+import sys
+
+# Shared expiry rule lives with the backend services
+sys.path.insert(0, str(Path(__file__).resolve().parent / "qr-manufacturing-system"))
+from warranty import compute_expiry_date
 
 # ---------------- DB CONFIG ----------------
 DB_CONFIG = {
@@ -71,10 +77,8 @@ def scan_qr():
         if not item:
             return jsonify({"error": "Item not found"}), 404
 
-        # Calculate expiry = mfg_date + warranty_years
-        expiry_date = None
-        if item.get("mfg_date") and item.get("warranty_years"):
-            expiry_date = item["mfg_date"] + timedelta(days=365*item["warranty_years"])
+        # Expiry = mfg_date + warranty_years (generated items.expiry_date column when present)
+        expiry_date = item.get("expiry_date") or compute_expiry_date(item.get("mfg_date"), item.get("warranty_years"))
 
         # Fetch latest status
         cur.execute("""